@@ -0,0 +1,111 @@
+"""
+Разбор листов классификатора: прежний openpyxl.load_workbook (полная объектная модель) с чтением
+sheet.cell(row, column) по max_row против read_only-книги и iter_rows(values_only=True) (_parse_sheet).
+Книга генерируется заново: 100000 строк на листе "Изделия" по умолчанию.
+Запуск: python benchmarks/bench_excel_parse.py [число изделий]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import openpyxl
+
+from excel_importer import _parse_sheet
+
+SHEET_COLUMNS = {
+    "Категории": ["CategoryCode", "CategoryName"],
+    "Серии": ["CategoryCode", "SeriesCode", "SeriesName"],
+    "Изделия": ["CategoryCode", "SeriesCode", "ItemNumberCode", "ItemNumberName"],
+    "Операции": ["OperationCode", "OperationName"],
+}
+CODE_DIGITS = "0123456789ABCDEFGHKMNPQRSTUVWXYZ"
+
+
+def make_classifier_workbook(file_path, items_count, series_count=None):
+    """
+    Пишет classifier_data.xlsx (write_only) с items_count изделиями, по 1000 на серию;
+    series_count - число строк листа "Серии" (по умолчанию столько, сколько нужно изделиям).
+    """
+    series_needed = max(1, -(-items_count // 1000))
+    series_count = max(series_count or series_needed, series_needed)
+    categories = [f"C{CODE_DIGITS[n // 32]}{CODE_DIGITS[n % 32]}" for n in range(-(-series_count // 32))]
+    series = [(categories[n // 32], CODE_DIGITS[n % 32]) for n in range(series_count)]
+    workbook = openpyxl.Workbook(write_only=True)
+    rows_by_sheet = {
+        "Категории": [(code, f"Категория {code}") for code in categories],
+        "Серии": [(category, code, f"Серия {category}.{code}") for category, code in series],
+        "Изделия": ((*series[n // 1000], CODE_DIGITS[n % 1000 // 32] + CODE_DIGITS[n % 32],
+                    f"Изделие номер {n}") for n in range(items_count)),
+        "Операции": [(code, f"Операция {code}") for code in CODE_DIGITS],
+    }
+    for sheet_name, columns in SHEET_COLUMNS.items():
+        sheet = workbook.create_sheet(sheet_name)
+        sheet.append(columns)
+        for row in rows_by_sheet[sheet_name]:
+            sheet.append(row)
+    workbook.save(file_path)
+
+
+def legacy_parse(excel_file, configs):
+    """Прежний разбор: полная книга и sheet.cell для каждой ячейки. Возвращает {лист: число строк}."""
+    workbook = openpyxl.load_workbook(excel_file)
+    parsed = {}
+    for sheet_name, config in configs.items():
+        sheet = workbook[sheet_name]
+        headers = [cell.value for cell in sheet[1]]
+        header_to_col_idx = {header: idx for idx, header in enumerate(headers)}
+        excel_data_for_sheet = {}
+        for row_idx in range(2, sheet.max_row + 1):
+            row_data = {col_name: sheet.cell(row=row_idx, column=header_to_col_idx[col_name] + 1).value
+                        for col_name in config["columns"]}
+            if all(row_data.get(col) is not None for col in config["required_cols"]):
+                excel_data_for_sheet["-".join(str(row_data[col]) for col in config["key_cols"])] = row_data
+        parsed[sheet_name] = len(excel_data_for_sheet)
+    return parsed
+
+
+def streaming_parse(excel_file, configs):
+    """Текущий разбор (_parse_sheet по read_only-книге). Возвращает {лист: число строк}."""
+    workbook = openpyxl.load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        return {sheet_name: len(_parse_sheet(workbook, sheet_name, config)[0])
+                for sheet_name, config in configs.items()}
+    finally:
+        workbook.close()
+
+
+def measure(parse, excel_file, configs):
+    """Время - отдельным прогоном без tracemalloc, который замедляет разбор в разы."""
+    started = time.perf_counter()
+    parsed = parse(excel_file, configs)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    parse(excel_file, configs)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return parsed, elapsed, peak
+
+
+def main():
+    items_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    configs = {sheet_name: {"columns": columns, "required_cols": columns,
+                            "key_cols": columns[:-1]} for sheet_name, columns in SHEET_COLUMNS.items()}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        excel_file = os.path.join(temp_dir, "classifier_data.xlsx")
+        make_classifier_workbook(excel_file, items_count)
+        print(f"classifier_data.xlsx: {items_count} изделий, {os.path.getsize(excel_file) / 2 ** 20:.1f} МБ")
+        results = []
+        for label, parse in (("load_workbook + sheet.cell", legacy_parse),
+                             ("read_only + iter_rows", streaming_parse)):
+            parsed, elapsed, peak = measure(parse, excel_file, configs)
+            results.append(parsed)
+            print(f"  {label:<27} {elapsed:7.2f} с, пик памяти {peak / 2 ** 20:7.1f} МБ")
+        assert results[0] == results[1], results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Разбор и сборка пути для миллиона ID: прежний parse_id_string (re.match со строкой шаблона на каждый вызов,
+словарь через match.group) против fixture_id_codec.parse_many и format_path.
+Запуск: python benchmarks/bench_fixture_id_codec.py [число ID, по умолчанию 1000000]
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fixture_id_codec
+
+
+def legacy_parse_id_string(full_id_string):
+    """Прежний FixtureDBManager.parse_id_string (без печати ошибок)."""
+    match = re.match(
+        r"^([A-Z]{2,3})\.([0-9A-Z]{1})([0-9A-Z]{2})\.([0-9A-Z]{1})([0-9A-Z]{2})\.([0-9A-Z]{2})([0-9A-Z]{2})([0-9A-Z]{2})-([0-9A-Z]{2})([0-9A-Z]{0,1})$",
+        full_id_string)
+    if not match:
+        return None
+    return {
+        'Category': match.group(1),
+        'Series': match.group(2),
+        'ItemNumber': match.group(3),
+        'Operation': match.group(4),
+        'FixtureNumber': match.group(5),
+        'UniqueParts': match.group(6),
+        'PartInAssembly': match.group(7),
+        'PartQuantity': match.group(8),
+        'AssemblyVersionCode': match.group(9),
+        'IntermediateVersion': match.group(10) if match.group(10) else None
+    }
+
+
+def legacy_format_path(base_dir, parsed_id):
+    """Прежняя сборка пути папки в add_fixture_id."""
+    category_series_item = f"{parsed_id['Category']}.{parsed_id['Series']}{parsed_id['ItemNumber']}"
+    category_series_item_operation_fixture = f"{category_series_item}.{parsed_id['Operation']}{parsed_id['FixtureNumber']}"
+    folder_name = f"{category_series_item_operation_fixture}.{parsed_id['UniqueParts']}0000-" \
+                  f"{parsed_id['AssemblyVersionCode']}{parsed_id['IntermediateVersion'] or ''}"
+    return os.path.join(base_dir, parsed_id['Category'], category_series_item,
+                        category_series_item_operation_fixture, folder_name)
+
+
+def make_ids(count):
+    return [f"CS.1{n % 100:02d}.A{n // 100 % 100:02d}.{n // 10000 % 100:02d}0101-{n % 7 + 1:02d}{'B' if n % 3 else ''}"
+            for n in range(count)]
+
+
+def timed(function):
+    started = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - started
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    ids = make_ids(count)
+
+    legacy_parsed, legacy_parse_elapsed = timed(lambda: [legacy_parse_id_string(full_id) for full_id in ids])
+    parsed, parse_elapsed = timed(lambda: [parsed_id for _, parsed_id in fixture_id_codec.parse_many(ids)])
+    assert legacy_parsed == parsed
+
+    legacy_paths, legacy_path_elapsed = timed(lambda: [legacy_format_path("root", parsed_id) for parsed_id in parsed])
+    paths, path_elapsed = timed(lambda: [fixture_id_codec.format_path("root", parsed_id) for parsed_id in parsed])
+    assert legacy_paths == paths
+
+    print(f"{count} ID")
+    print(f"  разбор:       прежний parse_id_string {legacy_parse_elapsed:.2f} с, parse_many {parse_elapsed:.2f} с")
+    print(f"  путь папки:   прежний код {legacy_path_elapsed:.2f} с, format_path {path_elapsed:.2f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Полный импорт классификатора: последовательный разбор листов против разбора в пуле процессов
+(import_from_excel(parallel=True)), каждый раз в новую базу. Книга с двумя крупными листами
+(Серии и Изделия) генерируется заново.
+Запуск: python benchmarks/bench_parallel_import.py [число изделий] [число серий]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_excel_parse import make_classifier_workbook
+from db_manager import FixtureDBManager
+from excel_importer import ExcelClassifierImporter
+
+
+def timed_import(temp_dir, excel_file, parallel):
+    db_dir = tempfile.mkdtemp(dir=temp_dir)
+    with contextlib.redirect_stdout(io.StringIO()):
+        db = FixtureDBManager("bench.db", db_dir)
+        try:
+            started = time.perf_counter()
+            success, added, _, _, _ = ExcelClassifierImporter(db).import_from_excel(
+                excel_file, force=True, parallel=parallel)
+            elapsed = time.perf_counter() - started
+        finally:
+            db.close()
+    return success, added, elapsed
+
+
+def main():
+    items_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    series_count = int(sys.argv[2]) if len(sys.argv) > 2 else items_count // 2
+    with tempfile.TemporaryDirectory() as temp_dir:
+        excel_file = os.path.join(temp_dir, "classifier_data.xlsx")
+        make_classifier_workbook(excel_file, items_count, series_count)
+        print(f"classifier_data.xlsx: {items_count} изделий, {series_count} серий, "
+              f"процессоров: {os.cpu_count()}")
+        results = []
+        for label, parallel in (("последовательно", False), ("пул процессов", True)):
+            success, added, elapsed = timed_import(temp_dir, excel_file, parallel)
+            results.append(added)
+            print(f"  {label:<16} {elapsed:7.2f} с, успех {success}, добавлено {added}")
+        assert results[0] == results[1], results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Память строк списка оснасток: dict из sqlite3.Row (прежний вариант) против DBRecord (record_factory).
+Запуск: python benchmarks/bench_record_memory.py [число оснасток, по умолчанию 200000]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_manager import FixtureDBManager, record_factory
+
+
+def fill_database(db, count):
+    """Вставляет count оснасток напрямую (без папок), 25 версий на сборку."""
+    rows = []
+    for n in range(count):
+        assembly, version = divmod(n, 25)
+        item, tt = divmod(assembly, 1000)
+        full_id = f"CS.1{item % 100:02d}.A{tt % 100:02d}.{tt // 100:02d}0101-{version + 1:02d}"
+        rows.append(('CS', '1', f"{item % 100:02d}", 'A', f"{tt % 100:02d}", f"{tt // 100:02d}", '01', '01',
+                     f"{version + 1:02d}", None, f"/root/{full_id}", f"{full_id}#{n}", version + 1))
+    with db.transaction():
+        db.cursor.executemany("""
+            INSERT INTO FixtureIDs (Category, Series, ItemNumber, Operation, FixtureNumber, UniqueParts,
+                PartInAssembly, PartQuantity, AssemblyVersionCode, IntermediateVersion, BasePath, FullIDString,
+                VersionSortKey) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, rows)
+
+
+def measure(conn, row_factory, convert):
+    conn.row_factory = row_factory
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows = [convert(row) for row in conn.execute("SELECT * FROM FixtureIDs")]
+    elapsed = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(rows), size, elapsed
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db = FixtureDBManager("bench.db", temp_dir)
+        fill_database(db, count)
+        conn = sqlite3.connect(db.db_path)
+        try:
+            for label, row_factory, convert in (("dict(sqlite3.Row)", sqlite3.Row, dict),
+                                                ("DBRecord", record_factory, lambda row: row)):
+                rows_count, size, elapsed = measure(conn, row_factory, convert)
+                print(f"{label:<18} {rows_count} строк: {size / 2 ** 20:8.1f} МБ "
+                      f"({size / rows_count:6.0f} байт на строку), {elapsed:.2f} с")
+        finally:
+            conn.close()
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+from db_manager import FixtureDBManager
+
+
+class ClassifierCache:
+    """
+    Классификатор (категории, серии, изделия, операции) в памяти для GUI.
+    Имена ищутся по кортежам кодов за O(1): ('category', (KKK,)), ('series', (KKK, S)),
+    ('item_number', (KKK, S, NN)), ('operation', (D,)); списки для Combobox любой категории/серии
+    выдаются без запроса к БД.
+    Перечитывается только по refresh(force=True) (после импорта) или когда другое соединение изменило
+    таблицы классификатора: PRAGMA data_version (любая запись в базу) проверяется первым, а счетчики
+    TableGenerations отсеивают запись только оснасток.
+    """
+
+    def __init__(self, db_manager_instance):
+        self.db_manager = db_manager_instance
+        self._data_version = None
+        self._generations = None
+        self._loaded = False
+        self.categories = []  # Rows in CategoryCode order, as get_categories
+        self.operations = []
+        self._series_by_category = {}  # KKK -> rows in SeriesCode order
+        self._items_by_series = {}  # (KKK, S) -> rows in ItemNumberCode order
+        self._names = {'category': {}, 'series': {}, 'item_number': {}, 'operation': {}}
+
+    def refresh(self, force=False):
+        """Перечитывает классификатор, если он еще не загружен, изменился или force=True. Возвращает True, если перечитан."""
+        data_version = self.db_manager.get_data_version()
+        if self._loaded and not force and data_version == self._data_version:
+            return False
+        # Read before the tables: a change made meanwhile then shows up as a newer generation next time
+        generations = self.db_manager.get_table_generations()
+        self._data_version = data_version
+        if self._loaded and not force and generations is not None and generations == self._generations:
+            return False  # Only fixtures were written
+
+        self.categories = self.db_manager.get_categories()
+        self.operations = self.db_manager.get_operation_descriptions()
+        series_by_category = {}
+        for series in self.db_manager.get_series_descriptions():
+            series_by_category.setdefault(series['CategoryCode'], []).append(series)
+        items_by_series = {}
+        for item in self.db_manager.get_item_number_descriptions():
+            items_by_series.setdefault((item['CategoryCode'], item['SeriesCode']), []).append(item)
+
+        self._series_by_category = series_by_category
+        self._items_by_series = items_by_series
+        self._names = {
+            'category': {(c['CategoryCode'],): c['CategoryName'] for c in self.categories},
+            'series': {(s['CategoryCode'], s['SeriesCode']): s['SeriesName']
+                       for rows in series_by_category.values() for s in rows},
+            'item_number': {(i['CategoryCode'], i['SeriesCode'], i['ItemNumberCode']): i['ItemNumberName']
+                            for rows in items_by_series.values() for i in rows},
+            'operation': {(o['OperationCode'],): o['OperationName'] for o in self.operations},
+        }
+        self._generations = generations
+        self._loaded = True
+        return True
+
+    def get_series(self, category_code):
+        """Серии категории (строки с SeriesCode, SeriesName) в порядке SeriesCode."""
+        return self._series_by_category.get(category_code, [])
+
+    def get_items(self, category_code, series_code):
+        """Изделия серии (строки с ItemNumberCode, ItemNumberName) в порядке ItemNumberCode."""
+        return self._items_by_series.get((category_code, series_code), [])
+
+    def get_name(self, type_of_code, codes):
+        """Имя по типу ('category', 'series', 'item_number', 'operation') и кортежу кодов или None."""
+        return self._names[type_of_code].get(tuple(codes))
+
+
+# Example usage for testing (can be removed in final version)
+if __name__ == "__main__":
+    db_manager = FixtureDBManager(db_name="my_fixtures_app_test.db", base_db_dir="fixture_database_root_app_test")
+    cache = ClassifierCache(db_manager)
+
+    print(f"Загружен: {cache.refresh()}, повторно: {cache.refresh()}")
+    for category in cache.categories[:3]:
+        series_list = cache.get_series(category['CategoryCode'])
+        print(f"{category['CategoryCode']} ({category['CategoryName']}): серий {len(series_list)}")
+        for series in series_list[:2]:
+            print(f"  {series['SeriesCode']}: {cache.get_name('series', (category['CategoryCode'], series['SeriesCode']))}, "
+                  f"изделий {len(cache.get_items(category['CategoryCode'], series['SeriesCode']))}")
+
+    db_manager.close()
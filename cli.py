@@ -0,0 +1,156 @@
+"""
+Командная строка для ночных заданий без графического интерфейса:
+импорт классификатора, пакетная регистрация ID оснасток, выгрузка реестра и сверка папок.
+Не импортирует tkinter/customtkinter; openpyxl загружается только командами, работающими с .xlsx.
+
+Примеры:
+    python cli.py import-classifier classifier_data.xlsx
+    python cli.py import-classifier plm_export_dir --force
+    python cli.py import-fixtures legacy_ids.csv --rejects rejects.csv
+    python cli.py export register.xlsx --only-actual
+    python cli.py reconcile --create-missing
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+from db_manager import FixtureDBManager
+
+# Те же база и корневая папка, что и у FixtureApp
+DEFAULT_DB_NAME = "my_fixtures_app.db"
+DEFAULT_BASE_DIR = "fixture_database_root_app"
+
+
+def import_classifier_command(db_manager, args):
+    """Импорт классификатора из .xlsx или папки/файла CSV/TSV (файлы с именами листов)."""
+    from excel_importer import ExcelClassifierImporter
+    importer = ExcelClassifierImporter(db_manager)
+
+    if os.path.isdir(args.source):
+        text_files = importer.find_text_files(args.source)
+        if not text_files:
+            print(f"Ошибка: В папке '{args.source}' нет файлов классификатора "
+                  f"({', '.join(importer.sheet_configs.keys())}).")
+            return False
+        result = importer.import_from_text_files(text_files, force=args.force)
+    elif os.path.splitext(args.source)[1].lower() in (".csv", ".tsv", ".txt"):
+        sheet_name = os.path.splitext(os.path.basename(args.source))[0]
+        if sheet_name not in importer.sheet_configs:
+            print(f"Ошибка: Имя файла '{args.source}' должно совпадать с именем листа "
+                  f"({', '.join(importer.sheet_configs.keys())}).")
+            return False
+        result = importer.import_from_text_files({sheet_name: args.source}, force=args.force)
+    else:
+        result = importer.import_from_excel(args.source, force=args.force, parallel=args.parallel)
+    return result[0]
+
+
+def import_fixtures_command(db_manager, args):
+    """Пакетная регистрация существующих оснасток по списку полных ID."""
+    from fixture_importer import FixtureIDImporter
+    importer = FixtureIDImporter(db_manager)
+    success, added_count, rejected = importer.import_from_file(
+        args.source, id_column=args.id_column, sheet_name=args.sheet, batch_size=args.batch_size,
+        reject_report_file=args.rejects)
+    return success
+
+
+def export_command(db_manager, args):
+    """Выгрузка реестра оснасток в .xlsx/CSV/TSV."""
+    from fixture_exporter import FixtureExporter
+    exporter = FixtureExporter(db_manager)
+    success, rows_count = exporter.export(
+        args.target, category_code=args.category, series_code=args.series, item_number_code=args.item,
+        operation_code=args.operation, only_actual=args.only_actual)
+    return success
+
+
+def reconcile_command(db_manager, args):
+    """
+    Сверка реестра с файловым хранилищем: оснастки, папки BasePath которых нет на диске.
+    С --create-missing недостающие папки создаются.
+    """
+    checked_paths = set()
+    missing_paths = []
+    fixtures_count = 0
+    try:
+        for fixture in db_manager.iter_fixture_ids_with_descriptions():
+            fixtures_count += 1
+            base_path = fixture['BasePath']
+            if base_path in checked_paths:
+                continue
+            checked_paths.add(base_path)
+            if not os.path.isdir(base_path):
+                missing_paths.append((base_path, fixture['FullIDString']))
+    except sqlite3.Error:
+        print(f"Сверка прервана после {fixtures_count} оснасток: реестр прочитан не полностью.")
+        return False
+
+    print(f"Проверено оснасток: {fixtures_count}, папок: {len(checked_paths)}, отсутствует папок: {len(missing_paths)}")
+    success = True
+    for base_path, full_id_string in missing_paths:
+        if args.create_missing:
+            try:
+                os.makedirs(base_path, exist_ok=True)
+                print(f"  Создана папка '{base_path}' ({full_id_string})")
+            except OSError as e:
+                print(f"  Ошибка при создании папки '{base_path}': {e}")
+                success = False
+        else:
+            print(f"  Нет папки '{base_path}' ({full_id_string})")
+    return success and (args.create_missing or not missing_paths)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Реестр оснасток: задания командной строки.")
+    parser.add_argument("--db", default=DEFAULT_DB_NAME, help=f"Имя файла базы данных (по умолчанию {DEFAULT_DB_NAME})")
+    parser.add_argument("--base-dir", default=DEFAULT_BASE_DIR,
+                        help=f"Корневая папка базы и оснасток (по умолчанию {DEFAULT_BASE_DIR})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    classifier_parser = subparsers.add_parser("import-classifier", help="Импорт классификатора из Excel или CSV/TSV")
+    classifier_parser.add_argument("source", help=".xlsx, файл листа CSV/TSV или папка с файлами листов")
+    classifier_parser.add_argument("--force", action="store_true", help="Импортировать, даже если файл не изменился")
+    classifier_parser.add_argument("--parallel", action="store_true", help="Разбирать листы .xlsx в отдельных процессах")
+    classifier_parser.set_defaults(handler=import_classifier_command)
+
+    fixtures_parser = subparsers.add_parser("import-fixtures", help="Пакетная регистрация оснасток по списку ID")
+    fixtures_parser.add_argument("source", help=".xlsx или CSV/TSV с колонкой полных ID")
+    fixtures_parser.add_argument("--id-column", default="FullIDString", help="Колонка с ID (по умолчанию FullIDString)")
+    fixtures_parser.add_argument("--sheet", help="Лист .xlsx (по умолчанию - первый с колонкой ID)")
+    fixtures_parser.add_argument("--batch-size", type=int, default=5000, help="ID в одной транзакции")
+    fixtures_parser.add_argument("--rejects", help="CSV-файл для отчета об отклоненных ID")
+    fixtures_parser.set_defaults(handler=import_fixtures_command)
+
+    export_parser = subparsers.add_parser("export", help="Выгрузка реестра оснасток в .xlsx/CSV/TSV")
+    export_parser.add_argument("target", help="Файл выгрузки; формат по расширению")
+    export_parser.add_argument("--category", help="Код категории (KKK)")
+    export_parser.add_argument("--series", help="Код серии (S)")
+    export_parser.add_argument("--item", help="Код изделия (NN)")
+    export_parser.add_argument("--operation", help="Код операции (D)")
+    export_parser.add_argument("--only-actual", action="store_true", help="Только актуальные версии")
+    export_parser.set_defaults(handler=export_command)
+
+    reconcile_parser = subparsers.add_parser("reconcile", help="Сверка реестра с папками оснасток на диске")
+    reconcile_parser.add_argument("--create-missing", action="store_true", help="Создать недостающие папки")
+    reconcile_parser.set_defaults(handler=reconcile_command)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    start_time = time.perf_counter()
+    db_manager = FixtureDBManager(db_name=args.db, base_db_dir=args.base_dir)
+    try:
+        success = args.handler(db_manager, args)
+    finally:
+        db_manager.close()
+    print(f"Команда '{args.command}' {'выполнена' if success else 'завершилась с ошибками'} "
+          f"за {time.perf_counter() - start_time:.2f} с.")
+    return 0 if success else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,17 +1,191 @@
 import sqlite3
 import os
+import sys
 import shutil
-import re
+import threading
+import time
+from array import array
+from contextlib import contextmanager
+
+import fixture_id_codec
+
+
+class DBRecord(tuple):
+    """
+    Строка результата запроса: кортеж значений без собственного словаря с доступом по имени столбца,
+    совместимый с прежними dict-строками (record['FullIDString'], record.get(...), dict(record), 'key' in record).
+    Итерация, распаковка и индексы (record[0]) - как у кортежа, по значениям; имена столбцов дает keys().
+    Подклассы с конкретным набором столбцов создает record_factory.
+    """
+    __slots__ = ()
+    _fields = ()
+    _index = {}
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            index = self._index.get(key)
+            if index is None:
+                raise KeyError(key)
+            return tuple.__getitem__(self, index)
+        return tuple.__getitem__(self, key)
+
+    def __getattr__(self, name):
+        index = self._index.get(name)
+        if index is None:
+            raise AttributeError(name)
+        return tuple.__getitem__(self, index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __repr__(self):
+        return f"{{{', '.join(f'{key!r}: {value!r}' for key, value in self.items())}}}"
+
+    def get(self, key, default=None):
+        index = self._index.get(key)
+        return default if index is None else tuple.__getitem__(self, index)
+
+    def keys(self):
+        return self._fields
+
+    def values(self):
+        return tuple(self)
+
+    def items(self):
+        return zip(self._fields, self)
+
+
+_record_classes = {}
+_last_record_class = (None, None)  # (cursor.description, класс) последнего запроса
+# Столбцы с уникальными строками; остальные текстовые значения (коды, названия) повторяются
+# из строки в строку и хранятся в одном экземпляре через sys.intern
+_UNIQUE_TEXT_COLUMNS = {'FullIDString', 'BasePath'}
+
+
+def record_factory(cursor, row):
+    """row_factory соединений FixtureDBManager: превращает строку в DBRecord с именами столбцов запроса."""
+    global _last_record_class
+    description, record_class = _last_record_class
+    if description is not cursor.description:
+        description = cursor.description
+        fields = tuple(column[0] for column in description)
+        record_class = _record_classes.get(fields)
+        if record_class is None:
+            record_class = type("DBRecord", (DBRecord,), {
+                "__slots__": (),
+                "_fields": fields,
+                "_index": {field: index for index, field in enumerate(fields)},
+                "_shared_positions": [index for index, field in enumerate(fields)
+                                      if field not in _UNIQUE_TEXT_COLUMNS],
+            })
+            _record_classes[fields] = record_class
+        _last_record_class = (description, record_class)
+
+    row = list(row)
+    for position in record_class._shared_positions:
+        value = row[position]
+        if value.__class__ is str:
+            row[position] = sys.intern(value)
+    return record_class(row)
 
 
 class FixtureDBManager:
-    def __init__(self, db_name="my_fixtures_app.db", base_db_dir="."):
+    EXISTING_FIXTURE_NUMBERS_QUERY = """
+        SELECT FixtureNumber FROM FixtureIDs
+        WHERE Category = ? AND Series = ? AND ItemNumber = ? AND Operation = ?
+        ORDER BY FixtureNumber
+    """
+    LATEST_ASSEMBLY_VERSION_QUERY = """
+        SELECT
+            AssemblyVersionCode,
+            IntermediateVersion
+        FROM
+            FixtureIDs
+        WHERE
+            Category = ? AND Series = ? AND ItemNumber = ? AND Operation = ? AND FixtureNumber = ? AND UniqueParts = ?
+            AND VersionSortKey >= 0
+        ORDER BY
+            VersionSortKey DESC
+        LIMIT 1
+    """
+    # Строка f актуальна, если ее версия - максимальная в своей сборке KKK.SNN.DTT.AA.
+    # X-версии (VersionSortKey = -1) актуальны, только если в сборке нет обычных версий.
+    ACTUAL_VERSION_CONDITION = """
+        f.VersionSortKey = (
+            SELECT MAX(v.VersionSortKey) FROM FixtureIDs v
+            WHERE v.Category = f.Category AND v.Series = f.Series AND v.ItemNumber = f.ItemNumber
+              AND v.Operation = f.Operation AND v.FixtureNumber = f.FixtureNumber AND v.UniqueParts = f.UniqueParts
+        )
+    """
+    X_VERSION_SORT_KEY = -1
+    # Флаги строк get_fixture_list_columns
+    LIST_FLAG_ACTUAL = 1
+    LIST_FLAG_FIRST_PART = 2
+    # Индексы поиска FTS5 (токенизатор trigram - поиск подстроки без учета регистра): таблица поиска,
+    # индексируемая таблица, столбец, ключ строки и соединение совпадения с FixtureIDs f (CROSS JOIN -
+    # от совпадений к оснасткам, а не наоборот). Порядок задает релевантность групп результатов
+    # search_fixture_list_columns. Индексы ссылаются на строки по ключу (external content) и поддерживаются
+    # триггерами; у классификатора ключ - неявный rowid, поэтому после VACUUM индексы нужно перестроить
+    # (rebuild_search_index).
+    SEARCH_INDEXES = (
+        ('FixtureSearch', 'FixtureIDs', 'FullIDString', 'id',
+         "FixtureIDs f ON f.id = FixtureSearch.rowid"),
+        ('CategorySearch', 'Categories', 'CategoryName', 'rowid',
+         "Categories c ON c.rowid = CategorySearch.rowid "
+         "CROSS JOIN FixtureIDs f ON f.Category = c.CategoryCode"),
+        ('SeriesSearch', 'Series', 'SeriesName', 'rowid',
+         "Series s ON s.rowid = SeriesSearch.rowid "
+         "CROSS JOIN FixtureIDs f ON f.Category = s.CategoryCode AND f.Series = s.SeriesCode"),
+        ('ItemNumberSearch', 'ItemNumbers', 'ItemNumberName', 'rowid',
+         "ItemNumbers i ON i.rowid = ItemNumberSearch.rowid "
+         "CROSS JOIN FixtureIDs f ON f.Category = i.CategoryCode AND f.Series = i.SeriesCode AND f.ItemNumber = i.ItemNumberCode"),
+        ('OperationSearch', 'Operations', 'OperationName', 'rowid',
+         "Operations o ON o.rowid = OperationSearch.rowid CROSS JOIN FixtureIDs f ON f.Operation = o.OperationCode"),
+    )
+    SEARCH_MIN_SUBSTRING_LENGTH = 3  # Триграммы: более короткий текст ищется только в начале FullIDString
+    SEARCH_RESULT_LIMIT = 1000
+    # Порядок списка оснасток; id делает его однозначным для постраничного чтения по ключу
+    FIXTURE_LIST_ORDER = ('Category', 'Series', 'ItemNumber', 'Operation', 'FixtureNumber', 'id')
+    # Собственный алфавит base36 без I, J, L, O и обратная таблица для TT
+    BASE36_DIGITS = "".join(c for c in "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ" if c not in "IJLO")
+    BASE36_VALUES = {char: value for value, char in enumerate(BASE36_DIGITS)}
+    # Занятые TT операции: рекурсивный обход индекса (MIN(...) > предыдущего), по одному поиску
+    # на каждый различный TT вместо чтения всех строк FixtureIDs. Добавляются действующие резервы.
+    USED_FIXTURE_NUMBERS_QUERY = """
+        WITH RECURSIVE used(tt) AS (
+            SELECT MIN(FixtureNumber) FROM FixtureIDs
+            WHERE Category = :category AND Series = :series AND ItemNumber = :item_number AND Operation = :operation
+            UNION ALL
+            SELECT (
+                SELECT MIN(FixtureNumber) FROM FixtureIDs
+                WHERE Category = :category AND Series = :series AND ItemNumber = :item_number
+                  AND Operation = :operation AND FixtureNumber > used.tt
+            )
+            FROM used WHERE used.tt IS NOT NULL
+        )
+        SELECT tt FROM used WHERE tt IS NOT NULL
+        UNION
+        SELECT FixtureNumber FROM FixtureNumberReservations
+        WHERE Category = :category AND Series = :series AND ItemNumber = :item_number AND Operation = :operation
+          AND ReservedAt >= :reserved_after
+    """
+    # Таблицы классификатора, изменения которых считают триггеры create_generation_triggers
+    CLASSIFIER_TABLES = ('Categories', 'Series', 'ItemNumbers', 'Operations')
+    FIXTURE_NUMBER_RESERVATION_TTL = 3600  # Секунды, после которых неиспользованный резерв TT освобождается
+    BASE_PATH_REFERENCES_QUERY = "SELECT COUNT(*) FROM FixtureIDs WHERE BasePath = ?"
+
+    def __init__(self, db_name="my_fixtures_app.db", base_db_dir=".", busy_timeout=30.0):
         self.db_name = db_name
         self.base_db_dir = base_db_dir
-        self.conn = None
-        self.cursor = None
+        self.busy_timeout = busy_timeout  # Секунды ожидания блокировки записи другим соединением
         self.db_path = os.path.join(self.base_db_dir, self.db_name)
 
+        # Каждый поток работает через собственное соединение (см. свойства conn и cursor)
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self.search_index_available = False  # См. create_search_index
+
         try:
             os.makedirs(self.base_db_dir, exist_ok=True)
         except OSError as e:
@@ -20,9 +194,7 @@ class FixtureDBManager:
 
         try:
             db_exists = os.path.exists(self.db_path)
-            self.conn = sqlite3.connect(self.db_path)
-            self.conn.row_factory = sqlite3.Row
-            self.cursor = self.conn.cursor()
+            self._open_thread_connection()
 
             if not db_exists:
                 print(f"База данных '{self.db_path}' не найдена. Создаем новую.")
@@ -32,10 +204,56 @@ class FixtureDBManager:
 
         except sqlite3.Error as e:
             print(f"Ошибка подключения к базе данных или создания таблиц: {e}")
-            if self.conn:
-                self.conn.close()
-            self.conn = None
-            self.cursor = None
+            self.close_thread_connection()
+
+    @property
+    def conn(self):
+        """Соединение текущего потока. Открывается при первом обращении из потока."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._open_thread_connection()
+        return conn
+
+    @property
+    def cursor(self):
+        """Курсор соединения текущего потока."""
+        self.conn  # Открывает соединение потока, если его еще нет
+        return self._local.cursor
+
+    def _open_thread_connection(self):
+        """
+        Открывает соединение для текущего потока в режиме WAL: читатели не блокируются
+        длинной транзакцией записи (импорт, пакетное создание), а писатели ждут друг друга до busy_timeout.
+        """
+        # check_same_thread=False только для того, чтобы close() мог закрыть соединения всех потоков;
+        # каждое соединение используется лишь своим потоком.
+        conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, check_same_thread=False)
+        try:
+            conn.row_factory = record_factory
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.Error:
+            conn.close()
+            raise
+
+        self._local.conn = conn
+        self._local.cursor = conn.cursor()
+        self._local.transaction_depth = 0
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+    def close_thread_connection(self):
+        """Закрывает соединение текущего потока (рабочие потоки вызывают перед завершением)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            return
+        with self._connections_lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        conn.close()
+        self._local.conn = None
+        self._local.cursor = None
 
     def create_tables(self):
         try:
@@ -85,17 +303,259 @@ class FixtureDBManager:
                     IntermediateVersion TEXT, -- Может быть пустым
                     BasePath TEXT NOT NULL,
                     FullIDString TEXT NOT NULL UNIQUE,
+                    VersionSortKey INTEGER, -- См. _version_sort_key
                     FOREIGN KEY (Category) REFERENCES Categories(CategoryCode),
                     FOREIGN KEY (Category, Series) REFERENCES Series(CategoryCode, SeriesCode),
                     FOREIGN KEY (Category, Series, ItemNumber) REFERENCES ItemNumbers(CategoryCode, SeriesCode, ItemNumberCode),
                     FOREIGN KEY (Operation) REFERENCES Operations(OperationCode)
                 )
             """)
+            # Резервы TT, выданные reserve_next_fixture_number, но еще не занятые оснасткой
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS FixtureNumberReservations (
+                    Category TEXT NOT NULL,
+                    Series TEXT NOT NULL,
+                    ItemNumber TEXT NOT NULL,
+                    Operation TEXT NOT NULL,
+                    FixtureNumber TEXT NOT NULL,
+                    ReservedAt REAL NOT NULL,
+                    PRIMARY KEY (Category, Series, ItemNumber, Operation, FixtureNumber)
+                )
+            """)
+            # Отпечатки импортированных файлов классификатора (SheetName = '' - весь файл)
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS ImportFingerprints (
+                    SourceFile TEXT NOT NULL,
+                    SheetName TEXT NOT NULL,
+                    FileSize INTEGER,
+                    FileMtime REAL,
+                    ContentHash TEXT NOT NULL,
+                    ImportedAt REAL NOT NULL,
+                    PRIMARY KEY (SourceFile, SheetName)
+                )
+            """)
+            # Счетчики изменений таблиц классификатора (см. create_generation_triggers)
+            self.cursor.execute("""
+                CREATE TABLE IF NOT EXISTS TableGenerations (
+                    TableName TEXT PRIMARY KEY NOT NULL,
+                    Generation INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            self._migrate_fixture_ids()
+            self.create_indexes()
+            self.create_search_index()
+            self.create_generation_triggers()
             self.conn.commit()
             print("Все таблицы успешно созданы/проверены.")
         except sqlite3.Error as e:
             print(f"Ошибка при создании таблиц: {e}")
 
+    def create_indexes(self):
+        """
+        Создает (если их еще нет) индексы FixtureIDs для фильтров списка оснасток,
+        поиска версий и проверки BasePath. Безопасно вызывать на существующей базе.
+        """
+        # Иерархия KKK.SNN.DTT.AA + версия: фильтры по категории/серии/изделию,
+        # список TT (get_existing_fixture_numbers), последняя версия сборки и признак
+        # актуальности (MAX(VersionSortKey)) обслуживаются только индексом, без чтения самой таблицы.
+        self.cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_FixtureIDs_assembly_version ON FixtureIDs (
+                Category, Series, ItemNumber, Operation, FixtureNumber, UniqueParts,
+                VersionSortKey, AssemblyVersionCode, IntermediateVersion
+            )
+        """)
+        # Фильтр только по операции (категория = "Все категории").
+        self.cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_FixtureIDs_operation ON FixtureIDs (
+                Operation, Category, Series, ItemNumber, FixtureNumber
+            )
+        """)
+        # Порядок списка оснасток (с неявным rowid в конце) для постраничного чтения без сортировки.
+        self.cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_FixtureIDs_list_order ON FixtureIDs (
+                Category, Series, ItemNumber, Operation, FixtureNumber
+            )
+        """)
+        # Подсчет ссылок на папку в delete_fixture_id.
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_FixtureIDs_BasePath ON FixtureIDs (BasePath)")
+
+    def create_search_index(self):
+        """
+        Создает (если их еще нет) индексы поиска SEARCH_INDEXES и триггеры, которые обновляют их при добавлении,
+        изменении и удалении строк. Новый индекс сразу заполняется по уже существующим строкам.
+        Без FTS5 с токенизатором trigram (SQLite < 3.34) поиск идет только по началу FullIDString.
+        """
+        for search_table, table, column, key, _ in self.SEARCH_INDEXES:
+            self.cursor.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (search_table,))
+            search_table_exists = self.cursor.fetchone() is not None
+            try:
+                self.cursor.execute(f"""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS {search_table} USING fts5(
+                        {column}, content='{table}', content_rowid='{key}', tokenize='trigram'
+                    )
+                """)
+            except sqlite3.OperationalError as e:
+                print(f"Полнотекстовый поиск недоступен, поиск только по началу ID: {e}")
+                self.search_index_available = False
+                return
+            self.cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {search_table}_insert AFTER INSERT ON {table} BEGIN
+                    INSERT INTO {search_table} (rowid, {column}) VALUES (new.{key}, new.{column});
+                END
+            """)
+            self.cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {search_table}_delete AFTER DELETE ON {table} BEGIN
+                    INSERT INTO {search_table} ({search_table}, rowid, {column}) VALUES ('delete', old.{key}, old.{column});
+                END
+            """)
+            self.cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {search_table}_update AFTER UPDATE OF {column} ON {table} BEGIN
+                    INSERT INTO {search_table} ({search_table}, rowid, {column}) VALUES ('delete', old.{key}, old.{column});
+                    INSERT INTO {search_table} (rowid, {column}) VALUES (new.{key}, new.{column});
+                END
+            """)
+            if not search_table_exists:
+                self.cursor.execute(f"INSERT INTO {search_table} ({search_table}) VALUES ('rebuild')")
+                print(f"Создан индекс поиска {search_table} ({table}.{column}).")
+        self.search_index_available = True
+
+    def create_generation_triggers(self):
+        """
+        Создает (если их еще нет) триггеры, которые увеличивают TableGenerations.Generation таблицы
+        классификатора при любом добавлении, изменении или удалении ее строк. По счетчикам ClassifierCache
+        отличает изменения классификатора от записи оснасток (PRAGMA data_version меняется от любой записи).
+        """
+        for table in self.CLASSIFIER_TABLES:
+            self.cursor.execute("INSERT OR IGNORE INTO TableGenerations (TableName) VALUES (?)", (table,))
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                self.cursor.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {table}_generation_{event.lower()} AFTER {event} ON {table} BEGIN
+                        UPDATE TableGenerations SET Generation = Generation + 1 WHERE TableName = '{table}';
+                    END
+                """)
+
+    def get_table_generations(self):
+        """Счетчики изменений таблиц CLASSIFIER_TABLES (кортеж в их порядке) или None при ошибке."""
+        try:
+            generations = dict(self.conn.execute("SELECT TableName, Generation FROM TableGenerations").fetchall())
+            return tuple(generations.get(table) for table in self.CLASSIFIER_TABLES)
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении счетчиков изменений классификатора: {e}")
+            return None
+
+    def rebuild_search_index(self):
+        """Перестраивает индексы поиска по текущим строкам (например, после VACUUM). Возвращает True при успехе."""
+        if not self.search_index_available:
+            return False
+        try:
+            with self.transaction():
+                for search_table, _, _, _, _ in self.SEARCH_INDEXES:
+                    self.cursor.execute(f"INSERT INTO {search_table} ({search_table}) VALUES ('rebuild')")
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка при перестроении индекса поиска: {e}")
+            return False
+
+    def _migrate_fixture_ids(self):
+        """Добавляет в существующую таблицу FixtureIDs столбец VersionSortKey и заполняет его для старых строк."""
+        self.cursor.execute("PRAGMA table_info(FixtureIDs)")
+        if 'VersionSortKey' not in [row['name'] for row in self.cursor.fetchall()]:
+            self.cursor.execute("ALTER TABLE FixtureIDs ADD COLUMN VersionSortKey INTEGER")
+            print("В таблицу FixtureIDs добавлен столбец VersionSortKey.")
+
+        self.conn.create_function("version_sort_key", 2, self._version_sort_key, deterministic=True)
+        self.cursor.execute("""
+            UPDATE FixtureIDs SET VersionSortKey = version_sort_key(AssemblyVersionCode, IntermediateVersion)
+            WHERE VersionSortKey IS NULL
+        """)
+        if self.cursor.rowcount > 0:
+            print(f"VersionSortKey заполнен для {self.cursor.rowcount} оснасток.")
+
+    @contextmanager
+    def transaction(self):
+        """
+        Выполняет блок в одной транзакции записи (BEGIN IMMEDIATE): COMMIT при успехе, ROLLBACK при исключении.
+        Вложенные вызовы присоединяются к внешней транзакции через SAVEPOINT: исключение во вложенном блоке
+        откатывает только его изменения, а отмена внешнего блока - все.
+        """
+        conn = self.conn
+        if self._local.transaction_depth:
+            savepoint = f"nested_{self._local.transaction_depth}"
+            self._local.transaction_depth += 1
+            conn.execute(f"SAVEPOINT {savepoint}")
+            try:
+                yield
+                conn.execute(f"RELEASE {savepoint}")
+            except BaseException:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+                raise
+            finally:
+                self._local.transaction_depth -= 1
+            return
+
+        self._local.transaction_depth = 1
+        try:
+            # Explicit BEGIN: otherwise a SAVEPOINT opened first would start (and its RELEASE commit) the transaction.
+            # IMMEDIATE takes the write lock up front: a deferred transaction that reads first cannot upgrade
+            # once another connection has committed (SQLITE_BUSY_SNAPSHOT), and busy_timeout does not wait for that.
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+            yield
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            self._local.transaction_depth = 0
+
+    def _bulk_upsert(self, table, key_cols, name_col, rows, existing=None):
+        """
+        Добавляет/обновляет строки классификатора одной транзакцией через INSERT ... ON CONFLICT DO UPDATE.
+        Каждая строка - кортеж (*ключ, имя) в порядке key_cols.
+        existing - уже прочитанный вызывающим кодом снимок таблицы {ключ (кортеж строк): имя}; он дополняется
+        записанными строками. Без него таблица читается заново.
+        Возвращает {'added': n, 'updated': n, 'skipped': n, 'error': n}.
+        """
+        counts = {'added': 0, 'updated': 0, 'skipped': 0, 'error': 0}
+        # Колонки TEXT хранят значения как строки, поэтому сравниваем и пишем их в том же виде
+        rows = [tuple(v if v is None or isinstance(v, str) else str(v) for v in row) for row in rows]
+        if not rows:
+            return counts
+
+        columns = ", ".join(key_cols + [name_col])
+        placeholders = ", ".join("?" for _ in range(len(key_cols) + 1))
+        upsert_query = f"""
+            INSERT INTO {table} ({columns}) VALUES ({placeholders})
+            ON CONFLICT ({", ".join(key_cols)}) DO UPDATE SET {name_col} = excluded.{name_col}
+            WHERE {name_col} IS NOT excluded.{name_col}
+        """
+
+        try:
+            if existing is None:
+                self.cursor.execute(f"SELECT {columns} FROM {table}")
+                existing = {row[:-1]: row[-1] for row in self.cursor.fetchall()}
+
+            changed_rows = []
+            for row in rows:
+                key, name = row[:-1], row[-1]
+                if key not in existing:
+                    counts['added'] += 1
+                elif existing[key] != name:
+                    counts['updated'] += 1
+                else:
+                    counts['skipped'] += 1
+                    continue
+                existing[key] = name
+                changed_rows.append(row)
+
+            with self.transaction():
+                self.cursor.executemany(upsert_query, changed_rows)
+        except sqlite3.Error as e:
+            print(f"Ошибка при пакетной записи в таблицу {table}: {e}")
+            return {'added': 0, 'updated': 0, 'skipped': 0, 'error': len(rows)}
+        return counts
+
     def add_category(self, code, name):
         """Добавляет или обновляет категорию. Возвращает 'added', 'updated' или 'skipped'."""
         try:
@@ -117,10 +577,17 @@ class FixtureDBManager:
             print(f"Ошибка при обработке категории {code}: {e}")
             return 'error'
 
+    def add_categories_bulk(self, rows, existing=None):
+        """
+        Пакетный вариант add_category: rows - итерируемое из (code, name), existing - см. _bulk_upsert.
+        Возвращает счетчики по статусам.
+        """
+        return self._bulk_upsert("Categories", ["CategoryCode"], "CategoryName", rows, existing)
+
     def get_categories(self):
         try:
             self.cursor.execute("SELECT * FROM Categories ORDER BY CategoryCode")
-            return [dict(row) for row in self.cursor.fetchall()]
+            return self.cursor.fetchall()
         except sqlite3.Error as e:
             print(f"Ошибка при получении категорий: {e}")
             return []
@@ -155,13 +622,20 @@ class FixtureDBManager:
             print(f"Ошибка при обработке серии {series_code} для категории {category_code}: {e}")
             return 'error'
 
+    def add_series_descriptions_bulk(self, rows, existing=None):
+        """
+        Пакетный вариант add_series_description: rows - итерируемое из (category_code, series_code, series_name),
+        existing - см. _bulk_upsert. Возвращает счетчики по статусам.
+        """
+        return self._bulk_upsert("Series", ["CategoryCode", "SeriesCode"], "SeriesName", rows, existing)
+
     def get_series_by_category(self, category_code):
         try:
             self.cursor.execute(
                 "SELECT SeriesCode, SeriesName FROM Series WHERE CategoryCode = ? ORDER BY SeriesCode",
                 (category_code,)
             )
-            return [dict(row) for row in self.cursor.fetchall()]
+            return self.cursor.fetchall()
         except sqlite3.Error as e:
             print(f"Ошибка при получении серий для категории {category_code}: {e}")
             return []
@@ -169,7 +643,7 @@ class FixtureDBManager:
     def get_series_descriptions(self):
         try:
             self.cursor.execute("SELECT * FROM Series ORDER BY CategoryCode, SeriesCode")
-            return [dict(row) for row in self.cursor.fetchall()]
+            return self.cursor.fetchall()
         except sqlite3.Error as e:
             print(f"Ошибка при получении всех серий: {e}")
             return []
@@ -205,13 +679,22 @@ class FixtureDBManager:
                 f"Ошибка при обработке изделия {item_number_code} для категории {category_code} и серии {series_code}: {e}")
             return 'error'
 
+    def add_item_number_descriptions_bulk(self, rows, existing=None):
+        """
+        Пакетный вариант add_item_number_description:
+        rows - итерируемое из (category_code, series_code, item_number_code, item_number_name),
+        existing - см. _bulk_upsert. Возвращает счетчики по статусам.
+        """
+        return self._bulk_upsert("ItemNumbers", ["CategoryCode", "SeriesCode", "ItemNumberCode"], "ItemNumberName",
+                                 rows, existing)
+
     def get_items_by_category_and_series(self, category_code, series_code):
         try:
             self.cursor.execute(
                 "SELECT ItemNumberCode, ItemNumberName FROM ItemNumbers WHERE CategoryCode = ? AND SeriesCode = ? ORDER BY ItemNumberCode",
                 (category_code, series_code)
             )
-            return [dict(row) for row in self.cursor.fetchall()]
+            return self.cursor.fetchall()
         except sqlite3.Error as e:
             print(f"Ошибка при получении изделий для категории {category_code} и серии {series_code}: {e}")
             return []
@@ -219,7 +702,7 @@ class FixtureDBManager:
     def get_item_number_descriptions(self):
         try:
             self.cursor.execute("SELECT * FROM ItemNumbers ORDER BY CategoryCode, SeriesCode, ItemNumberCode")
-            return [dict(row) for row in self.cursor.fetchall()]
+            return self.cursor.fetchall()
         except sqlite3.Error as e:
             print(f"Ошибка при получении всех изделий: {e}")
             return []
@@ -247,14 +730,46 @@ class FixtureDBManager:
             print(f"Ошибка при обработке операции {operation_code}: {e}")
             return 'error'
 
+    def add_operation_descriptions_bulk(self, rows, existing=None):
+        """
+        Пакетный вариант add_operation_description: rows - итерируемое из (operation_code, operation_name),
+        existing - см. _bulk_upsert. Возвращает счетчики по статусам.
+        """
+        return self._bulk_upsert("Operations", ["OperationCode"], "OperationName", rows, existing)
+
     def get_operation_descriptions(self):
         try:
             self.cursor.execute("SELECT * FROM Operations ORDER BY OperationCode")
-            return [dict(row) for row in self.cursor.fetchall()]
+            return self.cursor.fetchall()
         except sqlite3.Error as e:
             print(f"Ошибка при получении операций: {e}")
             return []
 
+    def get_import_fingerprints(self, source_file):
+        """Возвращает {SheetName: запись} сохраненных отпечатков файла импорта ('' - весь файл)."""
+        try:
+            self.cursor.execute("SELECT * FROM ImportFingerprints WHERE SourceFile = ?", (source_file,))
+            return {row['SheetName']: row for row in self.cursor.fetchall()}
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении отпечатков импорта для '{source_file}': {e}")
+            return {}
+
+    def save_import_fingerprint(self, source_file, sheet_name, file_size, file_mtime, content_hash):
+        """Сохраняет отпечаток успешно импортированного файла или листа. Возвращает True/False."""
+        try:
+            with self.transaction():
+                self.cursor.execute("""
+                    INSERT INTO ImportFingerprints (SourceFile, SheetName, FileSize, FileMtime, ContentHash, ImportedAt)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (SourceFile, SheetName) DO UPDATE SET
+                        FileSize = excluded.FileSize, FileMtime = excluded.FileMtime,
+                        ContentHash = excluded.ContentHash, ImportedAt = excluded.ImportedAt
+                """, (source_file, sheet_name, file_size, file_mtime, content_hash, time.time()))
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка при сохранении отпечатка импорта для '{source_file}': {e}")
+            return False
+
     def add_fixture_id(self, full_id_string):
         parsed_id = self.parse_id_string(full_id_string)
         if not parsed_id:
@@ -267,24 +782,7 @@ class FixtureDBManager:
             print(f"Оснастка с FullIDString '{full_id_string}' уже существует. Добавление отменено.")
             return None
 
-        # Формируем имя папки для версии сборки (KKK.SNN.DTT.AA0000-VVW)
-        folder_version_name = (
-            f"{parsed_id['Category']}."
-            f"{parsed_id['Series']}{parsed_id['ItemNumber']}."
-            f"{parsed_id['Operation']}{parsed_id['FixtureNumber']}."
-            f"{parsed_id['UniqueParts']}0000-"  # BB и CC заменены на 0000
-            f"{parsed_id['AssemblyVersionCode']}"
-            f"{parsed_id['IntermediateVersion'] if parsed_id['IntermediateVersion'] else ''}"
-        )
-
-        # Формируем полный путь к папке, используя новое имя папки версии сборки
-        base_path = os.path.join(
-            self.base_db_dir,
-            parsed_id['Category'],
-            f"{parsed_id['Category']}.{parsed_id['Series']}{parsed_id['ItemNumber']}",
-            f"{parsed_id['Category']}.{parsed_id['Series']}{parsed_id['ItemNumber']}.{parsed_id['Operation']}{parsed_id['FixtureNumber']}",
-            folder_version_name  # Используем новое имя папки
-        )
+        base_path = self._fixture_base_path(parsed_id)
 
         try:
             os.makedirs(base_path, exist_ok=True)
@@ -293,28 +791,9 @@ class FixtureDBManager:
             return None
 
         try:
-            self.cursor.execute("""
-                INSERT INTO FixtureIDs (
-                    Category, Series, ItemNumber, Operation, FixtureNumber,
-                    UniqueParts, PartInAssembly, PartQuantity, AssemblyVersionCode, IntermediateVersion,
-                    BasePath, FullIDString
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                parsed_id['Category'],
-                parsed_id['Series'],
-                parsed_id['ItemNumber'],
-                parsed_id['Operation'],
-                parsed_id['FixtureNumber'],
-                parsed_id['UniqueParts'],
-                parsed_id['PartInAssembly'],
-                parsed_id['PartQuantity'],
-                parsed_id['AssemblyVersionCode'],
-                parsed_id['IntermediateVersion'],
-                base_path,  # Сохраняем путь к папке сборки
-                full_id_string
-            ))
+            fixture_db_id = self._insert_fixture_row(parsed_id, base_path, full_id_string)
             self.conn.commit()
-            return self.cursor.lastrowid
+            return fixture_db_id
         except sqlite3.IntegrityError as e:
             print(f"Ошибка целостности данных при добавлении оснастки '{full_id_string}': {e}")
             return None
@@ -322,14 +801,107 @@ class FixtureDBManager:
             print(f"Ошибка при добавлении оснастки '{full_id_string}': {e}")
             return None
 
+    def add_fixture_ids(self, full_id_strings, batch_size=500):
+        """
+        Пакетный вариант add_fixture_id: сначала разбирает и проверяет все ID, затем одним запросом на пачку
+        из batch_size ID находит уже существующие FullIDString, создает каждую нужную папку один раз
+        и вставляет все новые оснастки в одной транзакции.
+        Возвращает отчет - список (full_id_string, статус, id в БД или None) в порядке входных ID,
+        где статус: 'added', 'invalid' (не разобран), 'duplicate' (уже в БД или повтор в пакете), 'error'.
+        """
+        report = []
+        pending = []  # (позиция в отчете, parsed_id, base_path)
+        seen = set()
+        for full_id_string, parsed_id in fixture_id_codec.parse_many(full_id_strings):
+            if not parsed_id:
+                report.append((full_id_string, 'invalid', None))
+                continue
+            if full_id_string in seen:
+                report.append((full_id_string, 'duplicate', None))
+                continue
+            seen.add(full_id_string)
+            pending.append((len(report), parsed_id, self._fixture_base_path(parsed_id)))
+            report.append((full_id_string, 'added', None))
+
+        try:
+            with self.transaction():
+                existing = set()
+                candidates = [report[position][0] for position, _, _ in pending]
+                for start in range(0, len(candidates), batch_size):
+                    chunk = candidates[start:start + batch_size]
+                    self.cursor.execute(
+                        f"SELECT FullIDString FROM FixtureIDs WHERE FullIDString IN ({', '.join('?' * len(chunk))})",
+                        chunk
+                    )
+                    existing.update(row[0] for row in self.cursor.fetchall())
+
+                failed_paths = set()
+                for base_path in sorted({base_path for position, _, base_path in pending
+                                         if report[position][0] not in existing}):
+                    try:
+                        os.makedirs(base_path, exist_ok=True)
+                    except OSError as e:
+                        print(f"Ошибка при создании директории '{base_path}': {e}")
+                        failed_paths.add(base_path)
+
+                for position, parsed_id, base_path in pending:
+                    full_id_string = report[position][0]
+                    if full_id_string in existing:
+                        report[position] = (full_id_string, 'duplicate', None)
+                    elif base_path in failed_paths:
+                        report[position] = (full_id_string, 'error', None)
+                    else:
+                        fixture_db_id = self._insert_fixture_row(parsed_id, base_path, full_id_string)
+                        report[position] = (full_id_string, 'added', fixture_db_id)
+        except sqlite3.Error as e:
+            print(f"Ошибка при пакетном добавлении оснасток, изменения отменены: {e}")
+            report = [(full_id_string, 'error' if status == 'added' else status, None)
+                      for full_id_string, status, _ in report]
+        return report
+
+    def _fixture_base_path(self, parsed_id):
+        """Возвращает путь к папке версии сборки оснастки (KKK.SNN.DTT.AA0000-VVW)."""
+        return fixture_id_codec.format_path(self.base_db_dir, parsed_id)
+
+    def _insert_fixture_row(self, parsed_id, base_path, full_id_string):
+        """Вставляет строку FixtureIDs и снимает резерв ее TT. Не фиксирует транзакцию. Возвращает id."""
+        self.cursor.execute("""
+            INSERT INTO FixtureIDs (
+                Category, Series, ItemNumber, Operation, FixtureNumber,
+                UniqueParts, PartInAssembly, PartQuantity, AssemblyVersionCode, IntermediateVersion,
+                BasePath, FullIDString, VersionSortKey
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            parsed_id['Category'],
+            parsed_id['Series'],
+            parsed_id['ItemNumber'],
+            parsed_id['Operation'],
+            parsed_id['FixtureNumber'],
+            parsed_id['UniqueParts'],
+            parsed_id['PartInAssembly'],
+            parsed_id['PartQuantity'],
+            parsed_id['AssemblyVersionCode'],
+            parsed_id['IntermediateVersion'],
+            base_path,  # Сохраняем путь к папке сборки
+            full_id_string,
+            self._version_sort_key(parsed_id['AssemblyVersionCode'], parsed_id['IntermediateVersion'])
+        ))
+        fixture_db_id = self.cursor.lastrowid
+        # TT занят оснасткой, резерв больше не нужен
+        self.cursor.execute(
+            """
+            DELETE FROM FixtureNumberReservations
+            WHERE Category = ? AND Series = ? AND ItemNumber = ? AND Operation = ? AND FixtureNumber = ?
+            """,
+            (parsed_id['Category'], parsed_id['Series'], parsed_id['ItemNumber'], parsed_id['Operation'],
+             parsed_id['FixtureNumber'])
+        )
+        return fixture_db_id
+
     def get_existing_fixture_numbers(self, category_code, series_code, item_number_code, operation_code):
         try:
             self.cursor.execute(
-                """
-                SELECT FixtureNumber FROM FixtureIDs
-                WHERE Category = ? AND Series = ? AND ItemNumber = ? AND Operation = ?
-                ORDER BY FixtureNumber
-                """,
+                self.EXISTING_FIXTURE_NUMBERS_QUERY,
                 (category_code, series_code, item_number_code, operation_code)
             )
             return [row['FixtureNumber'] for row in self.cursor.fetchall()]
@@ -338,35 +910,290 @@ class FixtureDBManager:
                 f"Ошибка при получении существующих TT для {category_code}.{series_code}{item_number_code}.{operation_code}: {e}")
             return []
 
-    def get_next_fixture_number(self, category_code, series_code, item_number_code, operation_code):
-        existing_tts = self.get_existing_fixture_numbers(
-            category_code, series_code, item_number_code, operation_code
-        )
-        if not existing_tts:
-            return "01"
+    def _first_free_fixture_number(self, category_code, series_code, item_number_code, operation_code):
+        """Возвращает наименьший свободный TT (с учетом действующих резервов) для KKK.SNN.D."""
+        self.cursor.execute(self.USED_FIXTURE_NUMBERS_QUERY, {
+            'category': category_code,
+            'series': series_code,
+            'item_number': item_number_code,
+            'operation': operation_code,
+            'reserved_after': time.time() - self.FIXTURE_NUMBER_RESERVATION_TTL,
+        })
+        used_numbers = set()
+        for row in self.cursor.fetchall():
+            try:
+                used_numbers.add(self._from_base36(row[0]))
+            except ValueError:
+                continue  # TT с недопустимыми символами не участвует в нумерации
 
-        numeric_tts = sorted([self._from_base36(tt) for tt in existing_tts])
         next_num = 1
-        for num in numeric_tts:
-            if num == next_num:
-                next_num += 1
-            elif num > next_num:
-                break
+        while next_num in used_numbers:
+            next_num += 1
+        return self._to_base36(next_num).zfill(2)
 
-        next_tt = self._to_base36(next_num).zfill(2)
-        return next_tt
+    def get_next_fixture_number(self, category_code, series_code, item_number_code, operation_code):
+        """Возвращает следующий свободный TT без резервирования (только для предпросмотра)."""
+        try:
+            return self._first_free_fixture_number(category_code, series_code, item_number_code, operation_code)
+        except sqlite3.Error as e:
+            print(f"Ошибка при поиске свободного TT для {category_code}.{series_code}{item_number_code}.{operation_code}: {e}")
+            return None
+
+    def reserve_next_fixture_number(self, category_code, series_code, item_number_code, operation_code):
+        """
+        Находит и резервирует следующий свободный TT в одной транзакции записи (transaction()), поэтому
+        параллельные вызовы (другие потоки, процессы, рабочие места) никогда не получат один и тот же TT.
+        Внутри уже открытой transaction() резерв становится частью внешней транзакции.
+        Резерв снимается при добавлении оснастки с этим TT или истекает через FIXTURE_NUMBER_RESERVATION_TTL.
+        Возвращает TT или None при ошибке.
+        """
+        try:
+            with self.transaction():
+                now = time.time()
+                self.cursor.execute(
+                    """
+                    DELETE FROM FixtureNumberReservations
+                    WHERE Category = ? AND Series = ? AND ItemNumber = ? AND Operation = ? AND ReservedAt < ?
+                    """,
+                    (category_code, series_code, item_number_code, operation_code,
+                     now - self.FIXTURE_NUMBER_RESERVATION_TTL)
+                )
+                next_tt = self._first_free_fixture_number(category_code, series_code, item_number_code, operation_code)
+                self.cursor.execute(
+                    """
+                    INSERT INTO FixtureNumberReservations (Category, Series, ItemNumber, Operation, FixtureNumber, ReservedAt)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    (category_code, series_code, item_number_code, operation_code, next_tt, now)
+                )
+            return next_tt
+        except sqlite3.Error as e:
+            print(f"Ошибка при резервировании TT для {category_code}.{series_code}{item_number_code}.{operation_code}: {e}")
+            return None
+
+    def release_fixture_number_reservation(self, category_code, series_code, item_number_code, operation_code,
+                                           fixture_number):
+        """Снимает резерв TT, который так и не был занят оснасткой. Возвращает True при успехе."""
+        try:
+            self.cursor.execute(
+                """
+                DELETE FROM FixtureNumberReservations
+                WHERE Category = ? AND Series = ? AND ItemNumber = ? AND Operation = ? AND FixtureNumber = ?
+                """,
+                (category_code, series_code, item_number_code, operation_code, fixture_number)
+            )
+            self.conn.commit()
+            return True
+        except sqlite3.Error as e:
+            print(f"Ошибка при снятии резерва TT {fixture_number} для "
+                  f"{category_code}.{series_code}{item_number_code}.{operation_code}: {e}")
+            return False
 
     def get_fixture_id_by_id(self, fixture_db_id):
         try:
             self.cursor.execute("SELECT * FROM FixtureIDs WHERE id = ?", (fixture_db_id,))
             result = self.cursor.fetchone()
-            return dict(result) if result else None
+            return result
         except sqlite3.Error as e:
             print(f"Ошибка при получении оснастки по ID {fixture_db_id}: {e}")
             return None
 
     def get_fixture_ids_with_descriptions(self, category_code=None, series_code=None, item_number_code=None,
-                                          operation_code=None):
+                                          operation_code=None, only_actual=False):
+        """
+        Возвращает оснастки с названиями классификатора. Признак IsActual (1/0) показывает,
+        что версия строки - последняя в своей сборке; only_actual=True оставляет только такие строки.
+        """
+        query, params = self._build_fixture_query(category_code, series_code, item_number_code, operation_code,
+                                                  only_actual)
+
+        try:
+            self.cursor.execute(query, tuple(params))
+            return self.cursor.fetchall()
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении всех оснасток с описаниями: {e}")
+            return []
+
+    def iter_fixture_ids_with_descriptions(self, category_code=None, series_code=None, item_number_code=None,
+                                           operation_code=None, only_actual=False, page_size=1000):
+        """
+        Генератор строк get_fixture_ids_with_descriptions в том же порядке, читающий их страницами
+        по page_size строк. Следующая страница выбирается по ключу последней строки (keyset), а не OFFSET,
+        поэтому каждая страница - короткий поиск по индексу, а память не зависит от размера таблицы.
+        Между страницами транзакция чтения не удерживается.
+        Ошибка чтения страницы пробрасывается (sqlite3.Error): оборванный список нельзя принять за полный.
+        """
+        after = None
+        while True:
+            query, params = self._build_fixture_query(category_code, series_code, item_number_code, operation_code,
+                                                      only_actual, after=after, limit=page_size)
+            try:
+                page = self.conn.execute(query, tuple(params)).fetchall()
+            except sqlite3.Error as e:
+                print(f"Ошибка при постраничном получении оснасток с описаниями: {e}")
+                raise
+
+            yield from page
+
+            if len(page) < page_size:
+                return
+            after = tuple(page[-1][col] for col in self.FIXTURE_LIST_ORDER)
+
+    def get_fixture_list_columns(self, category_code=None, series_code=None, item_number_code=None,
+                                 operation_code=None):
+        """
+        Список оснасток для GUI в столбцовом виде: id в порядке отображения (сначала актуальные версии,
+        затем остальные, внутри каждой группы - по FullIDString) и флаги строк LIST_FLAG_ACTUAL
+        (последняя версия сборки) и LIST_FLAG_FIRST_PART (BB = '01'). Фильтры "только актуальные" и
+        "без сборных частей" применяются к этому результату в памяти, без повторного запроса.
+        Возвращает (array('q') id, bytearray флагов) - 9 байт на оснастку.
+        """
+        conditions, params = self._fixture_filter_conditions(category_code, series_code, item_number_code,
+                                                             operation_code, False)
+        query = (f"SELECT f.id, IFNULL({self.ACTUAL_VERSION_CONDITION}, 0) AS IsActual, "
+                 f"f.PartInAssembly = '01' AS IsFirstPart "
+                 f"FROM FixtureIDs f WHERE 1=1{conditions} ORDER BY IsActual DESC, f.FullIDString")
+        ids = array('q')
+        flags = bytearray()
+        try:
+            for row in self.conn.execute(query, tuple(params)):
+                ids.append(row[0])
+                flags.append((self.LIST_FLAG_ACTUAL if row[1] else 0) | (self.LIST_FLAG_FIRST_PART if row[2] else 0))
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении списка оснасток: {e}")
+            return array('q'), bytearray()
+        return ids, flags
+
+    def search_fixture_list_columns(self, search_text, limit=None):
+        """
+        Поиск оснасток по части FullIDString или названия категории, серии, изделия или операции
+        (без учета регистра) среди всех оснасток. Возвращает столбцы, как get_fixture_list_columns, но не более
+        limit (по умолчанию SEARCH_RESULT_LIMIT) строк по релевантности: сначала ID, начинающиеся с текста,
+        затем ID, содержащие его, затем совпадения по названиям в порядке SEARCH_INDEXES;
+        внутри группы - как в get_fixture_list_columns.
+        Текст короче SEARCH_MIN_SUBSTRING_LENGTH символов ищется только в начале FullIDString.
+        """
+        query, params = self._build_search_query(search_text, limit or self.SEARCH_RESULT_LIMIT)
+        ids = array('q')
+        flags = bytearray()
+        try:
+            for row in self.conn.execute(query, tuple(params)):
+                ids.append(row[0])
+                flags.append((self.LIST_FLAG_ACTUAL if row[1] else 0) | (self.LIST_FLAG_FIRST_PART if row[2] else 0))
+        except sqlite3.Error as e:
+            print(f"Ошибка при поиске оснасток по '{search_text}': {e}")
+            return array('q'), bytearray()
+        return ids, flags
+
+    def _build_search_query(self, search_text, limit):
+        """
+        Собирает SQL-запрос search_fixture_list_columns и его параметры. Каждая группа совпадений читается
+        с собственным LIMIT, начиная с индекса поиска, а если ID,
+        начинающихся с текста, уже limit, остальные группы не читаются вовсе. Поэтому время запроса
+        не зависит от того, сколько всего оснасток подходит под текст.
+        """
+        search_text = search_text.strip()
+        # ID хранятся в верхнем регистре. Начало ID ищется диапазоном по индексу UNIQUE (FullIDString):
+        # все строки с префиксом лежат между ним и префиксом с максимальным символом Unicode
+        prefix = search_text.upper()
+        branches = ["SELECT id, 0 AS MatchRank FROM PrefixMatches"]
+        params = [prefix, prefix + chr(0x10FFFF), limit]
+        if self.search_index_available and len(search_text) >= self.SEARCH_MIN_SUBSTRING_LENGTH:
+            # Строка FTS5 в кавычках - одна фраза, для trigram это поиск подстроки
+            phrase = '"' + search_text.replace('"', '""') + '"'
+            for match_rank, (search_table, _, _, _, join) in enumerate(self.SEARCH_INDEXES, start=1):
+                condition = f"p.PrefixCount < ? AND {search_table} MATCH ?"
+                params += [limit, phrase]
+                if search_table == 'FixtureSearch':
+                    # ID, начинающиеся с текста, уже найдены с более высокой релевантностью
+                    condition += " AND instr(f.FullIDString, ?) != 1"
+                    params.append(prefix)
+                # Однострочная PrefixCount - внешний цикл: при ложном условии индекс поиска не открывается
+                branches.append(f"SELECT * FROM (SELECT f.id, {match_rank} FROM PrefixCount p "
+                                f"CROSS JOIN {search_table} CROSS JOIN {join} WHERE {condition} LIMIT ?)")
+                params.append(limit)
+
+        # Признак актуальности (подзапрос на каждую строку) вычисляется только для отобранных limit строк
+        query = f"""
+            WITH
+                PrefixMatches AS (SELECT id FROM FixtureIDs WHERE FullIDString >= ? AND FullIDString < ? LIMIT ?),
+                PrefixCount AS (SELECT COUNT(*) AS PrefixCount FROM PrefixMatches),
+                Matches AS (
+                    SELECT id, MIN(MatchRank) AS MatchRank FROM (
+                        {" UNION ALL ".join(branches)} ORDER BY MatchRank LIMIT ?
+                    ) GROUP BY id
+                )
+            SELECT f.id, IFNULL({self.ACTUAL_VERSION_CONDITION}, 0) AS IsActual, f.PartInAssembly = '01' AS IsFirstPart
+            FROM Matches m JOIN FixtureIDs f ON f.id = m.id
+            ORDER BY m.MatchRank, IsActual DESC, f.FullIDString
+        """
+        params.append(limit)
+        return query, params
+
+    def get_fixtures_with_descriptions_by_ids(self, fixture_ids):
+        """
+        Строки get_fixture_ids_with_descriptions для заданных id (порядок результата не определен).
+        Возвращает {id: строка}; удаленные за это время оснастки отсутствуют.
+        """
+        fixtures = {}
+        fixture_ids = list(fixture_ids)
+        try:
+            # Chunks stay below SQLite's default limit of 999 bound parameters
+            for chunk_start in range(0, len(fixture_ids), 500):
+                query, params = self._build_fixture_query(ids=fixture_ids[chunk_start:chunk_start + 500])
+                for row in self.conn.execute(query, tuple(params)):
+                    fixtures[row['id']] = row
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении оснасток по id: {e}")
+        return fixtures
+
+    def iter_fixtures_with_descriptions_by_ids(self, fixture_ids, page_size=500):
+        """
+        Генератор строк get_fixture_ids_with_descriptions для заданных id в их порядке, по page_size id
+        на запрос; удаленные за это время оснастки пропускаются. Ошибка чтения пробрасывается (sqlite3.Error),
+        как в iter_fixture_ids_with_descriptions.
+        """
+        fixture_ids = list(fixture_ids)
+        for chunk_start in range(0, len(fixture_ids), page_size):
+            chunk = fixture_ids[chunk_start:chunk_start + page_size]
+            query, params = self._build_fixture_query(ids=chunk)
+            try:
+                fixtures = {row['id']: row for row in self.conn.execute(query, tuple(params))}
+            except sqlite3.Error as e:
+                print(f"Ошибка при получении оснасток по id: {e}")
+                raise
+            for fixture_id in chunk:
+                fixture = fixtures.get(fixture_id)
+                if fixture is not None:
+                    yield fixture
+
+    def _fixture_filter_conditions(self, category_code, series_code, item_number_code, operation_code, only_actual):
+        """Условия фильтров списка оснасток (строка вида " AND ...", таблица FixtureIDs под псевдонимом f) и параметры."""
+        conditions = ""
+        params = []
+        if category_code:
+            conditions += " AND f.Category = ?"
+            params.append(category_code)
+        if series_code:
+            conditions += " AND f.Series = ?"
+            params.append(series_code)
+        if item_number_code:
+            conditions += " AND f.ItemNumber = ?"
+            params.append(item_number_code)
+        if operation_code:
+            conditions += " AND f.Operation = ?"
+            params.append(operation_code)
+        if only_actual:
+            conditions += f" AND {self.ACTUAL_VERSION_CONDITION}"
+        return conditions, params
+
+    def _build_fixture_query(self, category_code=None, series_code=None, item_number_code=None,
+                             operation_code=None, only_actual=False, after=None, limit=None, ids=None):
+        """
+        Собирает SQL-запрос списка оснасток с описаниями и его параметры.
+        after - значения FIXTURE_LIST_ORDER последней прочитанной строки, limit - размер страницы,
+        ids - только оснастки с этими id.
+        """
         query = """
             SELECT
                 f.id,
@@ -379,7 +1206,8 @@ class FixtureDBManager:
                 f.AssemblyVersionCode,
                 IFNULL(f.IntermediateVersion, '') AS IntermediateVersion,
                 f.BasePath,
-                f.FullIDString
+                f.FullIDString,
+                IFNULL({actual_condition}, 0) AS IsActual
             FROM
                 FixtureIDs f
             LEFT JOIN Categories c ON f.Category = c.CategoryCode
@@ -387,87 +1215,58 @@ class FixtureDBManager:
             LEFT JOIN ItemNumbers i ON f.Category = i.CategoryCode AND f.Series = i.SeriesCode AND f.ItemNumber = i.ItemNumberCode
             LEFT JOIN Operations o ON f.Operation = o.OperationCode
             WHERE 1=1
-        """
-        params = []
-
-        if category_code:
-            query += " AND f.Category = ?"
-            params.append(category_code)
-        if series_code:
-            query += " AND f.Series = ?"
-            params.append(series_code)
-        if item_number_code:
-            query += " AND f.ItemNumber = ?"
-            params.append(item_number_code)
-        if operation_code:
-            query += " AND f.Operation = ?"
-            params.append(operation_code)
-
-        query += " ORDER BY f.Category, f.Series, f.ItemNumber, f.Operation, f.FixtureNumber"
-
-        try:
-            self.cursor.execute(query, tuple(params))
-            return [dict(row) for row in self.cursor.fetchall()]
-        except sqlite3.Error as e:
-            print(f"Ошибка при получении всех оснасток с описаниями: {e}")
-            return []
+        """.format(actual_condition=self.ACTUAL_VERSION_CONDITION)
+        conditions, params = self._fixture_filter_conditions(category_code, series_code, item_number_code,
+                                                             operation_code, only_actual)
+        query += conditions
+        if ids is not None:
+            query += " AND f.id IN ({})".format(", ".join("?" for _ in ids))
+            params.extend(ids)
+        if after is not None:
+            # Столбцы, закрепленные фильтром-равенством, не входят в ключ: тогда условие остается
+            # диапазоном по следующим столбцам индекса, а не фильтром поверх всего префикса
+            fixed_columns = {'Category': category_code, 'Series': series_code,
+                             'ItemNumber': item_number_code, 'Operation': operation_code}
+            key_columns = [col for col in self.FIXTURE_LIST_ORDER if not fixed_columns.get(col)]
+            query += " AND ({}) > ({})".format(", ".join(f"f.{col}" for col in key_columns),
+                                                ", ".join("?" for _ in key_columns))
+            params.extend(value for col, value in zip(self.FIXTURE_LIST_ORDER, after) if col in key_columns)
+
+        query += " ORDER BY " + ", ".join(f"f.{col}" for col in self.FIXTURE_LIST_ORDER)
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return query, params
 
     def get_latest_fixture_for_assembly(self, category, series, item_number, operation, fixture_number, unique_parts):
         """
         Retrieves the fixture with the latest version (VVW) for a given assembly base.
         The base is defined by KKK.SNN.DTT.AA.
         """
-        query = """
-            SELECT
-                AssemblyVersionCode,
-                IntermediateVersion
-            FROM
-                FixtureIDs
-            WHERE
-                Category = ? AND Series = ? AND ItemNumber = ? AND Operation = ? AND FixtureNumber = ? AND UniqueParts = ?
-            ORDER BY
-                AssemblyVersionCode DESC, IntermediateVersion DESC
-        """
         params = (category, series, item_number, operation, fixture_number, unique_parts)
 
         try:
-            self.cursor.execute(query, params)
-            # Fetch all results to find the truly "latest" based on custom logic
-            all_versions = self.cursor.fetchall()
-
-            latest_fixture_data = None
-            latest_version_components = None
-
-            for row in all_versions:
-                vv = row['AssemblyVersionCode']
-                w = row['IntermediateVersion'] if row['IntermediateVersion'] else ''
-                current_version_string = f"{vv}{w}"
-                current_version_components = self._parse_version_components(current_version_string)
-
-                if current_version_components['is_special_x']:
-                    # Special 'X' versions are not part of the normal ordering for "latest" in this context
-                    # If we encounter an 'X' version, we don't consider it for finding the *numeric* latest.
-                    # If the user tries to create a numeric version after an 'X' version, it should be allowed.
-                    continue
-
-                if latest_version_components is None:
-                    latest_version_components = current_version_components
-                    latest_fixture_data = row
-                else:
-                    # Compare using the custom logic
-                    if self.is_version_newer(
-                            f"{latest_version_components['vv_code']}{latest_version_components['w_code'] if latest_version_components['w_code'] is not None else ''}",
-                            current_version_string
-                    ):
-                        latest_version_components = current_version_components
-                        latest_fixture_data = row
-
-            return dict(latest_fixture_data) if latest_fixture_data else None
+            # X-версии не участвуют в порядке версий, поэтому исключены условием VersionSortKey >= 0
+            self.cursor.execute(self.LATEST_ASSEMBLY_VERSION_QUERY, params)
+            latest_fixture_data = self.cursor.fetchone()
+            return latest_fixture_data
 
         except sqlite3.Error as e:
             print(f"Ошибка при получении последней версии для сборки: {e}")
             return None
 
+    def _version_sort_key(self, assembly_version_code, intermediate_version):
+        """
+        Числовой ключ версии VVW для сортировки в SQL: VV * 100 + W, где W = 0 без промежуточной версии,
+        иначе 1 + номер буквы (A=1 ... Z=26). Порядок ключей совпадает с is_version_newer.
+        X-версии (и нераспознанные VV) не упорядочиваются и получают X_VERSION_SORT_KEY.
+        """
+        components = self._parse_version_components(f"{assembly_version_code}{intermediate_version or ''}")
+        if components['is_special_x']:
+            return self.X_VERSION_SORT_KEY
+        w_part = 0 if components['w_int'] is None else components['w_int'] + 1
+        return (components['major_int'] * 10 + components['minor_int']) * 100 + w_part
+
     def _parse_version_components(self, version_string):
         """
         Parses a version string (VV or VVW) into its components for comparison.
@@ -570,7 +1369,7 @@ class FixtureDBManager:
             if base_path and os.path.exists(base_path):
                 try:
                     # Проверяем, есть ли другие записи в БД, использующие этот же BasePath
-                    self.cursor.execute("SELECT COUNT(*) FROM FixtureIDs WHERE BasePath = ?", (base_path,))
+                    self.cursor.execute(self.BASE_PATH_REFERENCES_QUERY, (base_path,))
                     count_referencing_path = self.cursor.fetchone()[0]
 
                     if count_referencing_path == 1:  # Если это единственная запись, ссылающаяся на этот путь
@@ -596,8 +1395,7 @@ class FixtureDBManager:
 
     def _to_base36(self, number):
         """Converts an integer to a base36 string, excluding I, J, L, O."""
-        filtered_chars = [c for c in '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ' if c not in 'IJLO']
-        base = len(filtered_chars)
+        base = len(self.BASE36_DIGITS)
 
         if number < 0:
             raise ValueError("Cannot convert negative numbers to custom base36.")
@@ -608,25 +1406,19 @@ class FixtureDBManager:
         res = ''
         while number > 0:
             number, rem = divmod(number, base)
-            res = filtered_chars[rem] + res
+            res = self.BASE36_DIGITS[rem] + res
         return res
 
     def _from_base36(self, base36_string):
         """Converts a custom base36 string (excluding I, J, L, O) to an integer."""
-        filtered_chars = [c for c in '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ' if c not in 'IJLO']
-        base = len(filtered_chars)
+        base = len(self.BASE36_DIGITS)
 
-        reverse_map = {char: i for i, char in enumerate(filtered_chars)}
-
-        base36_string = base36_string.upper().strip()
         result = 0
-        power = 0
-        for char in reversed(base36_string):
-            if char not in reverse_map:
+        for char in base36_string.upper().strip():
+            value = self.BASE36_VALUES.get(char)
+            if value is None:
                 raise ValueError(f"Invalid character '{char}' for custom base36 encoding.")
-            value = reverse_map[char]
-            result += value * (base ** power)
-            power += 1
+            result = result * base + value
         return result
 
     def parse_id_string(self, full_id_string):
@@ -643,32 +1435,63 @@ class FixtureDBManager:
         CC (PartQuantity): 2 символа
         VV (AssemblyVersionCode): 2 символа
         W (IntermediateVersion): 0 или 1 символ (опционально)
+
+        Возвращает None, если строка не соответствует формату (без вывода в консоль -
+        сообщение об ошибке выводит вызывающий код). Для пакетов см. fixture_id_codec.parse_many.
         """
-        match = re.match(
-            r"^([A-Z]{2,3})\.([0-9A-Z]{1})([0-9A-Z]{2})\.([0-9A-Z]{1})([0-9A-Z]{2})\.([0-9A-Z]{2})([0-9A-Z]{2})([0-9A-Z]{2})-([0-9A-Z]{2})([0-9A-Z]{0,1})$",
-            full_id_string)
-        if not match:
-            print(f"Ошибка парсинга ID строки: '{full_id_string}'")
-            return None
+        return fixture_id_codec.parse(full_id_string)
 
+    def explain_index_usage(self):
+        """
+        Проверяет через EXPLAIN QUERY PLAN, что основные запросы к FixtureIDs используют индексы.
+        Возвращает словарь {имя_запроса: (использует_индекс, [строки плана])}.
+        """
+        sample = ('CS', '1', '00', 'A', '01', '01')
+        checks = {
+            'get_fixture_ids_with_descriptions': self._build_fixture_query(*sample[:4]),
+            'get_fixture_ids_with_descriptions (операция)': self._build_fixture_query(operation_code=sample[3]),
+            'iter_fixture_ids_with_descriptions (страница)': self._build_fixture_query(
+                sample[0], after=sample[:5] + (0,), limit=1000),
+            'get_existing_fixture_numbers': (self.EXISTING_FIXTURE_NUMBERS_QUERY, sample[:4]),
+            'get_fixture_ids_with_descriptions (актуальные)': self._build_fixture_query(*sample[:4], only_actual=True),
+            'get_latest_fixture_for_assembly': (self.LATEST_ASSEMBLY_VERSION_QUERY, sample),
+            'delete_fixture_id (BasePath)': (self.BASE_PATH_REFERENCES_QUERY, ('',)),
+        }
+
+        results = {}
+        for name, (query, params) in checks.items():
+            try:
+                self.cursor.execute(f"EXPLAIN QUERY PLAN {query}", tuple(params))
+                plan = [row['detail'] for row in self.cursor.fetchall()]
+            except sqlite3.Error as e:
+                print(f"Ошибка при получении плана запроса '{name}': {e}")
+                results[name] = (False, [])
+                continue
+            # Для FixtureIDs (без алиаса, f или v в подзапросе актуальности) не должно быть полного сканирования
+            fixture_steps = [step for step in plan
+                             if step.split()[:1] in (['SCAN'], ['SEARCH']) and step.split()[1] in ('FixtureIDs', 'f', 'v')]
+            uses_index = bool(fixture_steps) and all('USING' in step for step in fixture_steps)
+            results[name] = (uses_index, plan)
+            print(f"{'OK ' if uses_index else 'SCAN'} {name}: {'; '.join(plan)}")
+        return results
+
+    def get_data_version(self):
+        """
+        PRAGMA data_version соединения текущего потока: меняется, когда базу изменило другое соединение
+        (рабочий поток, другой процесс или рабочее место); собственные изменения соединения его не меняют.
+        """
         try:
-            return {
-                'Category': match.group(1),
-                'Series': match.group(2),
-                'ItemNumber': match.group(3),
-                'Operation': match.group(4),
-                'FixtureNumber': match.group(5),
-                'UniqueParts': match.group(6),
-                'PartInAssembly': match.group(7),
-                'PartQuantity': match.group(8),
-                'AssemblyVersionCode': match.group(9),
-                'IntermediateVersion': match.group(10) if match.group(10) else None
-            }
-        except Exception as e:
-            print(f"Непредвиденная ошибка при парсинге ID '{full_id_string}': {e}")
+            return self.conn.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Ошибка при получении версии данных базы: {e}")
             return None
 
     def close(self):
-        if self.conn:
-            self.conn.close()
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local.conn = None
+        self._local.cursor = None
+        if connections:
             print("Соединение с базой данных закрыто.")
@@ -1,36 +1,81 @@
 import os
-import openpyxl
+import csv
+import hashlib
 from db_manager import FixtureDBManager
 import shutil
 
+SPREADSHEET_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+# Расширения текстовой выгрузки классификатора (файл на лист, имя файла = имя листа)
+TEXT_FILE_EXTENSIONS = (".csv", ".tsv", ".txt")
+# Через сколько прочитанных строк листа сообщать о ходе импорта (progress_callback)
+PROGRESS_ROW_BATCH = 5000
+# Части конфигурации листа, нужные для разбора (без методов БД, которые нельзя передать в процесс)
+PARSE_CONFIG_KEYS = ("columns", "required_cols", "key_cols")
+# Как часто (в секундах) параллельный разбор проверяет cancel_event, пока ждет процессы пула
+CANCEL_POLL_INTERVAL = 0.1
+
+
+def detect_text_delimiter(text_file, encoding="utf-8-sig"):
+    """Разделитель текстового файла: табуляция для .tsv, иначе самый частый из ';', ',' и табуляции в заголовке."""
+    if os.path.splitext(text_file)[1].lower() == ".tsv":
+        return "\t"
+    with open(text_file, newline="", encoding=encoding) as f:
+        header_line = f.readline()
+    return max((",", ";", "\t"), key=header_line.count)
+
+
+class ImportCancelled(Exception):
+    """Импорт прерван через cancel_event; все его изменения в БД откатываются."""
+
+
+def _parse_sheet(workbook, sheet_name, config, progress=None):
+    """Разбирает лист открытой книги. Возвращает результат _read_sheet_rows."""
+    # Stream rows (header first) as plain value tuples
+    sheet_rows = workbook[sheet_name].iter_rows(values_only=True)
+    return ExcelClassifierImporter._read_sheet_rows(sheet_rows, sheet_name, config, progress)
+
+
+def _parse_sheet_in_process(excel_file, sheet_name, config):
+    """Разбор одного листа в отдельном процессе пула: книга открывается в процессе заново."""
+    import openpyxl  # Loaded lazily: CSV imports and the CLI do not need it
+    workbook = openpyxl.load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        return _parse_sheet(workbook, sheet_name, config)
+    finally:
+        workbook.close()
+
 
 class ExcelClassifierImporter:
     def __init__(self, db_manager_instance):
         self.db_manager = db_manager_instance
+        self.unchanged_sheets = []  # Листы, пропущенные последним импортом как неизменившиеся
+        self.cancelled = False  # Последний импорт прерван через cancel_event
+        self._progress_callback = None
+        self._cancel_event = None
         self.sheet_configs = {
             "Категории": {
-                "handler": self.db_manager.add_category,
+                "bulk_handler": self.db_manager.add_categories_bulk,
                 "get_all_from_db": self.db_manager.get_categories,
                 "columns": ["CategoryCode", "CategoryName"],
                 "required_cols": ["CategoryCode", "CategoryName"],
                 "key_cols": ["CategoryCode"]
             },
             "Серии": {
-                "handler": self.db_manager.add_series_description,
+                "bulk_handler": self.db_manager.add_series_descriptions_bulk,
                 "get_all_from_db": self.db_manager.get_series_descriptions,
                 "columns": ["CategoryCode", "SeriesCode", "SeriesName"],
                 "required_cols": ["CategoryCode", "SeriesCode", "SeriesName"],
                 "key_cols": ["CategoryCode", "SeriesCode"]
             },
             "Изделия": {
-                "handler": self.db_manager.add_item_number_description,
+                "bulk_handler": self.db_manager.add_item_number_descriptions_bulk,
                 "get_all_from_db": self.db_manager.get_item_number_descriptions,
                 "columns": ["CategoryCode", "SeriesCode", "ItemNumberCode", "ItemNumberName"],
                 "required_cols": ["CategoryCode", "SeriesCode", "ItemNumberCode", "ItemNumberName"],
                 "key_cols": ["CategoryCode", "SeriesCode", "ItemNumberCode"]
             },
             "Операции": {
-                "handler": self.db_manager.add_operation_description,
+                "bulk_handler": self.db_manager.add_operation_descriptions_bulk,
                 "get_all_from_db": self.db_manager.get_operation_descriptions,
                 "columns": ["OperationCode", "OperationName"],
                 "required_cols": ["OperationCode", "OperationName"],
@@ -38,137 +83,437 @@ class ExcelClassifierImporter:
             },
         }
 
-    def _generate_key(self, row_data, key_cols):
-        """Генерирует уникальный ключ из данных строки на основе ключевых столбцов."""
-        # Ensure all key_cols are present in row_data before joining
+    @staticmethod
+    def _generate_key(row_data, key_cols):
+        """Генерирует уникальный ключ (кортеж строк) из данных строки на основе ключевых столбцов."""
+        # Ensure all key_cols are present in row_data before building the key
         if not all(col in row_data for col in key_cols):
             return None  # Or raise an error, depending on desired strictness
-        return "-".join(str(row_data[col]) for col in key_cols)
+        # Values are compared as text, the same way they are stored in the DB
+        return tuple(str(row_data[col]) for col in key_cols)
+
+    def _diff_sheet(self, excel_data_for_sheet, config):
+        """
+        Сравнивает данные листа со снимком таблицы из БД в памяти.
+        Возвращает (строки для записи: новые и с измененным именем, число неизмененных,
+        записи БД, отсутствующие в Excel, снимок {ключ: имя} для bulk_handler).
+        """
+        name_col = config["columns"][-1]
+        key_cols = config["key_cols"]
+        db_rows = config["get_all_from_db"]()
+        # Classifier columns are TEXT, so DB values are already in key form
+        existing_names = {tuple(db_row[col] for col in key_cols): db_row[name_col] for db_row in db_rows}
+
+        changed_rows = []
+        unchanged_count = 0
+        for key, excel_row in excel_data_for_sheet.items():
+            name = excel_row[name_col]
+            name = name if isinstance(name, str) else str(name)
+            if existing_names.get(key) == name:
+                unchanged_count += 1
+                continue
+            changed_rows.append(tuple(excel_row[col] for col in config["columns"]))
+
+        # Keys are the primary key, so existing_names holds exactly one key per DB row, in the same order
+        missing_rows = [db_row for key, db_row in zip(existing_names, db_rows) if key not in excel_data_for_sheet]
+        return changed_rows, unchanged_count, missing_rows, existing_names
+
+    @staticmethod
+    def _read_sheet_rows(sheet_rows, sheet_name, config, progress=None):
+        """
+        Читает строки листа (итератор кортежей значений, первая строка - заголовки).
+        Заголовки сопоставляются с колонками один раз на лист.
+        progress(число прочитанных строк) вызывается каждые PROGRESS_ROW_BATCH строк.
+        Возвращает (словарь {ключ: данные строки}, признак успеха, хеш содержимого листа, число пропущенных строк).
+        """
+        excel_data_for_sheet = {}
+        skipped_count = 0
+        content_hash = hashlib.sha256()
+        headers = next(sheet_rows, None) or ()
+        content_hash.update(repr(headers).encode())
+        header_to_col_idx = {header: idx for idx, header in enumerate(headers)}
+
+        missing_cols = [col_name for col_name in config["columns"] if col_name not in header_to_col_idx]
+        if missing_cols:
+            print(f"  Предупреждение: Колонки {missing_cols} не найдены на листе '{sheet_name}'. Пропуск листа.")
+            skipped_count = sum(1 for row in sheet_rows if any(value is not None for value in row))
+            return excel_data_for_sheet, True, None, skipped_count
+
+        col_positions = [(col_name, header_to_col_idx[col_name]) for col_name in config["columns"]]
+        required_cols = config["required_cols"]
+        key_cols = config["key_cols"]
+        rows_ok = True
+
+        for row_idx, row in enumerate(sheet_rows, start=2):
+            if progress is not None and row_idx % PROGRESS_ROW_BATCH == 0:
+                progress(row_idx - 1)
+            # Trailing empty rows (stale sheet dimensions) are not data
+            if not any(value is not None for value in row):
+                continue
+            content_hash.update(repr(row).encode())
+            row_data = {col_name: row[col_idx] if col_idx < len(row) else None
+                        for col_name, col_idx in col_positions}
+
+            # Basic validation for required columns
+            if not all(row_data[col] is not None for col in required_cols):
+                print(
+                    f"  Строка {row_idx}: Пропуск из-за отсутствия данных в обязательных колонках: {required_cols}.")
+                skipped_count += 1
+                continue
+
+            key = ExcelClassifierImporter._generate_key(row_data, key_cols)
+            if key:
+                excel_data_for_sheet[key] = row_data
+            else:
+                print(f"  Строка {row_idx}: Не удалось сгенерировать ключ для записи. Пропуск.")
+                skipped_count += 1
+                rows_ok = False
+
+        return excel_data_for_sheet, rows_ok, content_hash.hexdigest(), skipped_count
+
+    def _read_sheet_names(self, excel_file):
+        """Имена листов из xl/workbook.xml без загрузки книги (и ее общих строк) через openpyxl."""
+        import zipfile  # Only the parallel path needs these
+        from xml.etree import ElementTree
+        with zipfile.ZipFile(excel_file) as archive:
+            root = ElementTree.fromstring(archive.read("xl/workbook.xml"))
+        return [sheet.get("name") for sheet in root.iter(f"{SPREADSHEET_NS}sheet")]
+
+    def _check_cancelled(self):
+        """Прерывает импорт (ImportCancelled), если установлен cancel_event."""
+        if self._cancel_event is not None and self._cancel_event.is_set():
+            raise ImportCancelled()
+
+    def _report_progress(self, message):
+        """Передает сообщение о ходе импорта в progress_callback; при установленном cancel_event прерывает импорт."""
+        self._check_cancelled()
+        if self._progress_callback is not None:
+            self._progress_callback(message)
+
+    def _parse_sheets_sequential(self, workbook):
+        """Генератор (имя листа, результат разбора или None) в порядке sheet_configs."""
+        for sheet_name, config in self.sheet_configs.items():
+            if sheet_name not in workbook.sheetnames:
+                yield sheet_name, None
+                continue
+            self._report_progress(f"Чтение листа '{sheet_name}'...")
+            yield sheet_name, _parse_sheet(
+                workbook, sheet_name, config,
+                lambda rows_read: self._report_progress(f"Чтение листа '{sheet_name}': {rows_read} строк"))
+
+    def _parse_sheets_parallel(self, excel_file, sheet_names):
+        """
+        Разбирает листы одновременно в пуле процессов. Результаты выдаются в порядке sheet_configs.
+        """
+        # Loaded lazily: multiprocessing is slow to import
+        from concurrent.futures import ProcessPoolExecutor, wait
+        present_sheets = [sheet_name for sheet_name in self.sheet_configs if sheet_name in sheet_names]
+        executor = ProcessPoolExecutor(max_workers=max(1, min(len(present_sheets), os.cpu_count() or 1)))
+        cancelled = False
+        try:
+            futures = {
+                sheet_name: executor.submit(_parse_sheet_in_process, excel_file, sheet_name,
+                                            {key: self.sheet_configs[sheet_name][key] for key in PARSE_CONFIG_KEYS})
+                for sheet_name in present_sheets
+            }
+            for sheet_name in self.sheet_configs:
+                future = futures.get(sheet_name)
+                if future is None:
+                    yield sheet_name, None
+                    continue
+                self._report_progress(f"Разбор листа '{sheet_name}'...")
+                # Short waits instead of future.result(): a cancel must not wait for the whole parse
+                while not wait([future], timeout=CANCEL_POLL_INTERVAL).done:
+                    self._check_cancelled()
+                try:
+                    parse_result = future.result()
+                except Exception as e:
+                    print(f"  Ошибка при разборе листа '{sheet_name}': {e}")
+                    parse_result = None
+                yield sheet_name, parse_result
+        except ImportCancelled:
+            cancelled = True
+            raise
+        finally:
+            # On cancel queued sheets are dropped and the import thread returns at once; a sheet already being
+            # parsed finishes in its worker process, nothing waits for it
+            executor.shutdown(wait=not cancelled, cancel_futures=cancelled)
+
+    def _file_hash(self, file_path):
+        """SHA-256 содержимого файла, читаемого блоками."""
+        file_hash = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                file_hash.update(block)
+        return file_hash.hexdigest()
+
+    def _check_file_unchanged(self, file_path, stored_fingerprints):
+        """
+        Сравнивает файл с сохраненным отпечатком (SheetName = ''): сначала размер и время изменения,
+        хеш содержимого - только если они отличаются. Возвращает (не изменился, os.stat файла, хеш или None).
+        """
+        file_stat = os.stat(file_path)
+        file_fingerprint = stored_fingerprints.get('')
+        if file_fingerprint is None:
+            return False, file_stat, None
+        if (file_fingerprint['FileSize'], file_fingerprint['FileMtime']) == (file_stat.st_size, file_stat.st_mtime):
+            return True, file_stat, None
+        file_hash = self._file_hash(file_path)
+        if file_hash != file_fingerprint['ContentHash']:
+            return False, file_stat, file_hash
+        # Same content, only the mtime changed
+        self.db_manager.save_import_fingerprint(os.path.abspath(file_path), '', file_stat.st_size,
+                                                file_stat.st_mtime, file_hash)
+        return True, file_stat, file_hash
+
+    def _empty_report(self):
+        """Пустые (added_counts, updated_counts, skipped_counts, missing_from_excel_data) по всем листам."""
+        return ({sheet_name: 0 for sheet_name in self.sheet_configs.keys()},
+                {sheet_name: 0 for sheet_name in self.sheet_configs.keys()},
+                {sheet_name: 0 for sheet_name in self.sheet_configs.keys()},
+                {sheet_name: [] for sheet_name in self.sheet_configs.keys()})
+
+    def _apply_sheet(self, sheet_name, parse_result, source_file, stored_fingerprints, report):
+        """
+        Сравнивает разобранный лист с БД и записывает изменения одной транзакцией.
+        Неизмененный с последнего импорта лист пропускается. Счетчики добавляются в report.
+        Возвращает признак успеха.
+        """
+        config = self.sheet_configs[sheet_name]
+        added_counts, updated_counts, skipped_counts, missing_from_excel_data = report
+        excel_data_for_sheet, rows_ok, sheet_hash, sheet_skipped_count = parse_result
+        skipped_counts[sheet_name] += sheet_skipped_count
+
+        sheet_fingerprint = stored_fingerprints.get(sheet_name)
+        if sheet_fingerprint is not None and sheet_fingerprint['ContentHash'] == sheet_hash:
+            print(f"  Лист '{sheet_name}' не изменился с последнего импорта. Пропуск.")
+            self.unchanged_sheets.append(sheet_name)
+            return rows_ok
+
+        # Compare with the DB snapshot in memory; only new rows and real name changes are written
+        changed_rows, unchanged_count, missing_rows, existing_names = self._diff_sheet(excel_data_for_sheet, config)
+        skipped_counts[sheet_name] += unchanged_count
+        missing_from_excel_data[sheet_name].extend(missing_rows)
+
+        # Apply the changes in one transaction per sheet (joins the import's transaction, if any)
+        self._report_progress(f"Запись листа '{sheet_name}' в базу данных: {len(changed_rows)} изменений")
+        status_counts = config["bulk_handler"](changed_rows, existing_names)
+        added_counts[sheet_name] += status_counts['added']
+        updated_counts[sheet_name] += status_counts['updated']
+        skipped_counts[sheet_name] += status_counts['skipped']
+        if status_counts['error']:
+            print(f"  Ошибка при записи {status_counts['error']} записей листа '{sheet_name}' в базу данных.")
+            return False
+        if rows_ok and sheet_hash is not None:
+            self.db_manager.save_import_fingerprint(source_file, sheet_name, None, None, sheet_hash)
+        return rows_ok
+
+    def _print_report(self, report, sheet_names=None):
+        """Выводит отчет по импорту в консоль (по умолчанию - по всем листам sheet_configs)."""
+        added_counts, updated_counts, skipped_counts, missing_from_excel_data = report
+        print("\n--- Отчет по импорту ---")
+        for sheet_name in sheet_names or self.sheet_configs.keys():
+            print(f"Лист '{sheet_name}':")
+            if sheet_name in self.unchanged_sheets:
+                print("  Не изменился с последнего импорта.")
+                continue
+            print(f"  Добавлено записей: {added_counts[sheet_name]}")
+            print(f"  Обновлено записей: {updated_counts[sheet_name]}")
+            print(f"  Пропущено записей (не изменились или ошибки в Excel): {skipped_counts[sheet_name]}")
+            if missing_from_excel_data[sheet_name]:
+                print(f"  Записи в БД, отсутствующие в Excel:")
+                for item in missing_from_excel_data[sheet_name]:
+                    print(f"    {item}")
+
+        print("--- Импорт данных завершен ---")
 
-    def import_from_excel(self, excel_file):
+    def import_from_excel(self, excel_file, force=False, parallel=False, progress_callback=None, cancel_event=None):
         """
         Выполняет интеллектуальный импорт из Excel:
         - Добавляет новые записи в базу данных.
         - Обновляет описания существующих записей.
         - Сообщает о записях, присутствующих в БД, но отсутствующих в Excel.
         - Не удаляет существующие оснастки.
+        - Пропускает файл и отдельные листы, не изменившиеся с последнего успешного импорта
+          (размер, время изменения и хеш хранятся в БД); force=True выполняет полный импорт.
+          Пропущенные листы перечислены в self.unchanged_sheets.
+        - parallel=True: листы разбираются одновременно в отдельных процессах (выгодно на нескольких ядрах,
+          когда листы сопоставимы по размеру); запись в БД в любом случае идет в одном потоке в порядке
+          зависимостей (категории -> серии -> изделия -> операции).
+        - progress_callback(сообщение) получает ход импорта по листам и пачкам строк (вызывается из потока импорта).
+        - cancel_event (threading.Event): при установке импорт прерывается, и все его изменения откатываются,
+          так как листы и отпечатки записываются одной транзакцией; self.cancelled = True.
         Возвращает (success_status, added_counts, updated_counts, skipped_counts, missing_from_excel_data).
         """
+        self.unchanged_sheets = []
+        self.cancelled = False
+        self._progress_callback = progress_callback
+        self._cancel_event = cancel_event
         if not os.path.exists(excel_file):
             print(f"Ошибка: Файл Excel '{excel_file}' не найден.")
             return False, {}, {}, {}, {}
 
+        source_file = os.path.abspath(excel_file)
+        stored_fingerprints = {} if force else self.db_manager.get_import_fingerprints(source_file)
+        unchanged, file_stat, file_hash = self._check_file_unchanged(excel_file, stored_fingerprints)
+        if unchanged:
+            print(f"Файл Excel '{excel_file}' не изменился с последнего импорта. Импорт пропущен.")
+            self.unchanged_sheets = list(self.sheet_configs.keys())
+            return (True,) + self._empty_report()
+        if file_hash is None:
+            file_hash = self._file_hash(excel_file)
+
+        workbook = None
         try:
-            workbook = openpyxl.load_workbook(excel_file)
+            if parallel:
+                # Each worker process opens the workbook itself
+                sheet_names = self._read_sheet_names(excel_file)
+            else:
+                # read_only: rows are streamed from the file instead of building the full object model
+                import openpyxl  # Loaded lazily: CSV imports and the CLI do not need it
+                workbook = openpyxl.load_workbook(excel_file, read_only=True, data_only=True)
+                sheet_names = workbook.sheetnames
         except Exception as e:
             print(f"Ошибка при открытии файла Excel '{excel_file}': {e}")
             return False, {}, {}, {}, {}
 
         print(f"\n--- Начинаем интеллектуальный импорт данных из '{excel_file}' ---")
 
-        added_counts = {sheet_name: 0 for sheet_name in self.sheet_configs.keys()}
-        updated_counts = {sheet_name: 0 for sheet_name in self.sheet_configs.keys()}
-        skipped_counts = {sheet_name: 0 for sheet_name in self.sheet_configs.keys()}
-        missing_from_excel_data = {sheet_name: [] for sheet_name in self.sheet_configs.keys()}
-
+        report = self._empty_report()
         overall_success = True
 
-        for sheet_name, config in self.sheet_configs.items():
-            print(f"Обработка листа: '{sheet_name}'")
-            if sheet_name not in workbook.sheetnames:
-                print(f"  Предупреждение: Лист '{sheet_name}' не найден в файле Excel. Пропуск.")
-                overall_success = False
-                continue
+        try:
+            # Every sheet is parsed before the write transaction starts: the write lock is held only while
+            # the parsed rows are applied, so the GUI's own writes do not wait for openpyxl
+            try:
+                if parallel:
+                    parsed_sheets = list(self._parse_sheets_parallel(excel_file, sheet_names))
+                else:
+                    parsed_sheets = list(self._parse_sheets_sequential(workbook))
+            finally:
+                if workbook is not None:
+                    workbook.close()
 
-            sheet = workbook[sheet_name]
-            headers = [cell.value for cell in sheet[1]]
-            header_to_col_idx = {header: idx for idx, header in enumerate(headers)}
-
-            excel_data_for_sheet = {}  # To store data from current Excel sheet by key
-
-            # Read data from Excel
-            for row_idx in range(2, sheet.max_row + 1):
-                row_data = {}
-                is_row_valid = True
-                for col_name in config["columns"]:
-                    col_idx = header_to_col_idx.get(col_name)
-                    if col_idx is not None:
-                        cell_value = sheet.cell(row=row_idx, column=col_idx + 1).value
-                        row_data[col_name] = cell_value
-                    else:
-                        print(f"  Предупреждение: Колонка '{col_name}' не найдена на листе '{sheet_name}'.")
-                        is_row_valid = False
-                        break
-
-                # Basic validation for required columns
-                if not all(row_data.get(col) is not None for col in config["required_cols"]):
-                    print(
-                        f"  Строка {row_idx}: Пропуск из-за отсутствия данных в обязательных колонках: {config['required_cols']}.")
-                    skipped_counts[sheet_name] += 1
-                    is_row_valid = False
-
-                if is_row_valid:
-                    key = self._generate_key(row_data, config["key_cols"])
-                    if key:
-                        excel_data_for_sheet[key] = row_data
-                    else:
-                        print(f"  Строка {row_idx}: Не удалось сгенерировать ключ для записи. Пропуск.")
-                        skipped_counts[sheet_name] += 1
+            # All DB writes stay in this thread, in sheet_configs order, in one transaction,
+            # so a cancelled import leaves the DB untouched
+            with self.db_manager.transaction():
+                for sheet_name, parse_result in parsed_sheets:
+                    print(f"Обработка листа: '{sheet_name}'")
+                    if parse_result is None:
+                        if sheet_name not in sheet_names:
+                            print(f"  Предупреждение: Лист '{sheet_name}' не найден в файле Excel. Пропуск.")
+                        overall_success = False
+                        continue
+                    if not self._apply_sheet(sheet_name, parse_result, source_file, stored_fingerprints, report):
                         overall_success = False
 
-            # Fetch existing data from DB for this sheet type
-            existing_db_data_for_sheet = {
-                self._generate_key(d, config["key_cols"]): d
-                for d in config["get_all_from_db"]()
-                if self._generate_key(d, config["key_cols"]) is not None
-            }
+                # The workbook is recorded only after a fully successful import, so a failed one is retried
+                if overall_success:
+                    self.db_manager.save_import_fingerprint(source_file, '', file_stat.st_size, file_stat.st_mtime,
+                                                            file_hash)
+        except ImportCancelled:
+            print("Импорт отменен пользователем. Изменения в базе данных откачены.")
+            self.cancelled = True
+            self.unchanged_sheets = []
+            return (False,) + self._empty_report()
 
-            # Compare Excel data with DB data
-            for excel_key, excel_row in excel_data_for_sheet.items():
-                if sheet_name == "Категории":
-                    status = self.db_manager.add_category(excel_row["CategoryCode"], excel_row["CategoryName"])
-                elif sheet_name == "Серии":
-                    status = self.db_manager.add_series_description(excel_row["CategoryCode"], excel_row["SeriesCode"],
-                                                                    excel_row["SeriesName"])
-                elif sheet_name == "Изделия":
-                    status = self.db_manager.add_item_number_description(excel_row["CategoryCode"],
-                                                                         excel_row["SeriesCode"],
-                                                                         excel_row["ItemNumberCode"],
-                                                                         excel_row["ItemNumberName"])
-                elif sheet_name == "Операции":
-                    status = self.db_manager.add_operation_description(excel_row["OperationCode"],
-                                                                       excel_row["OperationName"])
-                else:
-                    status = 'error'  # Should not happen with defined sheet_configs
-
-                if status == 'added':
-                    added_counts[sheet_name] += 1
-                elif status == 'updated':
-                    updated_counts[sheet_name] += 1
-                elif status == 'skipped':
-                    skipped_counts[sheet_name] += 1
-                elif status == 'error':
-                    overall_success = False
-                    print(f"  Ошибка при обработке записи из Excel: {excel_row}")
-
-            # Identify entries in DB but missing from Excel
-            for db_key, db_row in existing_db_data_for_sheet.items():
-                if db_key not in excel_data_for_sheet:
-                    missing_from_excel_data[sheet_name].append(db_row)
+        self._print_report(report)
+        return (overall_success,) + report
 
-        print("\n--- Отчет по импорту ---")
+    def find_text_files(self, directory):
+        """
+        Ищет в папке выгрузку классификатора в текстовом виде: файлы с именами листов
+        (Категории.csv, Серии.tsv, ...). Возвращает {имя листа: путь}.
+        """
+        text_files = {}
         for sheet_name in self.sheet_configs.keys():
-            print(f"Лист '{sheet_name}':")
-            print(f"  Добавлено записей: {added_counts[sheet_name]}")
-            print(f"  Обновлено записей: {updated_counts[sheet_name]}")
-            print(f"  Пропущено записей (не изменились или ошибки в Excel): {skipped_counts[sheet_name]}")
-            if missing_from_excel_data[sheet_name]:
-                print(f"  Записи в БД, отсутствующие в Excel:")
-                for item in missing_from_excel_data[sheet_name]:
-                    print(f"    {item}")
+            for extension in TEXT_FILE_EXTENSIONS:
+                file_path = os.path.join(directory, sheet_name + extension)
+                if os.path.exists(file_path):
+                    text_files[sheet_name] = file_path
+                    break
+        return text_files
 
-        print("--- Импорт данных завершен ---")
-        return overall_success, added_counts, updated_counts, skipped_counts, missing_from_excel_data
+    def _iter_text_rows(self, text_file, delimiter, encoding):
+        """Построчное чтение CSV/TSV в кортежи значений, как iter_rows(values_only=True) ('' -> None)."""
+        with open(text_file, newline="", encoding=encoding) as f:
+            for row in csv.reader(f, delimiter=delimiter):
+                yield tuple(value if value != "" else None for value in row)
+
+    def import_from_text_files(self, text_files, force=False, delimiter=None, encoding="utf-8-sig",
+                               progress_callback=None, cancel_event=None):
+        """
+        Импорт классификатора из CSV/TSV (по файлу на лист, {имя листа: путь}, см. find_text_files)
+        с теми же колонками, проверками, сравнением с БД и отпечатками, что и import_from_excel.
+        Файлы обрабатываются в порядке sheet_configs; листы без файла не импортируются.
+        delimiter=None - определяется по файлу. progress_callback и cancel_event - как в import_from_excel.
+        Возвращает (success_status, added_counts, updated_counts, skipped_counts, missing_from_excel_data).
+        """
+        self.unchanged_sheets = []
+        self.cancelled = False
+        self._progress_callback = progress_callback
+        self._cancel_event = cancel_event
+        print("\n--- Начинаем интеллектуальный импорт данных из текстовых файлов ---")
+        report = self._empty_report()
+        try:
+            # As in import_from_excel: files are read first, the write transaction only applies them
+            overall_success, parsed_files = self._parse_text_files(text_files, force, delimiter, encoding)
+            with self.db_manager.transaction():
+                for sheet_name, parse_result, source_file, stored_fingerprints, file_stat, file_hash in parsed_files:
+                    if self._apply_sheet(sheet_name, parse_result, source_file, stored_fingerprints, report):
+                        self.db_manager.save_import_fingerprint(source_file, '', file_stat.st_size,
+                                                                file_stat.st_mtime, file_hash)
+                    else:
+                        overall_success = False
+        except ImportCancelled:
+            print("Импорт отменен пользователем. Изменения в базе данных откачены.")
+            self.cancelled = True
+            self.unchanged_sheets = []
+            return (False,) + self._empty_report()
+
+        self._print_report(report, [sheet_name for sheet_name in self.sheet_configs.keys() if sheet_name in text_files])
+        return (overall_success,) + report
+
+    def _parse_text_files(self, text_files, force, delimiter, encoding):
+        """
+        Читает файлы листов по порядку sheet_configs, пропуская не изменившиеся с последнего импорта.
+        Возвращает (успех, [(имя листа, результат разбора, source_file, отпечатки, os.stat, хеш файла)]).
+        """
+        parsed_files = []
+        overall_success = True
+        for sheet_name, config in self.sheet_configs.items():
+            text_file = text_files.get(sheet_name)
+            if text_file is None:
+                continue
+            print(f"Обработка листа: '{sheet_name}' ({text_file})")
+            if not os.path.exists(text_file):
+                print(f"  Ошибка: Файл '{text_file}' не найден. Пропуск.")
+                overall_success = False
+                continue
+
+            # Each file is fingerprinted like a workbook with a single sheet
+            source_file = os.path.abspath(text_file)
+            stored_fingerprints = {} if force else self.db_manager.get_import_fingerprints(source_file)
+            unchanged, file_stat, file_hash = self._check_file_unchanged(text_file, stored_fingerprints)
+            if unchanged:
+                print("  Файл не изменился с последнего импорта. Пропуск.")
+                self.unchanged_sheets.append(sheet_name)
+                continue
+            if file_hash is None:
+                file_hash = self._file_hash(text_file)
+
+            self._report_progress(f"Чтение файла '{os.path.basename(text_file)}'...")
+            try:
+                file_delimiter = delimiter or detect_text_delimiter(text_file, encoding)
+                parse_result = self._read_sheet_rows(
+                    self._iter_text_rows(text_file, file_delimiter, encoding), sheet_name, config,
+                    lambda rows_read: self._report_progress(f"Чтение листа '{sheet_name}': {rows_read} строк"))
+            except (OSError, UnicodeDecodeError, csv.Error) as e:
+                print(f"  Ошибка при чтении файла '{text_file}': {e}")
+                overall_success = False
+                continue
+            parsed_files.append((sheet_name, parse_result, source_file, stored_fingerprints, file_stat, file_hash))
+        return overall_success, parsed_files
 
 
 # Example usage for testing (can be removed in final version)
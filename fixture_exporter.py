@@ -0,0 +1,116 @@
+import os
+import csv
+import sqlite3
+from db_manager import FixtureDBManager
+
+# Столбцы выгрузки реестра оснасток (имена столбцов get_fixture_ids_with_descriptions)
+EXPORT_COLUMNS = (
+    "FullIDString",
+    "Category", "CategoryName",
+    "Series", "SeriesName",
+    "ItemNumber", "ItemNumberName",
+    "Operation", "OperationName",
+    "FixtureNumber",
+    "UniqueParts", "PartInAssembly", "PartQuantity",
+    "AssemblyVersionCode", "IntermediateVersion",
+    "IsActual",
+    "BasePath",
+)
+XLSX_SHEET_NAME = "Оснастки"
+
+
+class FixtureExporter:
+    """
+    Выгрузка реестра оснасток с описаниями классификатора в .xlsx или CSV/TSV.
+    Строки читаются постранично (iter_fixture_ids_with_descriptions) и сразу пишутся в файл,
+    поэтому память не зависит от размера реестра.
+    """
+
+    def __init__(self, db_manager_instance):
+        self.db_manager = db_manager_instance
+
+    def _iter_export_rows(self, filters, only_actual, search_text=None):
+        if search_text:
+            # Same rows, in the same relevance order, as the GUI list shows for this search text
+            fixture_ids, flags = self.db_manager.search_fixture_list_columns(search_text)
+            if only_actual:
+                fixture_ids = [fixture_id for fixture_id, row_flags in zip(fixture_ids, flags)
+                               if row_flags & self.db_manager.LIST_FLAG_ACTUAL]
+            fixtures = self.db_manager.iter_fixtures_with_descriptions_by_ids(fixture_ids)
+        else:
+            fixtures = self.db_manager.iter_fixture_ids_with_descriptions(only_actual=only_actual, **filters)
+        for fixture in fixtures:
+            yield tuple(fixture[col] for col in EXPORT_COLUMNS)
+
+    def _write_xlsx(self, file_path, rows):
+        import openpyxl  # Loaded lazily: CSV exports and the CLI do not need it
+        # write_only: rows go straight to the sheet XML instead of being kept as cell objects
+        workbook = openpyxl.Workbook(write_only=True)
+        sheet = workbook.create_sheet(XLSX_SHEET_NAME)
+        sheet.append(EXPORT_COLUMNS)
+        rows_count = 0
+        for row in rows:
+            sheet.append(row)
+            rows_count += 1
+        workbook.save(file_path)
+        return rows_count
+
+    def _write_text(self, file_path, rows, delimiter, encoding):
+        rows_count = 0
+        with open(file_path, "w", newline="", encoding=encoding) as f:
+            writer = csv.writer(f, delimiter=delimiter)
+            writer.writerow(EXPORT_COLUMNS)
+            for row in rows:
+                writer.writerow(row)
+                rows_count += 1
+        return rows_count
+
+    def export(self, file_path, category_code=None, series_code=None, item_number_code=None, operation_code=None,
+               only_actual=False, delimiter=None, encoding="utf-8-sig", search_text=None):
+        """
+        Выгружает оснастки (с теми же фильтрами, что и get_fixture_ids_with_descriptions) в file_path.
+        search_text - вместо фильтров выгружаются результаты поиска search_fixture_list_columns в порядке
+        релевантности (не более SEARCH_RESULT_LIMIT строк), как их показывает список GUI.
+        Формат - по расширению: .xlsx (openpyxl write-only), .tsv (табуляция), иначе CSV с разделителем
+        delimiter (по умолчанию ';', как ожидает Excel с русской локалью).
+        only_actual=True - только актуальные версии сборок.
+        Файл пишется во временный и заменяет file_path только после успешной выгрузки: при ошибке записи
+        или чтения БД временный файл удаляется, а прежний file_path остается нетронутым.
+        Возвращает (success_status, rows_count).
+        """
+        filters = {'category_code': category_code, 'series_code': series_code,
+                   'item_number_code': item_number_code, 'operation_code': operation_code}
+        extension = os.path.splitext(file_path)[1].lower()
+        temp_path = f"{file_path}.tmp"
+        rows = self._iter_export_rows(filters, only_actual, search_text)
+
+        print(f"\n--- Выгрузка реестра оснасток в '{file_path}' ---")
+        try:
+            if extension == ".xlsx":
+                rows_count = self._write_xlsx(temp_path, rows)
+            else:
+                if delimiter is None:
+                    delimiter = "\t" if extension == ".tsv" else ";"
+                rows_count = self._write_text(temp_path, rows, delimiter, encoding)
+            os.replace(temp_path, file_path)
+        except (OSError, csv.Error, sqlite3.Error) as e:
+            print(f"Ошибка при выгрузке оснасток в '{file_path}': {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            return False, 0
+
+        print(f"Выгружено оснасток: {rows_count}")
+        return True, rows_count
+
+
+# Example usage for testing (can be removed in final version)
+if __name__ == "__main__":
+    db_manager = FixtureDBManager(db_name="my_fixtures_app_test.db", base_db_dir="fixture_database_root_app_test")
+    exporter = FixtureExporter(db_manager)
+
+    success, count = exporter.export("fixtures_export.xlsx")
+    print(f"Выгрузка xlsx: успех {success}, строк {count}")
+    success, count = exporter.export("fixtures_actual_export.csv", only_actual=True)
+    print(f"Выгрузка CSV (только актуальные): успех {success}, строк {count}")
+
+    db_manager.close()
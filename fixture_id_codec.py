@@ -0,0 +1,64 @@
+import os
+import re
+
+# Формат полного ID оснастки: KKK.SNN.DTT.AABBCC-VVW (подробно см. FixtureDBManager.parse_id_string)
+FULL_ID_PATTERN = re.compile(
+    r"^([A-Z]{2,3})\.([0-9A-Z]{1})([0-9A-Z]{2})\.([0-9A-Z]{1})([0-9A-Z]{2})\.([0-9A-Z]{2})([0-9A-Z]{2})([0-9A-Z]{2})-([0-9A-Z]{2})([0-9A-Z]{0,1})$"
+)
+FIELDS = (
+    'Category', 'Series', 'ItemNumber', 'Operation', 'FixtureNumber',
+    'UniqueParts', 'PartInAssembly', 'PartQuantity', 'AssemblyVersionCode', 'IntermediateVersion',
+)
+
+
+def parse(full_id_string):
+    """
+    Разбирает полный ID оснастки на составляющие (ключи FIELDS).
+    Пустая промежуточная версия W возвращается как None. Возвращает None, если строка не соответствует формату.
+    Ничего не печатает: сообщение об ошибке формирует вызывающий код.
+    """
+    match = FULL_ID_PATTERN.match(full_id_string) if isinstance(full_id_string, str) else None
+    if match is None:
+        return None
+    parsed_id = dict(zip(FIELDS, match.groups()))
+    if not parsed_id['IntermediateVersion']:
+        parsed_id['IntermediateVersion'] = None
+    return parsed_id
+
+
+def parse_many(full_id_strings):
+    """Генератор пар (full_id_string, разобранный ID или None) для пакетной обработки."""
+    for full_id_string in full_id_strings:
+        yield full_id_string, parse(full_id_string)
+
+
+def format_id(parsed_id):
+    """Собирает полный ID (KKK.SNN.DTT.AABBCC-VVW) из составляющих."""
+    return (
+        f"{parsed_id['Category']}.{parsed_id['Series']}{parsed_id['ItemNumber']}."
+        f"{parsed_id['Operation']}{parsed_id['FixtureNumber']}."
+        f"{parsed_id['UniqueParts']}{parsed_id['PartInAssembly']}{parsed_id['PartQuantity']}-"
+        f"{parsed_id['AssemblyVersionCode']}{parsed_id['IntermediateVersion'] or ''}"
+    )
+
+
+def format_folder_name(parsed_id):
+    """Имя папки версии сборки: KKK.SNN.DTT.AA0000-VVW (BB и CC заменены на 0000)."""
+    return (
+        f"{parsed_id['Category']}.{parsed_id['Series']}{parsed_id['ItemNumber']}."
+        f"{parsed_id['Operation']}{parsed_id['FixtureNumber']}."
+        f"{parsed_id['UniqueParts']}0000-"
+        f"{parsed_id['AssemblyVersionCode']}{parsed_id['IntermediateVersion'] or ''}"
+    )
+
+
+def format_path(base_dir, parsed_id):
+    """Полный путь к папке версии сборки: base_dir/KKK/KKK.SNN/KKK.SNN.DTT/KKK.SNN.DTT.AA0000-VVW."""
+    category_series_item = f"{parsed_id['Category']}.{parsed_id['Series']}{parsed_id['ItemNumber']}"
+    return os.path.join(
+        base_dir,
+        parsed_id['Category'],
+        category_series_item,
+        f"{category_series_item}.{parsed_id['Operation']}{parsed_id['FixtureNumber']}",
+        format_folder_name(parsed_id)
+    )
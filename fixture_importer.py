@@ -0,0 +1,202 @@
+import os
+import csv
+import fixture_id_codec
+from db_manager import FixtureDBManager
+from excel_importer import detect_text_delimiter
+
+# Колонка с полным ID оснастки (KKK.SNN.DTT.AABBCC-VVW) по умолчанию
+DEFAULT_ID_COLUMN = "FullIDString"
+# Причины отклонения по статусам FixtureDBManager.add_fixture_ids
+REJECT_REASONS = {
+    'invalid': "Неверный формат ID",
+    'duplicate': "Уже есть в базе данных или повторяется в файле",
+    'error': "Ошибка записи в базу данных",
+}
+
+
+class FixtureIDImporter:
+    """
+    Пакетная регистрация существующих оснасток по списку полных ID из Excel (.xlsx) или CSV/TSV.
+    Строки читаются потоково и записываются пачками через FixtureDBManager.add_fixture_ids.
+    """
+
+    def __init__(self, db_manager_instance):
+        self.db_manager = db_manager_instance
+        # (KKK, S, NN, D, TT, AA) -> последняя версия 'VVW' сборки, зарегистрированная до импорта (или None)
+        self._latest_versions = {}
+
+    def _find_id_column(self, headers, id_column):
+        """Позиция колонки ID в строке заголовков или None."""
+        normalized_headers = [str(header).strip() if header is not None else None for header in headers]
+        return normalized_headers.index(id_column) if id_column in normalized_headers else None
+
+    def _iter_xlsx_ids(self, file_path, id_column, sheet_name):
+        """
+        Генератор (номер строки, значение ID) из книги Excel в режиме read-only.
+        Читается лист sheet_name или первый лист, в заголовке которого есть колонка id_column.
+        """
+        import openpyxl  # Loaded lazily: CSV imports and the CLI do not need it
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            sheet_names = [sheet_name] if sheet_name else workbook.sheetnames
+            for name in sheet_names:
+                if name not in workbook.sheetnames:
+                    raise ValueError(f"Лист '{name}' не найден в файле '{file_path}'.")
+                sheet_rows = workbook[name].iter_rows(values_only=True)
+                col_idx = self._find_id_column(next(sheet_rows, None) or (), id_column)
+                if col_idx is None:
+                    continue
+                print(f"  Чтение ID из листа '{name}', колонка '{id_column}'.")
+                for row_number, row in enumerate(sheet_rows, start=2):
+                    yield row_number, row[col_idx] if col_idx < len(row) else None
+                return
+            raise ValueError(f"Колонка '{id_column}' не найдена на листах: {', '.join(sheet_names)}.")
+        finally:
+            workbook.close()
+
+    def _iter_text_ids(self, file_path, id_column, delimiter, encoding):
+        """Генератор (номер строки, значение ID) из CSV/TSV с заголовком."""
+        with open(file_path, newline="", encoding=encoding) as f:
+            rows = csv.reader(f, delimiter=delimiter)
+            col_idx = self._find_id_column(next(rows, None) or (), id_column)
+            if col_idx is None:
+                raise ValueError(f"Колонка '{id_column}' не найдена в файле '{file_path}'.")
+            for row_number, row in enumerate(rows, start=2):
+                yield row_number, row[col_idx] if col_idx < len(row) else None
+
+    def _version_rejection(self, parsed_id):
+        """
+        Проверка порядка версий по тому же правилу, что и при создании оснастки в GUI: версия не может быть
+        старше последней версии сборки KKK.SNN.DTT.AA (is_version_newer). Сравнение идет с состоянием базы
+        до импорта, поэтому история версий из файла принимается в любом порядке строк.
+        Возвращает причину отклонения или None.
+        """
+        assembly_key = (parsed_id['Category'], parsed_id['Series'], parsed_id['ItemNumber'],
+                        parsed_id['Operation'], parsed_id['FixtureNumber'], parsed_id['UniqueParts'])
+        if assembly_key not in self._latest_versions:
+            latest_fixture = self.db_manager.get_latest_fixture_for_assembly(*assembly_key)
+            self._latest_versions[assembly_key] = (
+                f"{latest_fixture['AssemblyVersionCode']}{latest_fixture['IntermediateVersion'] or ''}"
+                if latest_fixture else None
+            )
+        latest_version = self._latest_versions[assembly_key]
+        if latest_version is None:
+            return None
+
+        version = f"{parsed_id['AssemblyVersionCode']}{parsed_id['IntermediateVersion'] or ''}"
+        if version != latest_version and not self.db_manager.is_version_newer(latest_version, version):
+            return f"Версия {version} старше последней зарегистрированной версии {latest_version}"
+        return None
+
+    def _import_batch(self, batch, rejected):
+        """Проверяет пачку (номер строки, ID) и записывает прошедшие проверку одной транзакцией. Возвращает число добавленных."""
+        to_add = []
+        for row_number, full_id_string in batch:
+            parsed_id = fixture_id_codec.parse(full_id_string)
+            if parsed_id is None:
+                rejected.append((row_number, full_id_string, REJECT_REASONS['invalid']))
+                continue
+            reason = self._version_rejection(parsed_id)
+            if reason:
+                rejected.append((row_number, full_id_string, reason))
+                continue
+            to_add.append((row_number, full_id_string))
+
+        added_count = 0
+        report = self.db_manager.add_fixture_ids([full_id_string for _, full_id_string in to_add])
+        for (row_number, full_id_string), (_, status, _) in zip(to_add, report):
+            if status == 'added':
+                added_count += 1
+            else:
+                rejected.append((row_number, full_id_string, REJECT_REASONS[status]))
+        return added_count
+
+    def write_reject_report(self, rejected, report_file):
+        """Сохраняет отчет об отклоненных ID в CSV (разделитель ';', открывается в Excel)."""
+        with open(report_file, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f, delimiter=";")
+            writer.writerow(["Строка", "FullIDString", "Причина"])
+            writer.writerows(rejected)
+
+    def import_from_file(self, file_path, id_column=DEFAULT_ID_COLUMN, sheet_name=None, batch_size=5000,
+                         delimiter=None, encoding="utf-8-sig", reject_report_file=None):
+        """
+        Регистрирует оснастки по полным ID из колонки id_column файла .xlsx/.xlsm (лист sheet_name или первый
+        лист с этой колонкой) или CSV/TSV (delimiter=None - определяется по файлу).
+        - ID проверяются по формату (parse_id_string) и порядку версий (см. _version_rejection).
+        - Пачки по batch_size ID записываются одной транзакцией каждая, папки BasePath создаются
+          один раз на пачку (FixtureDBManager.add_fixture_ids).
+        - Уже зарегистрированные ID не дублируются, пустые ячейки пропускаются.
+        Возвращает (success_status, added_count, rejected) - rejected: список (номер строки, ID, причина);
+        при reject_report_file он также сохраняется в CSV.
+        """
+        if not os.path.exists(file_path):
+            print(f"Ошибка: Файл '{file_path}' не найден.")
+            return False, 0, []
+
+        print(f"\n--- Начинаем импорт ID оснасток из '{file_path}' ---")
+        self._latest_versions = {}
+        added_count = 0
+        rows_count = 0
+        rejected = []
+        success = True
+        batch = []
+        try:
+            if os.path.splitext(file_path)[1].lower() in (".xlsx", ".xlsm"):
+                id_rows = self._iter_xlsx_ids(file_path, id_column, sheet_name)
+            else:
+                id_rows = self._iter_text_ids(file_path, id_column,
+                                              delimiter or detect_text_delimiter(file_path, encoding), encoding)
+
+            for row_number, value in id_rows:
+                if value is None or not str(value).strip():
+                    continue
+                batch.append((row_number, str(value).strip()))
+                if len(batch) >= batch_size:
+                    added_count += self._import_batch(batch, rejected)
+                    rows_count += len(batch)
+                    batch = []
+                    print(f"  Обработано ID: {rows_count}, добавлено: {added_count}, отклонено: {len(rejected)}")
+            if batch:
+                added_count += self._import_batch(batch, rejected)
+                rows_count += len(batch)
+        except Exception as e:
+            print(f"Ошибка при чтении файла '{file_path}': {e}")
+            success = False
+
+        rejected.sort(key=lambda reject: reject[0])
+        if any(reason == REJECT_REASONS['error'] for _, _, reason in rejected):
+            success = False
+
+        print("\n--- Отчет по импорту ID оснасток ---")
+        print(f"  Обработано ID: {rows_count}")
+        print(f"  Добавлено оснасток: {added_count}")
+        print(f"  Отклонено ID: {len(rejected)}")
+        for row_number, full_id_string, reason in rejected[:20]:
+            print(f"    Строка {row_number}: '{full_id_string}' - {reason}")
+        if len(rejected) > 20:
+            print(f"    ... и еще {len(rejected) - 20}")
+
+        if reject_report_file and rejected:
+            try:
+                self.write_reject_report(rejected, reject_report_file)
+                print(f"  Отчет об отклоненных ID сохранен в '{reject_report_file}'.")
+            except OSError as e:
+                print(f"Ошибка при сохранении отчета '{reject_report_file}': {e}")
+
+        print("--- Импорт ID оснасток завершен ---")
+        return success, added_count, rejected
+
+
+# Example usage for testing (can be removed in final version)
+if __name__ == "__main__":
+    db_manager = FixtureDBManager(db_name="my_fixtures_app_test.db", base_db_dir="fixture_database_root_app_test")
+    importer = FixtureIDImporter(db_manager)
+
+    # codifier_data.xlsx в текущем виде содержит только листы кодификатора без колонки FullIDString:
+    # ожидаем сообщение об отсутствующей колонке
+    success, added, rejected = importer.import_from_file("codifier_data.xlsx",
+                                                         reject_report_file="fixture_import_rejects.csv")
+    print(f"Успех: {success}, добавлено: {added}, отклонено: {len(rejected)}")
+
+    db_manager.close()
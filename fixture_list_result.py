@@ -0,0 +1,58 @@
+from array import array
+from bisect import bisect_left
+from itertools import compress
+
+from db_manager import FixtureDBManager
+
+
+class FixtureListResult:
+    """
+    Последний результат запроса списка оснасток для выбранной иерархии или текста поиска
+    (см. get_fixture_list_columns, search_fixture_list_columns): id в порядке отображения и флаги строк.
+    Флажки "скрыть неактуальные версии" и "скрыть сборные части" применяются к нему в памяти (select),
+    а БД запрашивается заново только при смене иерархии или текста поиска.
+    """
+
+    def __init__(self, filters, ids, flags, search_text=""):
+        self.filters = filters  # Hierarchy selection the result was queried for
+        self.search_text = search_text  # Search box text the result was queried for ("" - no search)
+        self.ids = ids
+        self.flags = bytes(flags)
+        # Sorted copy of the ids with their flags, for membership checks by bisect
+        order = sorted(range(len(ids)), key=ids.__getitem__)
+        self._sorted_ids = array('q', (ids[i] for i in order))
+        self._sorted_flags = bytes(self.flags[i] for i in order)
+
+    @staticmethod
+    def required_flags(hide_non_actual_versions, hide_assembled_parts):
+        """Флаги, которые должны быть у строки, чтобы она показывалась при данных флажках."""
+        return ((FixtureDBManager.LIST_FLAG_ACTUAL if hide_non_actual_versions else 0)
+                | (FixtureDBManager.LIST_FLAG_FIRST_PART if hide_assembled_parts else 0))
+
+    def select(self, required_flags):
+        """id строк со всеми флагами required_flags в порядке отображения (array('q'))."""
+        if not required_flags:
+            return self.ids
+        # One byte per row: 1 if the row passes, computed by translate instead of a Python loop
+        selector = self.flags.translate(bytes(1 if value & required_flags == required_flags else 0
+                                              for value in range(256)))
+        return array('q', compress(self.ids, selector))
+
+    def contains(self, fixture_id, required_flags):
+        """Есть ли оснастка в результате и проходит ли она флажки required_flags."""
+        position = bisect_left(self._sorted_ids, fixture_id)
+        return (position < len(self._sorted_ids) and self._sorted_ids[position] == fixture_id
+                and self._sorted_flags[position] & required_flags == required_flags)
+
+
+# Example usage for testing (can be removed in final version)
+if __name__ == "__main__":
+    db_manager = FixtureDBManager(db_name="my_fixtures_app_test.db", base_db_dir="fixture_database_root_app_test")
+
+    ids, flags = db_manager.get_fixture_list_columns()
+    result = FixtureListResult({}, ids, flags)
+    print(f"Всего оснасток: {len(result.ids)}")
+    print(f"Актуальные версии: {len(result.select(FixtureListResult.required_flags(True, False)))}")
+    print(f"Актуальные без сборных частей: {len(result.select(FixtureListResult.required_flags(True, True)))}")
+
+    db_manager.close()
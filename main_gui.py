@@ -3,14 +3,26 @@ import tkinter as tk
 from tkinter import filedialog, messagebox
 from tkinter import ttk  # Import ttk for Treeview
 from db_manager import FixtureDBManager
+import fixture_id_codec
 import os
 import re
 import shutil
 import excel_importer
+import fixture_exporter
+import query_executor
+import classifier_cache
+import fixture_list_result
 import subprocess
+import threading
+import queue
+from array import array
 
 
 class FixtureApp(ctk.CTk):
+    # The fixture list is virtual: the Treeview holds only the visible rows plus this many rows above and below
+    LIST_WINDOW_MARGIN = 100
+    LIST_ROW_HEIGHT = 25
+
     def __init__(self):
         super().__init__()
 
@@ -47,21 +59,51 @@ class FixtureApp(ctk.CTk):
         self.selected_fixture_id_in_list = None
         # self.fixture_id_line_map = {} # No longer needed with Treeview
 
+        # Virtual fixture list: the last queried result (columnar, see FixtureListResult), the ids it shows
+        # under the current checkbox flags in display order; only _list_window_ids, starting at
+        # _list_window_start, are Treeview items
+        self._list_result = None
+        self._list_required_flags = 0
+        self._list_ids = array('q')
+        self._list_window_start = 0
+        self._list_window_ids = []
+        self._list_window_values = {}  # iid -> values shown, to update only rows that changed
+        self._list_recenter_pending = False
+        # TT shown for "<Создать новый TT>": only a preview, reserved by create_fixture_command
+        self._new_fixture_number = None
+        self._search_text = ""  # Search box text the fixture list is refreshed for ("" - combobox selection)
+        self._list_search_text = ""  # Search text of the list currently shown
+
+        # Coalesced refresh: handlers mark what is dirty, one after_idle pass refreshes it (_schedule_refresh)
+        self._refresh_job = None
+        self._dirty_fixture_list = False
+        self._dirty_fixture_numbers = False
+
+        # Background import (see _run_import_in_background)
+        self._import_thread = None
+        self._import_cancel_event = None
+
         # 2. Создание виджетов
         self._create_widgets()
 
         # 3. Инициализация менеджера базы данных
         self.db_manager = FixtureDBManager(db_name="my_fixtures_app.db", base_db_dir="fixture_database_root_app")
+        # Selection-driven queries run on a worker thread; stale results are dropped
+        self.query_executor = query_executor.QueryExecutor(self, self.db_manager)
+        # Classifier names and combobox options, reloaded only after imports and outside changes
+        self.classifier_cache = classifier_cache.ClassifierCache(self.db_manager)
+        # Closing the window stops the import and worker threads before the DB connections are closed
+        self.protocol("WM_DELETE_WINDOW", self.on_closing)
 
         # 4. Проверяем, пуста ли база данных (или не содержит категорий)
-        # Если пуста, выполняем первоначальный импорт из Excel
+        # Если пуста, выполняем первоначальный импорт из Excel; без классификатора работать нельзя, поэтому сразу
+        excel_file = "classifier_data.xlsx"
         if not self.db_manager.get_categories():
             print("DEBUG: База данных пуста или не содержит категорий. Выполняем первоначальный импорт из Excel.")
-            excel_file = "classifier_data.xlsx"
             importer = excel_importer.ExcelClassifierImporter(self.db_manager)
             try:
                 success, added_counts, updated_counts, skipped_counts, missing_from_excel_data = importer.import_from_excel(
-                    excel_file)
+                    excel_file, force=True)
                 if success:
                     print("DEBUG: Первоначальный импорт завершен успешно.")
                     self.set_status("Первоначальный импорт данных завершен.", is_error=False)
@@ -71,10 +113,14 @@ class FixtureApp(ctk.CTk):
             except Exception as e:
                 print(f"DEBUG: Критическая ошибка при первоначальном импорте: {e}")
                 self.set_status(f"Критическая ошибка при первоначальном импорте: {e}", is_error=True)
+        elif os.path.exists(excel_file):
+            # A changed workbook is re-imported in the background once the window is up; an unchanged one
+            # is skipped by its fingerprint without a prompt
+            self.after_idle(lambda: self.import_excel_data_command(on_startup=True))
 
         # 5. Загрузка данных для Combobox'ов и обновление списка оснасток
         self.load_all_combobox_data()
-        self._refresh_fixture_list_with_current_selection()
+        self._schedule_refresh()
 
     def _create_widgets(self):
         # Фрейм для элементов управления
@@ -136,9 +182,20 @@ class FixtureApp(ctk.CTk):
         create_button.grid(row=len(labels), column=0, columnspan=4, padx=5, pady=10, sticky="ew")
 
         # Кнопка импорта из Excel
-        import_excel_button = ctk.CTkButton(control_frame, text="Импортировать из Excel (обновить)",
-                                            command=self.import_excel_data_command)
-        import_excel_button.grid(row=len(labels) + 1, column=0, columnspan=4, padx=5, pady=10, sticky="ew")
+        self.import_excel_button = ctk.CTkButton(control_frame, text="Импортировать из Excel (обновить)",
+                                                 command=self.import_excel_data_command)
+        self.import_excel_button.grid(row=len(labels) + 1, column=0, columnspan=2, padx=5, pady=10, sticky="ew")
+
+        # Кнопка импорта из выгрузки CSV/TSV (папка с файлами по листам)
+        self.import_text_button = ctk.CTkButton(control_frame, text="Импортировать из CSV/TSV...",
+                                                command=self.import_text_files_command)
+        self.import_text_button.grid(row=len(labels) + 1, column=2, columnspan=2, padx=5, pady=10, sticky="ew")
+
+        # Кнопка отмены фонового импорта: показывается на месте кнопок импорта, пока он идет
+        self.cancel_import_button = ctk.CTkButton(control_frame, text="Отменить импорт",
+                                                  command=self.cancel_import_command)
+        self.cancel_import_button.grid(row=len(labels) + 1, column=0, columnspan=4, padx=5, pady=10, sticky="ew")
+        self.cancel_import_button.grid_remove()
 
         # Статусная строка
         self.status_label = ctk.CTkLabel(control_frame, textvariable=self.status_var, wraplength=400)
@@ -164,10 +221,21 @@ class FixtureApp(ctk.CTk):
         list_frame.grid_columnconfigure(0, weight=1)
         list_frame.grid_rowconfigure(1, weight=1)
 
+        # Заголовок списка: подпись с фильтрами и строка поиска по ID и названиям
+        list_header_frame = ctk.CTkFrame(list_frame, fg_color="transparent")
+        list_header_frame.grid(row=0, column=0, columnspan=2, sticky="ew")
+        list_header_frame.grid_columnconfigure(0, weight=1)
+
         # Инициализация self.list_label
-        self.list_label = ctk.CTkLabel(list_frame, text="Список оснасток для изделия '00':")
+        self.list_label = ctk.CTkLabel(list_header_frame, text="Список оснасток для изделия '00':")
         self.list_label.grid(row=0, column=0, padx=5, pady=5, sticky="nw")
 
+        self.search_entry = ctk.CTkEntry(list_header_frame, width=320,
+                                         placeholder_text="Поиск: часть ID или названия (Esc - сбросить)")
+        self.search_entry.grid(row=0, column=1, padx=5, pady=5, sticky="e")
+        self.search_entry.bind("<KeyRelease>", self.on_search_changed)
+        self.search_entry.bind("<Escape>", self.clear_search)
+
         # --- Treeview для списка оснасток ---
         columns = ('category', 'series', 'item_number', 'operation', 'fixture_number',
                    'aa', 'bb', 'cc', 'version', 'full_id')
@@ -200,10 +268,10 @@ class FixtureApp(ctk.CTk):
 
         self.fixture_list_tree.grid(row=1, column=0, padx=5, pady=5, sticky="nsew")
 
-        # Scrollbars for Treeview
-        tree_scrollbar_y = ctk.CTkScrollbar(list_frame, command=self.fixture_list_tree.yview)
-        tree_scrollbar_y.grid(row=1, column=1, sticky="ns")
-        self.fixture_list_tree.configure(yscrollcommand=tree_scrollbar_y.set)
+        # Scrollbars for Treeview. The vertical one spans the whole (virtual) list, not just the loaded rows
+        self.tree_scrollbar_y = ctk.CTkScrollbar(list_frame, command=self._on_fixture_list_scrollbar)
+        self.tree_scrollbar_y.grid(row=1, column=1, sticky="ns")
+        self.fixture_list_tree.configure(yscrollcommand=self._on_fixture_list_yview)
 
         tree_scrollbar_x = ctk.CTkScrollbar(list_frame, orientation="horizontal", command=self.fixture_list_tree.xview)
         tree_scrollbar_x.grid(row=2, column=0, sticky="ew")  # Placed below the treeview
@@ -240,7 +308,7 @@ class FixtureApp(ctk.CTk):
                         lightcolor=separator_color,
                         darkcolor=separator_color,
                         borderwidth=1,
-                        rowheight=25,
+                        rowheight=self.LIST_ROW_HEIGHT,
                         font=("", 12))  # Increased font size for rows
         style.map('Treeview',
                   background=[('selected', selected_bg)],
@@ -275,20 +343,24 @@ class FixtureApp(ctk.CTk):
                                               command=self.delete_fixture_command, fg_color="red")
         delete_fixture_button.grid(row=7, column=0, padx=5, pady=5, sticky="ew")  # Adjusted row
 
+        # Кнопка выгрузки списка оснасток (текущие фильтры) в Excel/CSV
+        export_button = ctk.CTkButton(list_frame, text="Выгрузить список в Excel/CSV...",
+                                      command=self.export_fixtures_command)
+        export_button.grid(row=8, column=0, padx=5, pady=5, sticky="ew")
+
     def set_status(self, message, is_error=False):
         self.status_var.set(f"Статус: {message}")
         if is_error:
             self.status_label.configure(text_color="red")
         else:
             self.status_label.configure(text_color="green")
-        self.update_idletasks()
 
     def load_all_combobox_data(self):
         print("DEBUG: Загрузка всех данных для Combobox'ов...")
-        self.categories_data = self.db_manager.get_categories()
+        self.classifier_cache.refresh()
+        self.categories_data = self.classifier_cache.categories
         if self.categories_data:
-            options = ["Все категории"] + [f"{c['CategoryCode']} ({c['CategoryName']})" for c in self.categories_data]
-            self.category_combobox.configure(values=options)
+            self.category_combobox.configure(values=self._category_options())
             self.category_code_var.set("Все категории")
             self.category_combobox.set("Все категории")
         else:
@@ -297,10 +369,9 @@ class FixtureApp(ctk.CTk):
             self.category_combobox.configure(state="disabled")
             self.set_status("Ошибка: Нет доступных категорий в базе данных.", is_error=True)
 
-        self.operations_data = self.db_manager.get_operation_descriptions()
+        self.operations_data = self.classifier_cache.operations
         if self.operations_data:
-            options = ["Все операции"] + [f"{o['OperationCode']} ({o['OperationName']})" for o in self.operations_data]
-            self.operation_combobox.configure(values=options)
+            self.operation_combobox.configure(values=self._operation_options())
             self.operation_code_var.set("Все операции")
             self.operation_combobox.set("Все операции")
         else:
@@ -326,9 +397,29 @@ class FixtureApp(ctk.CTk):
         self.fixture_number_combobox.set("Заполните поля выше")
         self.fixture_number_combobox.configure(state="disabled")
 
+    def _category_options(self):
+        return ["Все категории"] + [f"{c['CategoryCode']} ({c['CategoryName']})"
+                                    for c in self.classifier_cache.categories]
+
+    def _operation_options(self):
+        return ["Все операции"] + [f"{o['OperationCode']} ({o['OperationName']})"
+                                   for o in self.classifier_cache.operations]
+
+    def _update_classifier_combobox_values(self):
+        """After a cache reload: new category/operation lists in the comboboxes, keeping the current selections."""
+        self.categories_data = self.classifier_cache.categories
+        self.operations_data = self.classifier_cache.operations
+        if self.categories_data:
+            self.category_combobox.configure(values=self._category_options(), state="readonly")
+        if self.operations_data:
+            self.operation_combobox.configure(values=self._operation_options(), state="readonly")
+
     def on_category_selected(self, event=None):
         category_display_text = self.category_code_var.get()
         print(f"DEBUG: on_category_selected вызван с '{category_display_text}'")
+        if self.classifier_cache.refresh():
+            print("DEBUG: Классификатор изменен другим соединением, кэш перечитан.")
+            self._update_classifier_combobox_values()
 
         category_code = self._get_code_from_display_text(category_display_text)
         print(f"DEBUG: _get_code_from_display_text input: '{category_display_text}'")
@@ -350,12 +441,12 @@ class FixtureApp(ctk.CTk):
             self.fixture_number_combobox.set("Заполните поля выше")
             self.fixture_number_combobox.configure(state="disabled")
             print("DEBUG: Категория не выбрана, сброс зависимых полей.")
-            self._refresh_fixture_list_with_current_selection()
+            self._schedule_refresh(fixture_numbers=True)  # Also drops a pending TT query
             return
 
         self.series_combobox.configure(state="readonly")
 
-        self.series_data = self.db_manager.get_series_by_category(category_code)
+        self.series_data = self.classifier_cache.get_series(category_code)
 
         print(f"DEBUG: Полученные данные серий для категории '{category_code}': {self.series_data}")
 
@@ -394,12 +485,12 @@ class FixtureApp(ctk.CTk):
             self.fixture_number_combobox.set("Заполните поля выше")
             self.fixture_number_combobox.configure(state="disabled")
             print("DEBUG: Серия или Категория не выбраны, сброс зависимых полей.")
-            self._refresh_fixture_list_with_current_selection()
+            self._schedule_refresh(fixture_numbers=True)  # Also drops a pending TT query
             return
 
         self.item_number_combobox.configure(state="readonly")
 
-        self.items_data = self.db_manager.get_items_by_category_and_series(category_code, series_code)
+        self.items_data = self.classifier_cache.get_items(category_code, series_code)
 
         print(
             f"DEBUG: Полученные данные изделий для категории '{category_code}', серии '{series_code}': {self.items_data}")
@@ -416,8 +507,7 @@ class FixtureApp(ctk.CTk):
             self.item_number_code_var.set("Все изделия")
             self.item_number_combobox.set("Все изделия")
 
-        self.update_fixture_number_combobox()
-        self._refresh_fixture_list_with_current_selection()
+        self._schedule_refresh(fixture_numbers=True)
 
     def on_item_number_selected(self, event=None):
         item_number_display_text = self.item_number_code_var.get()
@@ -425,8 +515,7 @@ class FixtureApp(ctk.CTk):
         item_number_code = self._get_code_from_display_text(item_number_display_text)
         print(f"DEBUG: _get_code_from_display_text input: '{item_number_display_text}'")
         print(f"DEBUG: _get_code_from_display_text output (parsed): '{item_number_code}'")
-        self.update_fixture_number_combobox()
-        self._refresh_fixture_list_with_current_selection()
+        self._schedule_refresh(fixture_numbers=True)
 
     def on_operation_selected(self, event=None):
         operation_display_text = self.operation_code_var.get()
@@ -434,8 +523,7 @@ class FixtureApp(ctk.CTk):
         operation_code = self._get_code_from_display_text(operation_display_text)
         print(f"DEBUG: _get_code_from_display_text input: '{operation_display_text}'")
         print(f"DEBUG: _get_code_from_display_text output (parsed): '{operation_code}'")
-        self.update_fixture_number_combobox()
-        self._refresh_fixture_list_with_current_selection()
+        self._schedule_refresh(fixture_numbers=True)
 
     def on_fixture_number_selected(self, event=None):
         fixture_number_display_text = self.fixture_number_code_var.get()
@@ -445,6 +533,7 @@ class FixtureApp(ctk.CTk):
             self.generate_next_fixture_number()
             print("DEBUG: Выбран '<Создать новый TT>'.")
         else:
+            self._new_fixture_number = None
             self.fixture_number_code_var.set(fixture_number_display_text)
             print(f"DEBUG: Выбран существующий TT: '{fixture_number_display_text}'")
 
@@ -465,13 +554,21 @@ class FixtureApp(ctk.CTk):
             self.fixture_number_combobox.set("Заполните поля выше")
             self.fixture_number_combobox.configure(state="disabled")
             print("DEBUG: Не все поля выбраны для обновления TT.")
+            self.query_executor.cancel("fixture_numbers")
             return
 
+        self.query_executor.submit(
+            "fixture_numbers",
+            lambda: self.db_manager.get_existing_fixture_numbers(
+                category_code, series_code, item_number_code, operation_code
+            ),
+            lambda existing_tts: self._on_fixture_numbers_loaded(
+                category_code, series_code, item_number_code, operation_code, existing_tts))
+
+    def _on_fixture_numbers_loaded(self, category_code, series_code, item_number_code, operation_code, existing_tts):
+        """Fills the TT combobox with the worker's query result (Tk thread)."""
         self.fixture_number_combobox.configure(state="readonly")
 
-        existing_tts = self.db_manager.get_existing_fixture_numbers(
-            category_code, series_code, item_number_code, operation_code
-        )
         # Ensure uniqueness for existing_tts
         existing_tts = sorted(list(set(existing_tts)))
 
@@ -510,9 +607,15 @@ class FixtureApp(ctk.CTk):
         print(f"DEBUG: _get_code_from_display_text input: '{self.operation_code_var.get()}'")
         print(f"DEBUG: _get_code_from_display_text output (parsed): '{operation_code}'")
 
+        # Preview only: the TT is reserved when the fixture is actually created (create_fixture_command),
+        # so browsing the combobox does not leave reservations behind
         next_tt = self.db_manager.get_next_fixture_number(
             category_code, series_code, item_number_code, operation_code
         )
+        if next_tt is None:
+            self.set_status("Ошибка: не удалось определить новый TT. Проверьте консоль.", is_error=True)
+            return
+        self._new_fixture_number = next_tt
         self.fixture_number_code_var.set(next_tt)
         print(f"DEBUG: Сгенерирован следующий TT: '{next_tt}'")
 
@@ -558,76 +661,83 @@ class FixtureApp(ctk.CTk):
             messagebox.showerror("Ошибка валидации", "AA или BB должны быть числовыми значениями.")
             return
 
-        full_id_string = (
-            f"{category}.{series}{item_number}.{operation}{fixture_number}."
-            f"{unique_parts}{part_in_assembly}{part_quantity}-"
-            f"{assembly_version}{intermediate_version}"
-        )
-        print(f"DEBUG: Сформированная строка ID: '{full_id_string}'")
-
-        parsed_id_for_path = self.db_manager.parse_id_string(full_id_string)
-        if not parsed_id_for_path:
-            self.set_status(f"Ошибка парсинга ID '{full_id_string}'.", is_error=True)
-            messagebox.showerror("Ошибка", f"Ошибка парсинга ID '{full_id_string}'.")
-            return
-
-        # Version ordering validation:
-        # Get the latest existing fixture for this specific assembly and unique part (KKK.SNN.DTT.AA)
-        latest_existing_fixture = self.db_manager.get_latest_fixture_for_assembly(
-            category, series, item_number, operation, fixture_number, unique_parts
-        )
+        # A new TT is reserved only now: the previewed one may have been taken by another workstation meanwhile
+        reserved_fixture_number = None
+        if fixture_number == self._new_fixture_number:
+            reserved_fixture_number = self.db_manager.reserve_next_fixture_number(
+                category, series, item_number, operation)
+            if reserved_fixture_number is None:
+                self.set_status("Ошибка: не удалось зарезервировать новый TT. Проверьте консоль.", is_error=True)
+                return
+            if reserved_fixture_number != fixture_number:
+                fixture_number = reserved_fixture_number
+                self._new_fixture_number = fixture_number
+                self.fixture_number_code_var.set(fixture_number)
 
-        if latest_existing_fixture:
-            latest_vv = latest_existing_fixture['AssemblyVersionCode']
-            latest_w = latest_existing_fixture['IntermediateVersion'] if latest_existing_fixture[
-                'IntermediateVersion'] else ''
-            latest_version_string = f"{latest_vv}{latest_w}"
-            current_version_string = f"{assembly_version}{intermediate_version}"
-
-            # If the current version is NOT the same as the latest existing version,
-            # AND the current version is NOT strictly newer than the latest existing version,
-            # then it's an invalid version attempt (i.e., trying to create an older version).
-            if current_version_string != latest_version_string and \
-                    not self.db_manager.is_version_newer(latest_version_string, current_version_string):
-                self.set_status(
-                    f"Ошибка: Новая деталь ({full_id_string}) должна иметь версию '{latest_version_string}' или более новую.",
-                    is_error=True)
-                messagebox.showerror("Ошибка версионирования",
-                                     f"Деталь для оснастки {category}.{series}{item_number}.{operation}{fixture_number}.{unique_parts} должна иметь версию '{latest_version_string}' или более новую. Текущая версия: '{current_version_string}'.")
+        fixture_id = None
+        try:
+            full_id_string = fixture_id_codec.format_id({
+                'Category': category, 'Series': series, 'ItemNumber': item_number,
+                'Operation': operation, 'FixtureNumber': fixture_number,
+                'UniqueParts': unique_parts, 'PartInAssembly': part_in_assembly, 'PartQuantity': part_quantity,
+                'AssemblyVersionCode': assembly_version, 'IntermediateVersion': intermediate_version,
+            })
+            print(f"DEBUG: Сформированная строка ID: '{full_id_string}'")
+
+            parsed_id_for_path = self.db_manager.parse_id_string(full_id_string)
+            if not parsed_id_for_path:
+                self.set_status(f"Ошибка парсинга ID '{full_id_string}'.", is_error=True)
+                messagebox.showerror("Ошибка", f"Ошибка парсинга ID '{full_id_string}'.")
                 return
 
-        # Construct the specific folder name for the assembly version (KKK.SNN.DTT.AA0000-VVW)
-        folder_version_name = (
-            f"{parsed_id_for_path['Category']}."
-            f"{parsed_id_for_path['Series']}{parsed_id_for_path['ItemNumber']}."
-            f"{parsed_id_for_path['Operation']}{parsed_id_for_path['FixtureNumber']}."
-            f"{parsed_id_for_path['UniqueParts']}0000-"  # BB and CC are replaced with 0000
-            f"{parsed_id_for_path['AssemblyVersionCode']}"
-            f"{parsed_id_for_path['IntermediateVersion'] if parsed_id_for_path['IntermediateVersion'] else ''}"
-        )
+            # Version ordering validation:
+            # Get the latest existing fixture for this specific assembly and unique part (KKK.SNN.DTT.AA)
+            latest_existing_fixture = self.db_manager.get_latest_fixture_for_assembly(
+                category, series, item_number, operation, fixture_number, unique_parts
+            )
 
-        base_folder_path = os.path.join(
-            self.db_manager.base_db_dir,
-            parsed_id_for_path['Category'],
-            f"{parsed_id_for_path['Category']}.{parsed_id_for_path['Series']}{parsed_id_for_path['ItemNumber']}",
-            f"{parsed_id_for_path['Category']}.{parsed_id_for_path['Series']}{parsed_id_for_path['ItemNumber']}.{parsed_id_for_path['Operation']}{parsed_id_for_path['FixtureNumber']}",
-            folder_version_name  # Use the newly constructed folder name
-        )
+            if latest_existing_fixture:
+                latest_vv = latest_existing_fixture['AssemblyVersionCode']
+                latest_w = latest_existing_fixture['IntermediateVersion'] if latest_existing_fixture[
+                    'IntermediateVersion'] else ''
+                latest_version_string = f"{latest_vv}{latest_w}"
+                current_version_string = f"{assembly_version}{intermediate_version}"
+
+                # If the current version is NOT the same as the latest existing version,
+                # AND the current version is NOT strictly newer than the latest existing version,
+                # then it's an invalid version attempt (i.e., trying to create an older version).
+                if current_version_string != latest_version_string and \
+                        not self.db_manager.is_version_newer(latest_version_string, current_version_string):
+                    self.set_status(
+                        f"Ошибка: Новая деталь ({full_id_string}) должна иметь версию '{latest_version_string}' или более новую.",
+                        is_error=True)
+                    messagebox.showerror("Ошибка версионирования",
+                                         f"Деталь для оснастки {category}.{series}{item_number}.{operation}{fixture_number}.{unique_parts} должна иметь версию '{latest_version_string}' или более новую. Текущая версия: '{current_version_string}'.")
+                    return
+
+            # Folder of the assembly version: .../KKK.SNN.DTT.AA0000-VVW (same path add_fixture_id stores)
+            base_folder_path = fixture_id_codec.format_path(self.db_manager.base_db_dir, parsed_id_for_path)
 
-        try:
-            os.makedirs(base_folder_path, exist_ok=True)
-            print(f"Базовая папка версии оснастки создана: {base_folder_path}")
-        except OSError as e:
-            self.set_status(f"Ошибка создания папки '{base_folder_path}': {e}", is_error=True)
-            messagebox.showerror("Ошибка", f"Ошибка создания папки: {e}")
-            return
+            try:
+                os.makedirs(base_folder_path, exist_ok=True)
+                print(f"Базовая папка версии оснастки создана: {base_folder_path}")
+            except OSError as e:
+                self.set_status(f"Ошибка создания папки '{base_folder_path}': {e}", is_error=True)
+                messagebox.showerror("Ошибка", f"Ошибка создания папки: {e}")
+                return
 
-        fixture_id = self.db_manager.add_fixture_id(full_id_string)
-        if fixture_id:
-            self.set_status(f"Оснастка {full_id_string} успешно добавлена. ID в БД: {fixture_id}")
-            self._refresh_fixture_list_with_current_selection()
-        else:
-            self.set_status(f"Не удалось добавить оснастку {full_id_string}.", is_error=True)
+            fixture_id = self.db_manager.add_fixture_id(full_id_string)
+            if fixture_id:
+                self.set_status(f"Оснастка {full_id_string} успешно добавлена. ID в БД: {fixture_id}")
+                self._new_fixture_number = None  # The TT exists now; further parts go to the same TT
+                self._schedule_refresh()
+            else:
+                self.set_status(f"Не удалось добавить оснастку {full_id_string}.", is_error=True)
+        finally:
+            # The reservation is released by add_fixture_id on success; otherwise it must not linger until the TTL
+            if reserved_fixture_number is not None and not fixture_id:
+                self.db_manager.release_fixture_number_reservation(
+                    category, series, item_number, operation, reserved_fixture_number)
 
     def select_files_command(self):
         """Allows user to select multiple files for copying."""
@@ -729,6 +839,8 @@ class FixtureApp(ctk.CTk):
             values = self.fixture_list_tree.item(selected_item_id, 'values')
             # The fixture ID is stored as the last value (FullIDString)
             # We need to retrieve the actual database ID which is stored in the item's `iid`
+            if selected_item_id == self.selected_fixture_id_in_list:
+                return  # Re-selected after the list window moved
             self.selected_fixture_id_in_list = selected_item_id  # Treeview item ID is its internal ID
 
             fixture_data = self.db_manager.get_fixture_id_by_id(int(self.selected_fixture_id_in_list))  # Convert to int
@@ -737,15 +849,41 @@ class FixtureApp(ctk.CTk):
             else:
                 self.set_status(f"Выбрана оснастка с ID {self.selected_fixture_id_in_list}.", is_error=False)
         else:
+            # A selected row that scrolled out of the loaded window is still selected
+            if self.selected_fixture_id_in_list is not None and self._is_in_fixture_list(
+                    self.selected_fixture_id_in_list):
+                return
             self.selected_fixture_id_in_list = None
             self.set_status("Выбор оснастки сброшен. Пожалуйста, кликните на строку оснастки.", is_error=False)
 
     def on_filter_checkbox_toggled(self):
-        """Called when any filter checkbox is toggled."""
-        self._refresh_fixture_list_with_current_selection()
+        """Called when any filter checkbox is toggled: the loaded result is filtered in memory, without a query."""
+        if self._is_list_result_current():
+            self._apply_fixture_list_filters()
+        else:
+            self._schedule_refresh()
 
-    def _refresh_fixture_list_with_current_selection(self):
-        """Helper to call load_fixtures_to_list with current combobox selections."""
+    def on_search_changed(self, event=None):
+        """Called on key release in the search box; the list is re-queried only if the text changed."""
+        search_text = self.search_entry.get().strip()
+        if search_text == self._search_text:
+            return
+        self._search_text = search_text
+        self._schedule_refresh()
+
+    def clear_search(self, event=None):
+        """Clears the search box and returns to the list for the combobox selection."""
+        self.search_entry.delete(0, tk.END)
+        self.on_search_changed()
+
+    def _is_list_result_current(self):
+        """Whether the loaded list was queried for the current search text or, without one, combobox selection."""
+        if self._list_result is None or self._list_result.search_text != self._search_text:
+            return False
+        return bool(self._search_text) or self._list_result.filters == self._current_filter_codes()
+
+    def _current_filter_codes(self):
+        """Returns the combobox selections as db_manager filter arguments ("Все..." -> None)."""
         category_code = self._get_code_from_display_text(self.category_code_var.get())
         series_code = self._get_code_from_display_text(self.series_code_var.get())
         item_number_code = self._get_code_from_display_text(self.item_number_code_var.get())
@@ -761,41 +899,107 @@ class FixtureApp(ctk.CTk):
         if "Все операции" in self.operation_code_var.get():
             operation_code = None
 
-        self.load_fixtures_to_list(
-            category_code=category_code,
-            series_code=series_code,
-            item_number_code=item_number_code,
-            operation_code=operation_code
-        )
+        return {
+            'category_code': category_code,
+            'series_code': series_code,
+            'item_number_code': item_number_code,
+            'operation_code': operation_code,
+        }
 
-    def load_fixtures_to_list(self, category_code=None, series_code=None, item_number_code=None, operation_code=None):
-        """Загружает и отображает список оснасток в Treeview, с сортировкой и фильтрацией."""
-        # Clear existing items in Treeview
-        for item in self.fixture_list_tree.get_children():
-            self.fixture_list_tree.delete(item)
-
-        all_fixtures = self.db_manager.get_fixture_ids_with_descriptions(
-            category_code=category_code,
-            series_code=series_code,
-            item_number_code=item_number_code,
-            operation_code=operation_code
-        )
+    def _schedule_refresh(self, fixture_list=True, fixture_numbers=False):
+        """
+        Marks the fixture list and/or the TT combobox dirty. However many handlers of one user action
+        (e.g. category -> series -> item cascade) call this, a single after_idle pass refreshes each once.
+        """
+        self._dirty_fixture_list = self._dirty_fixture_list or fixture_list
+        self._dirty_fixture_numbers = self._dirty_fixture_numbers or fixture_numbers
+        if self._refresh_job is None:
+            self._refresh_job = self.after_idle(self._run_scheduled_refresh)
+
+    def _run_scheduled_refresh(self):
+        self._refresh_job = None
+        if self._dirty_fixture_numbers:
+            self._dirty_fixture_numbers = False
+            self.update_fixture_number_combobox()
+        if self._dirty_fixture_list:
+            self._dirty_fixture_list = False
+            self._refresh_fixture_list_with_current_selection()
 
-        # Apply "hide assembled parts" filter
-        if self.hide_assembled_parts_var.get():
-            all_fixtures = [f for f in all_fixtures if f.get('PartInAssembly') == '01']
+    def _refresh_fixture_list_with_current_selection(self):
+        """
+        Reloads the fixture list for the current search text or, without one, combobox selections. The query runs
+        on the query worker after a short debounce, so a burst of selection events or keystrokes results in
+        a single query.
+        """
+        filters = self._current_filter_codes()
+        search_text = self._search_text
+        self.query_executor.submit(
+            "fixture_list",
+            lambda: self._query_fixture_list(filters, search_text),
+            self._on_fixture_list_loaded,
+            debounce_ms=query_executor.DEFAULT_DEBOUNCE_MS)
+
+    def _query_fixture_list(self, filters, search_text=""):
+        """
+        Reads the fixture list for a hierarchy selection in columnar form: ids in display order (actual
+        versions first, then older ones, each by FullIDString) with actual/BB flags for the checkbox filters.
+        With search_text, reads the ranked search results over all fixtures instead (the comboboxes do not apply).
+        Touches only the DB, so it can run on the query worker thread.
+        """
+        if search_text:
+            return fixture_list_result.FixtureListResult(
+                {}, *self.db_manager.search_fixture_list_columns(search_text), search_text=search_text)
+        return fixture_list_result.FixtureListResult(filters, *self.db_manager.get_fixture_list_columns(**filters))
+
+    def _on_fixture_list_loaded(self, list_result):
+        self._list_result = list_result
+        self._apply_fixture_list_filters()
+
+    def _apply_fixture_list_filters(self):
+        """Applies the checkbox filters to the loaded result in memory and shows the rows that pass."""
+        required_flags = fixture_list_result.FixtureListResult.required_flags(
+            self.hide_non_actual_versions_var.get(), self.hide_assembled_parts_var.get())
+        self._show_fixture_list(self._list_result.select(required_flags), required_flags,
+                                search_text=self._list_result.search_text, **self._list_result.filters)
+
+    def _show_fixture_list(self, list_ids, required_flags, category_code=None, series_code=None,
+                           item_number_code=None, operation_code=None, search_text=""):
+        """
+        Shows the fixture list (ids in display order that pass required_flags) and the filters or the search
+        text in the list label.
+        The list stays scrolled to the first previously visible fixture that is still in it; otherwise (and for
+        a new search, whose best matches are at the top) it starts from the top.
+        """
+        visible_ids = []
+        if self._list_window_ids and search_text == self._list_search_text:
+            first, _ = self.fixture_list_tree.yview()
+            top_index = int(first * len(self._list_window_ids))
+            visible_ids = self._list_window_ids[top_index:top_index + self._visible_list_rows()]
+        self._list_ids = list_ids
+        self._list_required_flags = required_flags
+        self._list_search_text = search_text
+        top_row = next((list_ids.index(fixture_id) for fixture_id in visible_ids
+                        if self._is_in_fixture_list(fixture_id)), 0)
 
         filter_display_parts = []
         if category_code:
-            filter_display_parts.append(f"категории '{self._get_name_from_code(category_code, 'category')}'")
+            filter_display_parts.append(f"категории '{self._get_name_from_code((category_code,), 'category')}'")
         if series_code:
-            filter_display_parts.append(f"серии '{self._get_name_from_code(series_code, 'series')}'")
+            filter_display_parts.append(
+                f"серии '{self._get_name_from_code((category_code, series_code), 'series')}'")
         if item_number_code:
-            filter_display_parts.append(f"изделия '{self._get_name_from_code(item_number_code, 'item_number')}'")
+            filter_display_parts.append(
+                f"изделия '{self._get_name_from_code((category_code, series_code, item_number_code), 'item_number')}'")
         if operation_code:
-            filter_display_parts.append(f"операции '{self._get_name_from_code(operation_code, 'operation')}'")
-
-        if filter_display_parts:
+            filter_display_parts.append(f"операции '{self._get_name_from_code((operation_code,), 'operation')}'")
+
+        if search_text:
+            # search_fixture_list_columns returns at most SEARCH_RESULT_LIMIT best matches
+            limit_note = ""
+            if len(self._list_result.ids) >= self.db_manager.SEARCH_RESULT_LIMIT:
+                limit_note = f" (первые {self.db_manager.SEARCH_RESULT_LIMIT} совпадений, уточните запрос)"
+            self.list_label.configure(text=f"Результаты поиска '{search_text}' по всем оснасткам{limit_note}:")
+        elif filter_display_parts:
             self.list_label.configure(text=f"Список оснасток для {', '.join(filter_display_parts)}:")
         else:
             self.list_label.configure(text="Список существующих оснасток (все):")
@@ -811,8 +1015,16 @@ class FixtureApp(ctk.CTk):
             self.list_label.configure(
                 text=self.list_label.cget("text") + f" (Фильтры: {', '.join(filter_status_parts)})")
 
-        if not all_fixtures:
-            if filter_display_parts:
+        if not list_ids:
+            for item in self.fixture_list_tree.get_children():
+                self.fixture_list_tree.delete(item)
+            self._list_window_start = 0
+            self._list_window_ids = []
+            self._list_window_values = {}
+            if search_text:
+                self.fixture_list_tree.insert("", "end", values=[f"По запросу '{search_text}' оснасток не найдено."],
+                                              tags=('no_data',))
+            elif filter_display_parts:
                 self.fixture_list_tree.insert("", "end", values=[
                     f"Оснасток для {', '.join(filter_display_parts)} не существует в БД."], tags=('no_data',))
             else:
@@ -820,98 +1032,137 @@ class FixtureApp(ctk.CTk):
             self.fixture_list_tree.tag_configure('no_data', foreground='gray')
             return
 
-        # Group fixtures by their assembly base (KKK.SNN.DTT.AA)
-        assembly_groups = {}
-        for fixture in all_fixtures:
-            assembly_base_key = (
-                fixture['Category'],
-                fixture['Series'],
-                fixture['ItemNumber'],
-                fixture['Operation'],
-                fixture['FixtureNumber'],
-                fixture['UniqueParts']
-            )
-            if assembly_base_key not in assembly_groups:
-                assembly_groups[assembly_base_key] = []
-            assembly_groups[assembly_base_key].append(fixture)
+        self._show_list_window(top_row)
+
+    def _fixture_list_values(self, fixture):
+        """Treeview column values for a fixture row."""
+        category_display = fixture.get('CategoryName', fixture.get('Category', ''))
+        series_display = fixture.get('SeriesName', fixture.get('Series', ''))
+        item_display = fixture.get('ItemNumberName', fixture.get('ItemNumber', ''))
+        operation_display = fixture.get('OperationName', fixture.get('Operation', ''))
+
+        fixture_number = fixture.get('FixtureNumber', '')
+        unique_parts = fixture.get('UniqueParts', '')
+        part_in_assembly = fixture.get('PartInAssembly', '')
+        part_quantity = fixture.get('PartQuantity', '')
+        assembly_version_code = fixture.get('AssemblyVersionCode', '')
+        intermediate_version = fixture.get('IntermediateVersion', '')
+        full_id_string_display = fixture.get('FullIDString', '')
+
+        combined_version_vvw = f"{assembly_version_code}{intermediate_version}"
+
+        return (
+            category_display,
+            series_display,
+            item_display,
+            operation_display,
+            fixture_number,
+            unique_parts,
+            part_in_assembly,
+            part_quantity,
+            combined_version_vvw,
+            full_id_string_display
+        )
 
-        actual_fixtures = []
-        non_actual_fixtures = []
+    def _visible_list_rows(self):
+        return max(10, self.fixture_list_tree.winfo_height() // self.LIST_ROW_HEIGHT)
 
-        for group_key, fixtures_in_group in assembly_groups.items():
-            if not fixtures_in_group:
+    def _show_list_window(self, top_row):
+        """
+        Loads the window of rows around list position top_row into the Treeview (rows are read by id)
+        and scrolls it so that top_row is the first visible row. The Treeview is diffed against the new
+        window by iid: only rows that left it are deleted, only new ones inserted, and only moved or
+        changed rows touched, so the selected fixture stays selected.
+        """
+        window_size = self._visible_list_rows() + 2 * self.LIST_WINDOW_MARGIN
+        start = max(0, min(top_row - self.LIST_WINDOW_MARGIN, len(self._list_ids) - window_size))
+        window_ids = self._list_ids[start:start + window_size]
+        fixtures = self.db_manager.get_fixtures_with_descriptions_by_ids(window_ids)
+        # Deleted since the list was queried
+        window_ids = [fixture_id for fixture_id in window_ids if fixture_id in fixtures]
+
+        tree = self.fixture_list_tree
+        window_iids = {str(fixture_id) for fixture_id in window_ids}
+        stale_iids = [iid for iid in tree.get_children() if iid not in window_iids]
+        if stale_iids:
+            tree.delete(*stale_iids)
+        window_values = {}
+        children = list(tree.get_children())
+        for index, fixture_id in enumerate(window_ids):
+            iid = str(fixture_id)
+            values = self._fixture_list_values(fixtures[fixture_id])
+            window_values[iid] = values
+            if index < len(children) and children[index] == iid:
+                pass
+            elif iid in self._list_window_values:
+                tree.move(iid, "", index)
+                children.remove(iid)
+                children.insert(index, iid)
+            else:
+                tree.insert("", index, iid=iid, values=values)  # Use database ID as Treeview item ID
+                children.insert(index, iid)
                 continue
-
-            # Define a key for sorting to find the absolute latest version string
-            def get_version_string_for_sort(f):
-                vv_code = f['AssemblyVersionCode']
-                w_code = f['IntermediateVersion'] if f['IntermediateVersion'] else ''
-                return f"{vv_code}{w_code}"
-
-            # Find the maximum version string in the group
-            # This will correctly identify the "latest" version string (e.g., "02A" > "01Z")
-            # based on lexicographical comparison, which aligns with the is_version_newer logic.
-            latest_version_in_group_str = ""
-            if fixtures_in_group:
-                # Initialize with the version string of the first fixture
-                latest_version_in_group_str = get_version_string_for_sort(fixtures_in_group[0])
-                for i in range(1, len(fixtures_in_group)):
-                    current_v_str = get_version_string_for_sort(fixtures_in_group[i])
-                    # Use db_manager.is_version_newer to compare, ensuring 'X' versions are handled
-                    if self.db_manager.is_version_newer(latest_version_in_group_str, current_v_str):
-                        latest_version_in_group_str = current_v_str
-                    elif current_v_str == latest_version_in_group_str:
-                        # If versions are equal, it's also considered latest, no change to latest_version_in_group_str
-                        pass
-                    # If current_v_str is older, latest_version_in_group_str remains unchanged
-
-            # Now, iterate through the group and categorize based on this latest version string
-            for fixture in fixtures_in_group:
-                current_fixture_version_string = get_version_string_for_sort(fixture)
-                if current_fixture_version_string == latest_version_in_group_str:
-                    actual_fixtures.append(fixture)
-                else:
-                    non_actual_fixtures.append(fixture)
-
-        # Sort both lists alphabetically by FullIDString for consistent display order
-        actual_fixtures.sort(key=lambda x: x['FullIDString'])
-        non_actual_fixtures.sort(key=lambda x: x['FullIDString'])
-
-        # Conditionally combine for display based on checkbox state
-        if self.hide_non_actual_versions_var.get():
-            sorted_fixtures_for_display = actual_fixtures
+            if self._list_window_values[iid] != values:
+                tree.item(iid, values=values)
+        self._list_window_start = start
+        self._list_window_ids = window_ids
+        self._list_window_values = window_values
+
+        if self._list_window_ids:
+            self.fixture_list_tree.yview_moveto((top_row - start) / len(self._list_window_ids))
+        if self.selected_fixture_id_in_list is not None and self.fixture_list_tree.exists(
+                self.selected_fixture_id_in_list):
+            self.fixture_list_tree.selection_set(self.selected_fixture_id_in_list)
+            self.fixture_list_tree.focus(self.selected_fixture_id_in_list)
+
+    def _on_fixture_list_yview(self, first, last):
+        """
+        Treeview yscrollcommand: shows the window position on the scrollbar in whole-list terms and,
+        when the view gets close to an edge of the loaded window, moves the window (after idle).
+        """
+        total = len(self._list_ids)
+        window_len = len(self._list_window_ids)
+        if not window_len:
+            self.tree_scrollbar_y.set(first, last)
+            return
+        start = self._list_window_start
+        top = float(first) * window_len
+        bottom = float(last) * window_len
+        self.tree_scrollbar_y.set((start + top) / total, (start + bottom) / total)
+
+        near_top = start > 0 and top < self.LIST_WINDOW_MARGIN / 2
+        near_bottom = start + window_len < total and bottom > window_len - self.LIST_WINDOW_MARGIN / 2
+        if (near_top or near_bottom) and not self._list_recenter_pending:
+            self._list_recenter_pending = True
+            self.after_idle(self._recenter_list_window)
+
+    def _recenter_list_window(self):
+        self._list_recenter_pending = False
+        if self._list_window_ids:
+            first, _ = self.fixture_list_tree.yview()
+            self._show_list_window(self._list_window_start + int(round(first * len(self._list_window_ids))))
+
+    def _on_fixture_list_scrollbar(self, *args):
+        """Scrollbar command in whole-list terms: scrolls within the loaded window or loads the target window."""
+        total = len(self._list_ids)
+        window_len = len(self._list_window_ids)
+        if args[0] != "moveto" or not window_len:
+            self.fixture_list_tree.yview(*args)
+            return
+        top_row = max(0, min(int(float(args[1]) * total), total - 1))
+        start = self._list_window_start
+        if start <= top_row and top_row + self._visible_list_rows() <= start + window_len:
+            self.fixture_list_tree.yview_moveto((top_row - start) / window_len)
         else:
-            sorted_fixtures_for_display = actual_fixtures + non_actual_fixtures
-
-        for fixture in sorted_fixtures_for_display:
-            category_display = fixture.get('CategoryName', fixture.get('Category', ''))
-            series_display = fixture.get('SeriesName', fixture.get('Series', ''))
-            item_display = fixture.get('ItemNumberName', fixture.get('ItemNumber', ''))
-            operation_display = fixture.get('OperationName', fixture.get('Operation', ''))
-
-            fixture_number = fixture.get('FixtureNumber', '')
-            unique_parts = fixture.get('UniqueParts', '')
-            part_in_assembly = fixture.get('PartInAssembly', '')
-            part_quantity = fixture.get('PartQuantity', '')
-            assembly_version_code = fixture.get('AssemblyVersionCode', '')
-            intermediate_version = fixture.get('IntermediateVersion', '')
-            full_id_string_display = fixture.get('FullIDString', '')
-
-            combined_version_vvw = f"{assembly_version_code}{intermediate_version}"
-
-            self.fixture_list_tree.insert("", "end", iid=fixture['id'],  # Use database ID as Treeview item ID
-                                          values=(
-                                              category_display,
-                                              series_display,
-                                              item_display,
-                                              operation_display,
-                                              fixture_number,
-                                              unique_parts,
-                                              part_in_assembly,
-                                              part_quantity,
-                                              combined_version_vvw,
-                                              full_id_string_display
-                                          ))
+            self._show_list_window(top_row)
+
+    def _is_in_fixture_list(self, fixture_id):
+        """Whether the fixture (Treeview iid or DB id) is in the current list result, loaded or not."""
+        try:
+            fixture_id = int(fixture_id)
+        except ValueError:
+            return False
+        return self._list_result is not None and self._list_result.contains(fixture_id, self._list_required_flags)
 
     def _get_code_from_display_text(self, display_text):
         """Извлекает код из строки вида 'CODE (Description)' или возвращает None, если это заглушка 'Все...'."""
@@ -923,25 +1174,10 @@ class FixtureApp(ctk.CTk):
             return match.group(1)
         return display_text
 
-    def _get_name_from_code(self, code, type_of_code):
-        """Возвращает имя по коду из соответствующего словаря данных."""
-        if type_of_code == 'category':
-            for item in self.categories_data:
-                if item['CategoryCode'] == code:
-                    return item['CategoryName']
-        elif type_of_code == 'series':
-            for item in self.series_data:
-                if item['SeriesCode'] == code:
-                    return item['SeriesName']
-        elif type_of_code == 'item_number':
-            for item in self.items_data:
-                if item['ItemNumberCode'] == code:
-                    return item['ItemNumberName']
-        elif type_of_code == 'operation':
-            for item in self.operations_data:
-                if item['OperationCode'] == code:
-                    return item['OperationName']
-        return code
+    def _get_name_from_code(self, codes, type_of_code):
+        """Возвращает имя по кортежу кодов (категория, серия, изделие / операция) из кэша классификатора или последний код."""
+        name = self.classifier_cache.get_name(type_of_code, codes)
+        return name if name is not None else codes[-1]
 
     def validate_aa_bb_input(self, event=None):
         aa_str = self.unique_parts_aa_var.get().upper()
@@ -1031,77 +1267,224 @@ class FixtureApp(ctk.CTk):
         self.set_status("Поле W валидно.", is_error=False)
         return True
 
-    def import_excel_data_command(self):
+    def _show_import_report(self, import_result, unchanged_sheets, source_label="Excel"):
+        """Shows the import report dialog (or the error) and reloads the comboboxes and list after success."""
+        success, added_counts, updated_counts, skipped_counts, missing_from_excel_data = import_result
+        if success:
+            report_message = f"Импорт данных из {source_label} завершен успешно.\n\n"
+            if unchanged_sheets:
+                report_message += ("Не изменились с последнего импорта (пропущены): "
+                                   + ", ".join(unchanged_sheets) + "\n\n")
+
+            added_summary = []
+            for sheet_name, count in added_counts.items():
+                if count > 0:
+                    added_summary.append(f"  {sheet_name}: {count} новых записей")
+            if added_summary:
+                report_message += "Добавлено:\n" + "\n".join(added_summary) + "\n\n"
+            else:
+                report_message += "Новых записей не добавлено.\n\n"
+
+            updated_summary = []
+            for sheet_name, count in updated_counts.items():
+                if count > 0:
+                    updated_summary.append(f"  {sheet_name}: {count} обновленных записей")
+            if updated_summary:
+                report_message += "Обновлено:\n" + "\n".join(updated_summary) + "\n\n"
+            else:
+                report_message += "Записей не обновлено.\n\n"
+
+            missing_summary = []
+            for sheet_name, items in missing_from_excel_data.items():
+                if items:
+                    missing_summary.append(f"  {sheet_name}: {len(items)} записей отсутствуют в {source_label}:")
+                    for item in items:
+                        if sheet_name == "Категории":
+                            missing_summary.append(
+                                f"    {item.get('CategoryCode', 'N/A')} ({item.get('CategoryName', 'N/A')})")
+                        elif sheet_name == "Серии":
+                            missing_summary.append(
+                                f"    {item.get('CategoryCode', 'N/A')}-{item.get('SeriesCode', 'N/A')} ({item.get('SeriesName', 'N/A')})")
+                        elif sheet_name == "Изделия":
+                            missing_summary.append(
+                                f"    {item.get('CategoryCode', 'N/A')}-{item.get('SeriesCode', 'N/A')}-{item.get('ItemNumberCode', 'N/A')} ({item.get('ItemNumberName', 'N/A')})")
+                        elif sheet_name == "Операции":
+                            missing_summary.append(
+                                f"    {item.get('OperationCode', 'N/A')} ({item.get('OperationName', 'N/A')})")
+                        else:
+                            missing_summary.append(f"    {item}")
+            if missing_summary:
+                report_message += f"Записи в базе данных, отсутствующие в {source_label}:\n" + "\n".join(missing_summary)
+            else:
+                report_message += f"Все записи из базы данных найдены в {source_label}."
+
+            self.set_status("Импорт завершен. Подробности в отчете.", is_error=False)
+            messagebox.showinfo(f"Отчет по импорту {source_label}", report_message)
+
+            self.classifier_cache.refresh(force=True)
+            self.load_all_combobox_data()  # Reload data and reset comboboxes to placeholders
+            self._schedule_refresh()
+        else:
+            self.set_status(f"Ошибка при импорте данных из {source_label}. Проверьте консоль.", is_error=True)
+            messagebox.showerror("Ошибка импорта",
+                                 f"Произошла ошибка при импорте данных из {source_label}. Проверьте консоль для деталей.")
+
+    def _set_import_running(self, running):
+        """Swaps the import buttons for the cancel button while a background import is running."""
+        if running:
+            self.import_excel_button.grid_remove()
+            self.import_text_button.grid_remove()
+            self.cancel_import_button.configure(state="normal")
+            self.cancel_import_button.grid()
+        else:
+            self.cancel_import_button.grid_remove()
+            self.import_excel_button.grid()
+            self.import_text_button.grid()
+
+    def _run_import_in_background(self, importer, run_import, source_label, is_all_unchanged, unchanged_prompt,
+                                  force=False):
         """
-        Обрабатывает интеллектуальный импорт данных из Excel в БД по нажатию кнопки.
-        Не удаляет существующую БД, а добавляет новые данные и сообщает об отсутствующих.
+        Runs run_import(force, progress_callback, cancel_event) in a worker thread with its own DB connection,
+        so the window stays responsive. Progress messages come back through a queue polled with after();
+        the report dialog and the combobox reload happen once, on the main thread, when the import finishes.
+        If everything was unchanged, unchanged_prompt asks whether to re-import with force; None skips quietly.
         """
-        self.set_status("Начинается интеллектуальный импорт данных из Excel...", is_error=False)
+        messages = queue.Queue()
+        self._import_cancel_event = threading.Event()
 
+        def worker():
+            try:
+                import_result = run_import(force, lambda message: messages.put(("progress", message)),
+                                           self._import_cancel_event)
+                messages.put(("done", import_result))
+            except Exception as e:
+                messages.put(("error", e))
+            finally:
+                self.db_manager.close_thread_connection()
+
+        def poll_messages():
+            progress_message = None
+            try:
+                while True:
+                    kind, payload = messages.get_nowait()
+                    if kind == "progress":
+                        progress_message = payload  # Only the latest progress message is worth showing
+                        continue
+                    self._import_thread = None
+                    self._set_import_running(False)
+                    finish(kind, payload)
+                    return
+            except queue.Empty:
+                pass
+            if progress_message is not None:
+                self.set_status(progress_message, is_error=False)
+            self.after(100, poll_messages)
+
+        def finish(kind, payload):
+            if kind == "error":
+                self.set_status(f"Критическая ошибка при импорте: {payload}", is_error=True)
+                messagebox.showerror("Критическая ошибка импорта",
+                                     f"Произошла критическая ошибка при импорте: {payload}")
+            elif importer.cancelled:
+                self.set_status("Импорт отменен, изменения не сохранены.", is_error=False)
+            elif payload[0] and is_all_unchanged():
+                if unchanged_prompt and messagebox.askyesno(f"Импорт из {source_label}", unchanged_prompt):
+                    self._run_import_in_background(importer, run_import, source_label, is_all_unchanged,
+                                                   unchanged_prompt, force=True)
+                else:
+                    self.set_status(f"Данные {source_label} не изменились с последнего импорта. Импорт пропущен.",
+                                    is_error=False)
+            else:
+                self._show_import_report(payload, importer.unchanged_sheets, source_label=source_label)
+
+        self.set_status(f"Начинается импорт данных из {source_label}...", is_error=False)
+        self._set_import_running(True)
+        self._import_thread = threading.Thread(target=worker, daemon=True)
+        self._import_thread.start()
+        self.after(100, poll_messages)
+
+    def cancel_import_command(self):
+        """Requests cancellation; the importer stops at its next progress point and rolls back its transaction."""
+        if self._import_thread is not None:
+            self._import_cancel_event.set()
+            self.cancel_import_button.configure(state="disabled")
+            self.set_status("Отмена импорта...", is_error=False)
+
+    def import_excel_data_command(self, on_startup=False):
+        """
+        Обрабатывает интеллектуальный импорт данных из Excel в БД по нажатию кнопки (в фоновом потоке).
+        Не удаляет существующую БД, а добавляет новые данные и сообщает об отсутствующих.
+        on_startup - импорт измененного файла при запуске: для неизмененного файла повторный импорт не предлагается.
+        """
         excel_file_path = "classifier_data.xlsx"
         importer = excel_importer.ExcelClassifierImporter(self.db_manager)
+        self._run_import_in_background(
+            importer,
+            lambda force, progress_callback, cancel_event: importer.import_from_excel(
+                excel_file_path, force=force, progress_callback=progress_callback, cancel_event=cancel_event),
+            "Excel",
+            lambda: len(importer.unchanged_sheets) == len(importer.sheet_configs),
+            None if on_startup else
+            f"Файл '{excel_file_path}' не изменился с последнего импорта.\nВыполнить полный импорт повторно?")
+
+    def import_text_files_command(self):
+        """
+        Импорт классификатора из выгрузки CSV/TSV: выбирается папка с файлами по листам
+        (Категории.csv, Серии.csv, Изделия.csv, Операции.csv). Отчет - как при импорте из Excel.
+        """
+        directory = filedialog.askdirectory(title="Папка с выгрузкой классификатора (CSV/TSV)")
+        if not directory:
+            return
+
+        importer = excel_importer.ExcelClassifierImporter(self.db_manager)
+        text_files = importer.find_text_files(directory)
+        if not text_files:
+            self.set_status("В выбранной папке нет файлов классификатора CSV/TSV.", is_error=True)
+            messagebox.showerror("Ошибка импорта",
+                                 "В папке не найдены файлы с именами листов: "
+                                 + ", ".join(f"{sheet_name}.csv" for sheet_name in importer.sheet_configs.keys()))
+            return
 
-        try:
-            success, added_counts, updated_counts, skipped_counts, missing_from_excel_data = importer.import_from_excel(
-                excel_file_path)
-
-            if success:
-                report_message = "Импорт данных из Excel завершен успешно.\n\n"
-
-                added_summary = []
-                for sheet_name, count in added_counts.items():
-                    if count > 0:
-                        added_summary.append(f"  {sheet_name}: {count} новых записей")
-                if added_summary:
-                    report_message += "Добавлено:\n" + "\n".join(added_summary) + "\n\n"
-                else:
-                    report_message += "Новых записей не добавлено.\n\n"
-
-                updated_summary = []
-                for sheet_name, count in updated_counts.items():
-                    if count > 0:
-                        updated_summary.append(f"  {sheet_name}: {count} обновленных записей")
-                if updated_summary:
-                    report_message += "Обновлено:\n" + "\n".join(updated_summary) + "\n\n"
-                else:
-                    report_message += "Записей не обновлено.\n\n"
-
-                missing_summary = []
-                for sheet_name, items in missing_from_excel_data.items():
-                    if items:
-                        missing_summary.append(f"  {sheet_name}: {len(items)} записей отсутствуют в Excel:")
-                        for item in items:
-                            if sheet_name == "Категории":
-                                missing_summary.append(
-                                    f"    {item.get('CategoryCode', 'N/A')} ({item.get('CategoryName', 'N/A')})")
-                            elif sheet_name == "Серии":
-                                missing_summary.append(
-                                    f"    {item.get('CategoryCode', 'N/A')}-{item.get('SeriesCode', 'N/A')} ({item.get('SeriesName', 'N/A')})")
-                            elif sheet_name == "Изделия":
-                                missing_summary.append(
-                                    f"    {item.get('CategoryCode', 'N/A')}-{item.get('SeriesCode', 'N/A')}-{item.get('ItemNumberCode', 'N/A')} ({item.get('ItemNumberName', 'N/A')})")
-                            elif sheet_name == "Операции":
-                                missing_summary.append(
-                                    f"    {item.get('OperationCode', 'N/A')} ({item.get('OperationName', 'N/A')})")
-                            else:
-                                missing_summary.append(f"    {item}")
-                if missing_summary:
-                    report_message += "Записи в базе данных, отсутствующие в Excel:\n" + "\n".join(missing_summary)
-                else:
-                    report_message += "Все записи из базы данных найдены в Excel."
+        self._run_import_in_background(
+            importer,
+            lambda force, progress_callback, cancel_event: importer.import_from_text_files(
+                text_files, force=force, progress_callback=progress_callback, cancel_event=cancel_event),
+            "CSV/TSV",
+            lambda: len(importer.unchanged_sheets) == len(text_files),
+            "Файлы не изменились с последнего импорта.\nВыполнить полный импорт повторно?")
 
-                self.set_status("Импорт завершен. Подробности в отчете.", is_error=False)
-                messagebox.showinfo("Отчет по импорту Excel", report_message)
+    def export_fixtures_command(self):
+        """
+        Exports the fixtures shown in the list - the current search results or, without a search, the combobox
+        filters - honouring the "hide non-actual" option, to xlsx/CSV. The export runs on the query worker,
+        so the window stays responsive.
+        """
+        file_path = filedialog.asksaveasfilename(
+            title="Выгрузка реестра оснасток",
+            defaultextension=".xlsx",
+            filetypes=[("Excel", "*.xlsx"), ("CSV", "*.csv"), ("TSV", "*.tsv")]
+        )
+        if not file_path:
+            return
 
-                self.load_all_combobox_data()  # Reload data and reset comboboxes to placeholders
-                self._refresh_fixture_list_with_current_selection()
-            else:
-                self.set_status("Ошибка при импорте данных из Excel. Проверьте консоль.", is_error=True)
-                messagebox.showerror("Ошибка импорта",
-                                     "Произошла ошибка при импорте данных из Excel. Проверьте консоль для деталей.")
-        except Exception as e:
-            self.set_status(f"Критическая ошибка при импорте: {e}", is_error=True)
-            messagebox.showerror("Критическая ошибка импорта", f"Произошла критическая ошибка при импорте: {e}")
+        search_text = self._search_text
+        filters = {} if search_text else self._current_filter_codes()
+        only_actual = self.hide_non_actual_versions_var.get()
+        exporter = fixture_exporter.FixtureExporter(self.db_manager)
+        self.set_status("Выгрузка реестра оснасток...", is_error=False)
+        self.query_executor.submit(
+            "export",
+            lambda: exporter.export(file_path, only_actual=only_actual, search_text=search_text, **filters),
+            lambda export_result: self._on_fixtures_exported(file_path, export_result))
+
+    def _on_fixtures_exported(self, file_path, export_result):
+        """Reports the result of export_fixtures_command (Tk thread)."""
+        success, rows_count = export_result
+        if success:
+            self.set_status(f"Выгружено оснасток: {rows_count} в '{file_path}'.", is_error=False)
+        else:
+            self.set_status("Ошибка при выгрузке реестра оснасток. Проверьте консоль.", is_error=True)
+            messagebox.showerror("Ошибка выгрузки", f"Не удалось выгрузить реестр оснасток в '{file_path}'.")
 
     def delete_fixture_command(self):
         """Deletes the selected fixture from the database and its associated folder."""
@@ -1128,8 +1511,7 @@ class FixtureApp(ctk.CTk):
                                 is_error=False)
                 self.selected_fixture_id_in_list = None
                 # self.fixture_list_textbox.tag_remove("highlight", "1.0", "end") # No longer needed
-                self._refresh_fixture_list_with_current_selection()
-                self.update_fixture_number_combobox()
+                self._schedule_refresh(fixture_numbers=True)
             else:
                 self.set_status(
                     f"Не удалось удалить оснастку ID {self.selected_fixture_id_in_list}. Проверьте консоль.",
@@ -1138,6 +1520,15 @@ class FixtureApp(ctk.CTk):
             self.set_status("Удаление отменено.")
 
     def on_closing(self):
+        if self._import_thread is not None:
+            # Let a running import roll back and release its connection before the DB is closed;
+            # the window is destroyed only after the thread has finished
+            self._import_cancel_event.set()
+            self._import_thread.join()
+            self._import_thread = None
+        if self._refresh_job is not None:
+            self.after_cancel(self._refresh_job)
+        self.query_executor.close()
         self.db_manager.close()
         self.destroy()
 
@@ -0,0 +1,138 @@
+import queue
+import threading
+
+# Пауза после последнего события выбора, после которой запрос отправляется в работу (мс)
+DEFAULT_DEBOUNCE_MS = 150
+# Период опроса очереди результатов из потока Tk (мс, ~60 кадров/с)
+POLL_INTERVAL_MS = 16
+
+
+class QueryExecutor:
+    """
+    Выполняет запросы к БД для FixtureApp в одном рабочем потоке, чтобы поток Tk не блокировался.
+    Запросы отправляются по каналам ("series", "fixture_list", ...): в каждом канале важен только
+    последний запрос. Более старые запросы канала не выполняются, если еще не начаты, а их результаты
+    отбрасываются. Обработчик результата вызывается в потоке Tk через after().
+    Рабочий поток использует собственное соединение FixtureDBManager (см. FixtureDBManager.conn).
+    """
+
+    def __init__(self, tk_widget, db_manager_instance):
+        self.tk_widget = tk_widget
+        self.db_manager = db_manager_instance
+        self._generations = {}  # channel -> generation of the latest submitted query
+        self._debounce_jobs = {}  # channel -> pending after() id
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._pending_count = 0
+        self.executed_counts = {}  # channel -> queries actually run by the worker (stale ones skipped are not counted)
+        self._poll_job = None
+        self._worker = threading.Thread(target=self._run_worker, name="QueryExecutor", daemon=True)
+        self._worker.start()
+
+    def submit(self, channel, query, on_result, debounce_ms=0):
+        """
+        Ставит query() в очередь рабочего потока. on_result(результат) вызывается в потоке Tk,
+        только если за это время в канал не был отправлен более новый запрос.
+        debounce_ms > 0: запрос отправляется после паузы, и серия вызовов за это время дает один запрос.
+        Если query() выбрасывает исключение, оно печатается, а on_result не вызывается;
+        исключение из on_result тоже только печатается.
+        """
+        self.cancel(channel)
+        generation = self._generations[channel]
+        if debounce_ms > 0:
+            self._debounce_jobs[channel] = self.tk_widget.after(
+                debounce_ms, lambda: self._enqueue(channel, generation, query, on_result))
+        else:
+            self._enqueue(channel, generation, query, on_result)
+
+    def cancel(self, channel):
+        """Отменяет отложенный запрос канала; результат уже выполняемого будет отброшен."""
+        self._generations[channel] = self._generations.get(channel, 0) + 1
+        pending_job = self._debounce_jobs.pop(channel, None)
+        if pending_job is not None:
+            self.tk_widget.after_cancel(pending_job)
+
+    def _is_current(self, channel, generation):
+        return self._generations.get(channel) == generation
+
+    def _enqueue(self, channel, generation, query, on_result):
+        self._debounce_jobs.pop(channel, None)
+        self._pending_count += 1
+        self._jobs.put((channel, generation, query, on_result))
+        if self._poll_job is None:
+            self._poll_job = self.tk_widget.after(POLL_INTERVAL_MS, self._poll_results)
+
+    def _run_worker(self):
+        try:
+            while True:
+                job = self._jobs.get()
+                if job is None:
+                    return
+                channel, generation, query, on_result = job
+                # Superseded before it started: skip the query entirely
+                if not self._is_current(channel, generation):
+                    self._results.put((channel, generation, None, None))
+                    continue
+                self.executed_counts[channel] = self.executed_counts.get(channel, 0) + 1
+                try:
+                    result = query()
+                except Exception as e:
+                    print(f"Ошибка при выполнении запроса '{channel}': {e}")
+                    self._results.put((channel, generation, None, None))
+                    continue
+                self._results.put((channel, generation, result, on_result))
+        finally:
+            self.db_manager.close_thread_connection()
+
+    def _poll_results(self):
+        """Runs on the Tk thread: delivers results that are still current, drops stale ones."""
+        self._poll_job = None
+        try:
+            while True:
+                channel, generation, result, on_result = self._results.get_nowait()
+                self._pending_count -= 1
+                if on_result is not None and self._is_current(channel, generation):
+                    # A failing handler must not stop delivery of the other results or the polling itself
+                    try:
+                        on_result(result)
+                    except Exception as e:
+                        print(f"Ошибка при обработке результата запроса '{channel}': {e}")
+        except queue.Empty:
+            pass
+        # Poll only while queries are in flight, so an idle window does not wake up every frame
+        if self._pending_count > 0 and self._poll_job is None:
+            self._poll_job = self.tk_widget.after(POLL_INTERVAL_MS, self._poll_results)
+
+    def close(self):
+        """Отменяет отложенные запросы и останавливает рабочий поток (дожидается текущего запроса)."""
+        for pending_job in self._debounce_jobs.values():
+            self.tk_widget.after_cancel(pending_job)
+        self._debounce_jobs.clear()
+        if self._poll_job is not None:
+            self.tk_widget.after_cancel(self._poll_job)
+            self._poll_job = None
+        # Nothing queued is current any more, so the worker skips it and reaches the stop marker quickly
+        self._generations.clear()
+        self._jobs.put(None)
+        self._worker.join()
+
+
+# Example usage for testing (can be removed in final version)
+if __name__ == "__main__":
+    import tkinter as tk
+    from db_manager import FixtureDBManager
+
+    root = tk.Tk()
+    db_manager = FixtureDBManager(db_name="my_fixtures_app_test.db", base_db_dir="fixture_database_root_app_test")
+    executor = QueryExecutor(root, db_manager)
+
+    # Five quick "selections": only the last query result is delivered
+    for category in db_manager.get_categories()[:5]:
+        executor.submit("series", lambda code=category['CategoryCode']: (code, db_manager.get_series_by_category(code)),
+                        lambda result: print(f"Серии категории {result[0]}: {len(result[1])}"),
+                        debounce_ms=DEFAULT_DEBOUNCE_MS)
+
+    root.after(1000, root.quit)
+    root.mainloop()
+    executor.close()
+    db_manager.close()
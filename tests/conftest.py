@@ -0,0 +1,17 @@
+import os
+import sys
+
+# Модули приложения лежат в корне репозитория, без пакета
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+# Общие фабрики тестовых данных: тестовые модули импортируют их через "from conftest import ..."
+def make_fixture_ids(count, category="CS"):
+    """Уникальные корректные ID оснасток: AA и изделие NN перебираются по счетчику."""
+    digits = "0123456789ABCDEFGHKMNPQRSTUVWXYZ"
+    fixture_ids = []
+    for n in range(count):
+        item, unique_parts = divmod(n, len(digits) ** 2)
+        aa = digits[unique_parts // len(digits)] + digits[unique_parts % len(digits)]
+        fixture_ids.append(f"{category}.1{item:02d}.A01.{aa}0101-01")
+    return fixture_ids
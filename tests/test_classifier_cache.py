@@ -0,0 +1,51 @@
+import tempfile
+import unittest
+
+from classifier_cache import ClassifierCache
+from db_manager import FixtureDBManager
+
+
+class ClassifierCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = FixtureDBManager("cache.db", self.temp_dir.name)
+        # Другое соединение: рабочий поток импорта/запросов или другое рабочее место
+        self.other_db = FixtureDBManager("cache.db", self.temp_dir.name)
+        self.other_db.add_category("CS", "Сборочные")
+        self.other_db.add_series_description("CS", "1", "Первая")
+        self.cache = ClassifierCache(self.db)
+        self.assertTrue(self.cache.refresh())
+
+    def tearDown(self):
+        self.other_db.close()
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def test_unchanged_database_is_not_reloaded(self):
+        self.assertFalse(self.cache.refresh())
+
+    def test_fixture_writes_do_not_reload(self):
+        self.assertIsNotNone(self.other_db.add_fixture_id("CS.100.A01.010101-01"))
+        self.assertTrue(self.other_db.reserve_next_fixture_number("CS", "1", "00", "A"))
+        self.assertFalse(self.cache.refresh())
+
+    def test_classifier_changes_reload(self):
+        self.other_db.add_category("KP", "Кондукторы")
+        self.assertTrue(self.cache.refresh())
+        self.assertEqual(self.cache.get_name('category', ('KP',)), "Кондукторы")
+
+        self.other_db.add_series_description("CS", "1", "Первая (новая)")
+        self.assertTrue(self.cache.refresh())
+        self.assertEqual(self.cache.get_name('series', ('CS', '1')), "Первая (новая)")
+
+        self.other_db.conn.execute("DELETE FROM Categories WHERE CategoryCode = 'KP'")
+        self.other_db.conn.commit()
+        self.assertTrue(self.cache.refresh())
+        self.assertIsNone(self.cache.get_name('category', ('KP',)))
+
+    def test_force_reloads(self):
+        self.assertTrue(self.cache.refresh(force=True))
+
+
+if __name__ == "__main__":
+    unittest.main()
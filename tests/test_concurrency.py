@@ -0,0 +1,84 @@
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from conftest import make_fixture_ids
+from db_manager import FixtureDBManager
+
+
+class ConcurrentWritersTest(unittest.TestCase):
+    """
+    Два FixtureDBManager на одном файле (как два рабочих места) в режиме WAL с busy_timeout:
+    писатели и читатель в отдельных потоках не должны получать "database is locked".
+    """
+    BATCHES = 20
+    BATCH_SIZE = 200
+    RESERVATIONS = 50
+    READS = 200
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_a = FixtureDBManager("stress.db", self.temp_dir.name, busy_timeout=30.0)
+        self.db_b = FixtureDBManager("stress.db", self.temp_dir.name, busy_timeout=30.0)
+        self.errors = []
+
+    def tearDown(self):
+        self.db_a.close()
+        self.db_b.close()
+        self.temp_dir.cleanup()
+
+    def _run_in_thread(self, db, work):
+        def target():
+            try:
+                work()
+            except Exception as e:  # Any error, "database is locked" included, fails the test
+                self.errors.append(e)
+            finally:
+                db.close_thread_connection()
+        return threading.Thread(target=target)
+
+    def test_writers_and_reader_do_not_lock_each_other(self):
+        fixture_ids = make_fixture_ids(self.BATCHES * self.BATCH_SIZE)
+        reserved = []
+        read_counts = []
+
+        def write_fixtures():
+            for start in range(0, len(fixture_ids), self.BATCH_SIZE):
+                report = self.db_a.add_fixture_ids(fixture_ids[start:start + self.BATCH_SIZE])
+                statuses = {status for _, status, _ in report}
+                if statuses != {'added'}:
+                    raise AssertionError(f"add_fixture_ids: {statuses}")
+
+        def reserve_numbers():
+            for _ in range(self.RESERVATIONS):
+                fixture_number = self.db_b.reserve_next_fixture_number('CS', '1', '99', 'B')
+                if fixture_number is None:
+                    raise AssertionError("reserve_next_fixture_number вернул None")
+                reserved.append(fixture_number)
+
+        def read_fixtures():
+            for _ in range(self.READS):
+                # Raw query: reader errors must raise, not be printed and swallowed
+                read_counts.append(self.db_b.conn.execute("SELECT COUNT(*) FROM FixtureIDs").fetchone()[0])
+
+        threads = [self._run_in_thread(self.db_a, write_fixtures),
+                   self._run_in_thread(self.db_b, reserve_numbers),
+                   self._run_in_thread(self.db_b, read_fixtures)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        locked = [e for e in self.errors if isinstance(e, sqlite3.OperationalError) and "locked" in str(e)]
+        self.assertEqual(locked, [])
+        self.assertEqual(self.errors, [])
+        self.assertEqual(len(set(reserved)), self.RESERVATIONS)
+        # Каждое чтение видит зафиксированный снимок: число строк только растет
+        self.assertEqual(read_counts, sorted(read_counts))
+        total = self.db_a.conn.execute("SELECT COUNT(*) FROM FixtureIDs").fetchone()[0]
+        self.assertEqual(total, len(fixture_ids))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import tempfile
+import unittest
+
+from db_manager import DBRecord, FixtureDBManager
+
+
+class DBRecordTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = FixtureDBManager("records.db", self.temp_dir.name)
+        self.db.add_category("CS", "Сборочные")
+        self.record = self.db.get_categories()[0]
+
+    def tearDown(self):
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def test_iterates_values_like_tuple(self):
+        self.assertIsInstance(self.record, DBRecord)
+        self.assertEqual(tuple(self.record), ("CS", "Сборочные"))
+        code, name = self.record
+        self.assertEqual((code, name), ("CS", "Сборочные"))
+        self.assertEqual(self.record[0], "CS")
+        self.assertEqual(self.record[:1], ("CS",))
+
+    def test_dict_compatible_access(self):
+        self.assertEqual(self.record.keys(), ("CategoryCode", "CategoryName"))
+        self.assertEqual(dict(self.record), {"CategoryCode": "CS", "CategoryName": "Сборочные"})
+        self.assertEqual(self.record["CategoryName"], "Сборочные")
+        self.assertEqual(self.record.CategoryCode, "CS")
+        self.assertEqual(self.record.get("Missing", "N/A"), "N/A")
+        self.assertIn("CategoryCode", self.record)
+        self.assertEqual(list(self.record.items()), [("CategoryCode", "CS"), ("CategoryName", "Сборочные")])
+        with self.assertRaises(KeyError):
+            self.record["Missing"]
+
+    def test_no_per_row_dict(self):
+        self.assertFalse(hasattr(self.record, "__dict__"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,188 @@
+import csv
+import importlib.util
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+import excel_importer
+from db_manager import FixtureDBManager
+from excel_importer import ExcelClassifierImporter
+
+CLASSIFIER_ROWS = {
+    "Категории": [("CategoryCode", "CategoryName"), ("CS", "Сборочные"), ("KP", "Кондукторы")],
+    "Серии": [("CategoryCode", "SeriesCode", "SeriesName"), ("CS", "1", "Первая"), ("KP", "2", "Вторая")],
+    "Изделия": [("CategoryCode", "SeriesCode", "ItemNumberCode", "ItemNumberName"),
+                ("CS", "1", "00", "Корпус"), ("KP", "2", "01", "Крышка")],
+    "Операции": [("OperationCode", "OperationName"), ("A", "Сверление"), ("B", "Фрезерование")],
+}
+
+SLOW_PARSE_SECONDS = 3
+
+
+def slow_parse_sheet_in_process(excel_file, sheet_name, config):
+    """Разбор листа в процессе пула, который заведомо дольше ожидания отмены в тесте."""
+    time.sleep(SLOW_PARSE_SECONDS)
+    return excel_importer._parse_sheet_in_process(excel_file, sheet_name, config)
+
+
+class TextImportTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = FixtureDBManager("import.db", self.temp_dir.name)
+        self.importer = ExcelClassifierImporter(self.db)
+
+    def tearDown(self):
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def write_text_files(self, rows_by_sheet):
+        for sheet_name, rows in rows_by_sheet.items():
+            with open(os.path.join(self.temp_dir.name, f"{sheet_name}.csv"), "w", newline="",
+                      encoding="utf-8-sig") as f:
+                csv.writer(f, delimiter=";").writerows(rows)
+        return self.importer.find_text_files(self.temp_dir.name)
+
+    def test_reimport_counts_changes_without_rereading_tables(self):
+        text_files = self.write_text_files(CLASSIFIER_ROWS)
+        success, added, updated, skipped, missing = self.importer.import_from_text_files(text_files)
+        self.assertTrue(success)
+        self.assertEqual(added, {sheet_name: 2 for sheet_name in CLASSIFIER_ROWS})
+
+        changed = dict(CLASSIFIER_ROWS)
+        changed["Категории"] = [("CategoryCode", "CategoryName"), ("CS", "Сборочные (новые)"), ("NP", "Новая")]
+        text_files = self.write_text_files(changed)
+        statements = []
+        self.db.conn.set_trace_callback(statements.append)
+        success, added, updated, skipped, missing = self.importer.import_from_text_files(text_files, force=True)
+        self.db.conn.set_trace_callback(None)
+
+        self.assertTrue(success)
+        self.assertEqual((added["Категории"], updated["Категории"], skipped["Категории"]), (1, 1, 0))
+        self.assertEqual([row["CategoryCode"] for row in missing["Категории"]], ["KP"])
+        self.assertEqual(skipped["Изделия"], 2)
+        # The diff snapshot is reused by the bulk upsert: each table is read once per import
+        category_reads = [s for s in statements if s.startswith("SELECT") and "FROM Categories" in s]
+        self.assertEqual(len(category_reads), 1, category_reads)
+        self.assertEqual({row["CategoryCode"]: row["CategoryName"] for row in self.db.get_categories()},
+                         {"CS": "Сборочные (новые)", "KP": "Кондукторы", "NP": "Новая"})
+
+    def test_parsing_does_not_hold_write_lock(self):
+        text_files = self.write_text_files(CLASSIFIER_ROWS)
+        # Another workstation/thread with a short busy_timeout writes while the files are being read
+        other_db = FixtureDBManager("import.db", self.temp_dir.name, busy_timeout=0.1)
+        written = []
+
+        def progress(message):
+            if message.startswith("Чтение"):
+                written.append(other_db.reserve_next_fixture_number('CS', '1', '00', 'A'))
+
+        try:
+            success = self.importer.import_from_text_files(text_files, progress_callback=progress)[0]
+        finally:
+            other_db.close()
+        self.assertTrue(success)
+        self.assertEqual(len(written), len(CLASSIFIER_ROWS))
+        self.assertNotIn(None, written)
+
+    def test_cancel_during_apply_rolls_back(self):
+        text_files = self.write_text_files(CLASSIFIER_ROWS)
+        cancel_event = threading.Event()
+
+        def progress(message):
+            if message.startswith("Запись листа 'Изделия'"):
+                cancel_event.set()
+
+        success = self.importer.import_from_text_files(text_files, progress_callback=progress,
+                                                       cancel_event=cancel_event)[0]
+        self.assertFalse(success)
+        self.assertTrue(self.importer.cancelled)
+        self.assertEqual(self.db.get_categories(), [])
+        self.assertEqual(self.db.get_import_fingerprints(os.path.abspath(text_files["Категории"])), {})
+
+
+@unittest.skipUnless(importlib.util.find_spec("openpyxl"), "openpyxl не установлен")
+class ExcelImportTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = FixtureDBManager("import.db", self.temp_dir.name)
+        self.excel_file = os.path.join(self.temp_dir.name, "classifier_data.xlsx")
+
+    def tearDown(self):
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def write_workbook(self):
+        import openpyxl
+        workbook = openpyxl.Workbook()
+        workbook.remove(workbook.active)
+        for sheet_name, rows in CLASSIFIER_ROWS.items():
+            sheet = workbook.create_sheet(sheet_name)
+            for row in rows:
+                sheet.append(row)
+        # Stale dimensions: a formatted cell far below the data must not produce rows
+        workbook["Изделия"].cell(row=500, column=1).number_format = "0.00"
+        workbook.save(self.excel_file)
+
+    def test_streaming_import_and_unchanged_file_skip(self):
+        self.write_workbook()
+        for parallel in (False, True):
+            with self.subTest(parallel=parallel):
+                importer = ExcelClassifierImporter(self.db)
+                success, added, updated, skipped, missing = importer.import_from_excel(
+                    self.excel_file, force=True, parallel=parallel)
+                self.assertTrue(success)
+                self.assertEqual(sum(added.values()) + sum(skipped.values()), 8)
+                self.assertEqual(skipped["Изделия"], 2 if parallel else 0)
+        self.assertEqual(len(self.db.get_item_number_descriptions()), 2)
+
+        importer = ExcelClassifierImporter(self.db)
+        success, added, _, _, _ = importer.import_from_excel(self.excel_file)
+        self.assertTrue(success)
+        self.assertEqual(importer.unchanged_sheets, list(importer.sheet_configs))
+
+    def test_parsing_does_not_hold_write_lock(self):
+        self.write_workbook()
+        other_db = FixtureDBManager("import.db", self.temp_dir.name, busy_timeout=0.1)
+        written = []
+
+        def progress(message):
+            if message.startswith("Чтение листа"):
+                written.append(other_db.reserve_next_fixture_number('CS', '1', '00', 'A'))
+
+        try:
+            success = ExcelClassifierImporter(self.db).import_from_excel(self.excel_file, progress_callback=progress)[0]
+        finally:
+            other_db.close()
+        self.assertTrue(success)
+        self.assertTrue(written)
+        self.assertNotIn(None, written)
+
+    def test_cancel_during_parallel_parse_does_not_wait_for_workers(self):
+        self.write_workbook()
+        cancel_event = threading.Event()
+
+        def progress(message):
+            if message.startswith("Разбор листа"):
+                cancel_event.set()
+
+        importer = ExcelClassifierImporter(self.db)
+        original = excel_importer._parse_sheet_in_process
+        excel_importer._parse_sheet_in_process = slow_parse_sheet_in_process
+        try:
+            started = time.perf_counter()
+            success = importer.import_from_excel(self.excel_file, parallel=True, progress_callback=progress,
+                                                 cancel_event=cancel_event)[0]
+            elapsed = time.perf_counter() - started
+        finally:
+            excel_importer._parse_sheet_in_process = original
+
+        self.assertFalse(success)
+        self.assertTrue(importer.cancelled)
+        self.assertLess(elapsed, SLOW_PARSE_SECONDS / 2)
+        self.assertEqual(self.db.get_categories(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
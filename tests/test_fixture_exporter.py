@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+
+from conftest import make_fixture_ids
+from db_manager import FixtureDBManager
+from fixture_exporter import FixtureExporter
+
+
+class FixtureExporterTest(unittest.TestCase):
+    FIXTURES = 1500  # Больше одной страницы iter_fixture_ids_with_descriptions
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = FixtureDBManager("export.db", self.temp_dir.name)
+        self.db.add_fixture_ids(make_fixture_ids(self.FIXTURES))
+        self.target = os.path.join(self.temp_dir.name, "register.csv")
+
+    def tearDown(self):
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def test_export_writes_all_rows(self):
+        success, rows_count = FixtureExporter(self.db).export(self.target)
+        self.assertTrue(success)
+        self.assertEqual(rows_count, self.FIXTURES)
+        with open(self.target, encoding="utf-8-sig") as f:
+            self.assertEqual(sum(1 for _ in f), self.FIXTURES + 1)
+
+    def test_export_search_results_in_list_order(self):
+        search_text = "CS.101"
+        fixture_ids, _ = self.db.search_fixture_list_columns(search_text)
+        expected = [self.db.get_fixture_id_by_id(fixture_id)['FullIDString'] for fixture_id in fixture_ids]
+        self.assertTrue(expected)
+
+        success, rows_count = FixtureExporter(self.db).export(self.target, search_text=search_text)
+        self.assertTrue(success)
+        with open(self.target, encoding="utf-8-sig") as f:
+            exported = [line.split(";")[0] for line in f.read().splitlines()[1:]]
+        self.assertEqual(exported, expected)
+        self.assertEqual(rows_count, len(expected))
+
+    def test_read_error_keeps_previous_file(self):
+        with open(self.target, "w", encoding="utf-8") as f:
+            f.write("previous export\n")
+
+        build_fixture_query = self.db._build_fixture_query
+
+        def failing_second_page(*args, **kwargs):
+            query, params = build_fixture_query(*args, **kwargs)
+            if kwargs.get('after') is not None:
+                query = "SELECT * FROM MissingTable"
+            return query, params
+
+        self.db._build_fixture_query = failing_second_page
+        success, rows_count = FixtureExporter(self.db).export(self.target)
+
+        self.assertFalse(success)
+        self.assertEqual(rows_count, 0)
+        self.assertFalse(os.path.exists(f"{self.target}.tmp"))
+        with open(self.target, encoding="utf-8") as f:
+            self.assertEqual(f.read(), "previous export\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
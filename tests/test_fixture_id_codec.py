@@ -0,0 +1,34 @@
+import os
+import unittest
+
+import fixture_id_codec
+
+
+class FixtureIdCodecTest(unittest.TestCase):
+    def test_parse_and_format_round_trip(self):
+        for full_id in ("CS.100.A01.020101-01", "ABC.1Z9.B0Z.030201-X1A"):
+            parsed_id = fixture_id_codec.parse(full_id)
+            self.assertIsNotNone(parsed_id)
+            self.assertEqual(fixture_id_codec.format_id(parsed_id), full_id)
+
+    def test_empty_intermediate_version_is_none(self):
+        self.assertIsNone(fixture_id_codec.parse("CS.100.A01.020101-01")['IntermediateVersion'])
+        self.assertEqual(fixture_id_codec.parse("CS.100.A01.020101-01B")['IntermediateVersion'], "B")
+
+    def test_invalid_ids(self):
+        for value in ("", "cs.100.A01.020101-01", "CS.100.A01.020101-01BB", "CS.100.A01.0201-01", None, 42):
+            self.assertIsNone(fixture_id_codec.parse(value))
+
+    def test_parse_many_matches_parse(self):
+        ids = ["CS.100.A01.020101-01", "bad", None, "ABC.1Z9.B0Z.030201-X1A"]
+        self.assertEqual(list(fixture_id_codec.parse_many(ids)),
+                         [(full_id, fixture_id_codec.parse(full_id)) for full_id in ids])
+
+    def test_format_path(self):
+        parsed_id = fixture_id_codec.parse("CS.100.A01.020201-01B")
+        self.assertEqual(fixture_id_codec.format_path("root", parsed_id),
+                         os.path.join("root", "CS", "CS.100", "CS.100.A01", "CS.100.A01.020000-01B"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import tempfile
+import threading
+import time
+import unittest
+
+from db_manager import FixtureDBManager
+
+OPERATION = ('CS', '1', '00', 'A')
+
+
+class FixtureNumberReservationTest(unittest.TestCase):
+    THREADS = 8
+    RESERVATIONS_PER_THREAD = 25
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = FixtureDBManager("numbers.db", self.temp_dir.name)
+
+    def tearDown(self):
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def _reservation_count(self):
+        return self.db.conn.execute("SELECT COUNT(*) FROM FixtureNumberReservations").fetchone()[0]
+
+    def test_preview_does_not_reserve(self):
+        self.assertEqual(self.db.get_next_fixture_number(*OPERATION), '01')
+        self.assertEqual(self.db.get_next_fixture_number(*OPERATION), '01')
+        self.assertEqual(self._reservation_count(), 0)
+
+    def test_released_number_is_reused(self):
+        self.assertEqual(self.db.reserve_next_fixture_number(*OPERATION), '01')
+        self.assertEqual(self.db.reserve_next_fixture_number(*OPERATION), '02')
+        self.assertTrue(self.db.release_fixture_number_reservation(*OPERATION, '01'))
+        self.assertEqual(self.db.reserve_next_fixture_number(*OPERATION), '01')
+
+    def test_created_fixture_takes_over_reservation(self):
+        fixture_number = self.db.reserve_next_fixture_number(*OPERATION)
+        self.assertIsNotNone(self.db.add_fixture_id(f"CS.100.A{fixture_number}.010101-01"))
+        self.assertEqual(self._reservation_count(), 0)
+        self.assertEqual(self.db.get_next_fixture_number(*OPERATION), '02')
+
+    def test_reservation_joins_open_transaction(self):
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.assertEqual(self.db.reserve_next_fixture_number(*OPERATION), '01')
+                self.assertEqual(self.db.reserve_next_fixture_number(*OPERATION), '02')
+                raise RuntimeError("откат внешней транзакции")
+        self.assertEqual(self._reservation_count(), 0)
+
+        with self.db.transaction():
+            self.assertEqual(self.db.reserve_next_fixture_number(*OPERATION), '01')
+        self.assertEqual(self._reservation_count(), 1)
+
+    def test_concurrent_reservations_are_unique(self):
+        # Отдельные соединения (по одному на поток и экземпляр), как у нескольких рабочих мест
+        managers = [FixtureDBManager("numbers.db", self.temp_dir.name) for _ in range(2)]
+        reserved = []
+        errors = []
+
+        def reserve(db):
+            try:
+                for _ in range(self.RESERVATIONS_PER_THREAD):
+                    reserved.append(db.reserve_next_fixture_number(*OPERATION))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                db.close_thread_connection()
+
+        threads = [threading.Thread(target=reserve, args=(managers[n % len(managers)],))
+                   for n in range(self.THREADS)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        for db in managers:
+            db.close()
+
+        total = self.THREADS * self.RESERVATIONS_PER_THREAD
+        print(f"{total} резервов TT в {self.THREADS} потоках: {elapsed:.3f} с ({total / elapsed:.0f} в секунду)")
+        self.assertEqual(errors, [])
+        self.assertNotIn(None, reserved)
+        self.assertEqual(len(set(reserved)), total)
+        self.assertEqual(self._reservation_count(), total)
+
+
+if __name__ == "__main__":
+    unittest.main()
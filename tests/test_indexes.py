@@ -0,0 +1,37 @@
+import tempfile
+import unittest
+
+from db_manager import FixtureDBManager
+
+
+class IndexUsageTest(unittest.TestCase):
+    """Основные запросы к FixtureIDs не должны переходить на полное сканирование таблицы."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = FixtureDBManager("indexes.db", self.temp_dir.name)
+
+    def tearDown(self):
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def assert_all_queries_use_indexes(self):
+        results = self.db.explain_index_usage()
+        self.assertTrue(results)
+        for name, (uses_index, plan) in results.items():
+            with self.subTest(query=name):
+                self.assertTrue(uses_index, f"{name}: {'; '.join(plan)}")
+
+    def test_empty_database(self):
+        self.assert_all_queries_use_indexes()
+
+    def test_filled_database(self):
+        fixture_ids = [f"CS.1{item:02d}.A01.{aa:02d}0101-{version:02d}"
+                       for item in range(10) for aa in range(10, 30) for version in (1, 2)]
+        report = self.db.add_fixture_ids(fixture_ids)
+        self.assertEqual([status for _, status, _ in report], ['added'] * len(fixture_ids))
+        self.assert_all_queries_use_indexes()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,227 @@
+import importlib.util
+import threading
+import unittest
+
+HAS_GUI_DEPENDENCIES = all(importlib.util.find_spec(name) for name in ("customtkinter", "tkinter"))
+if HAS_GUI_DEPENDENCIES:
+    import main_gui
+
+
+class FakeScheduler:
+    """after/after_idle/after_cancel окна Tk без цикла событий: задания выполняет run_pending()."""
+
+    def __init__(self):
+        self.jobs = {}
+        self.next_id = 0
+        self.idle_runs = 0
+
+    def after(self, ms, callback):
+        self.next_id += 1
+        self.jobs[self.next_id] = callback
+        return self.next_id
+
+    def after_idle(self, callback):
+        def idle_callback():
+            self.idle_runs += 1
+            callback()
+        return self.after(0, idle_callback)
+
+    def after_cancel(self, job_id):
+        self.jobs.pop(job_id, None)
+
+    def run_pending(self):
+        jobs, self.jobs = self.jobs, {}
+        for callback in jobs.values():
+            callback()
+
+
+def make_app(scheduler):
+    """FixtureApp без окна и виджетов: только состояние, которое нужно проверяемым методам."""
+    app = object.__new__(main_gui.FixtureApp)
+    app.after, app.after_idle, app.after_cancel = scheduler.after, scheduler.after_idle, scheduler.after_cancel
+    app._refresh_job = None
+    app._dirty_fixture_list = False
+    app._dirty_fixture_numbers = False
+    app._import_thread = None
+    app._import_cancel_event = None
+    return app
+
+
+@unittest.skipUnless(HAS_GUI_DEPENDENCIES, "customtkinter не установлен")
+class ScheduleRefreshTest(unittest.TestCase):
+    def setUp(self):
+        self.scheduler = FakeScheduler()
+        self.app = make_app(self.scheduler)
+        self.refreshed = []
+        self.app.update_fixture_number_combobox = lambda: self.refreshed.append("fixture_numbers")
+        self.app._refresh_fixture_list_with_current_selection = lambda: self.refreshed.append("fixture_list")
+
+    def test_cascade_runs_one_idle_pass(self):
+        # Category -> series -> item cascade: every handler of the chain schedules a refresh
+        self.app._schedule_refresh(fixture_numbers=True)
+        self.app._schedule_refresh()
+        self.app._schedule_refresh(fixture_numbers=True)
+        self.app._schedule_refresh(fixture_list=False, fixture_numbers=True)
+        self.assertEqual(len(self.scheduler.jobs), 1)
+
+        self.scheduler.run_pending()
+        self.assertEqual(self.scheduler.idle_runs, 1)
+        self.assertEqual(self.refreshed, ["fixture_numbers", "fixture_list"])
+        self.assertIsNone(self.app._refresh_job)
+
+    def test_next_action_schedules_a_new_pass(self):
+        self.app._schedule_refresh()
+        self.scheduler.run_pending()
+        self.app._schedule_refresh(fixture_list=False, fixture_numbers=True)
+        self.app._schedule_refresh(fixture_list=False, fixture_numbers=True)
+        self.scheduler.run_pending()
+        self.assertEqual(self.scheduler.idle_runs, 2)
+        self.assertEqual(self.refreshed, ["fixture_list", "fixture_numbers"])
+
+
+@unittest.skipUnless(HAS_GUI_DEPENDENCIES, "customtkinter не установлен")
+class StartupImportTest(unittest.TestCase):
+    def run_unchanged_excel_import(self, on_startup):
+        scheduler = FakeScheduler()
+        app = make_app(scheduler)
+        prompts = []
+        statuses = []
+
+        class UnchangedImporter:
+            def __init__(self, db_manager_instance):
+                self.sheet_configs = {"Категории": {}, "Операции": {}}
+                self.unchanged_sheets = list(self.sheet_configs)
+                self.cancelled = False
+
+            def import_from_excel(self, excel_file_path, **kwargs):
+                return True, {}, {}, {}, {}
+
+        class DBManager:
+            def close_thread_connection(self):
+                pass
+
+        app.db_manager = DBManager()
+        app._set_import_running = lambda running: None
+        app.set_status = lambda message, is_error=False: statuses.append(message)
+        original = (main_gui.excel_importer.ExcelClassifierImporter, main_gui.messagebox.askyesno)
+        main_gui.excel_importer.ExcelClassifierImporter = UnchangedImporter
+        main_gui.messagebox.askyesno = lambda title, message: prompts.append(message) or False
+        try:
+            app.import_excel_data_command(on_startup=on_startup)
+            app._import_thread.join(5)
+            scheduler.run_pending()
+        finally:
+            main_gui.excel_importer.ExcelClassifierImporter, main_gui.messagebox.askyesno = original
+
+        self.assertIsNone(app._import_thread)
+        self.assertEqual(statuses[-1], "Данные Excel не изменились с последнего импорта. Импорт пропущен.")
+        return prompts
+
+    def test_startup_import_runs_in_background_without_prompt(self):
+        self.assertEqual(self.run_unchanged_excel_import(on_startup=True), [])
+
+    def test_button_import_offers_forced_reimport(self):
+        self.assertEqual(len(self.run_unchanged_excel_import(on_startup=False)), 1)
+
+
+@unittest.skipUnless(HAS_GUI_DEPENDENCIES, "customtkinter не установлен")
+class OnClosingTest(unittest.TestCase):
+    def test_destroys_window_only_after_import_thread_finished(self):
+        scheduler = FakeScheduler()
+        app = make_app(scheduler)
+        events = []
+        app._import_cancel_event = threading.Event()
+
+        def import_worker():
+            app._import_cancel_event.wait(5)
+            events.append("import finished")
+
+        app._import_thread = threading.Thread(target=import_worker)
+        app._import_thread.start()
+
+        class Closable:
+            def __init__(self, name):
+                self.name = name
+
+            def close(self):
+                events.append(f"{self.name} closed")
+
+        app.query_executor = Closable("query_executor")
+        app.db_manager = Closable("db_manager")
+        app.destroy = lambda: events.append("destroyed")
+        app.on_closing()
+
+        self.assertEqual(events, ["import finished", "query_executor closed", "db_manager closed", "destroyed"])
+        self.assertIsNone(app._import_thread)
+
+
+@unittest.skipUnless(HAS_GUI_DEPENDENCIES, "customtkinter не установлен")
+class ExportTest(unittest.TestCase):
+    def test_export_runs_on_query_executor_with_search_text(self):
+        app = make_app(FakeScheduler())
+        submitted = []
+        exports = []
+        statuses = []
+
+        class RecordingExecutor:
+            def submit(self, channel, query, on_result, debounce_ms=0):
+                submitted.append(channel)
+                on_result(query())
+
+        class RecordingExporter:
+            def __init__(self, db_manager_instance):
+                pass
+
+            def export(self, file_path, **kwargs):
+                exports.append((file_path, kwargs))
+                return True, 3
+
+        class Var:
+            def get(self):
+                return True
+
+        app.query_executor = RecordingExecutor()
+        app.db_manager = None
+        app._search_text = "корпус"
+        app.hide_non_actual_versions_var = Var()
+        app.set_status = lambda message, is_error=False: statuses.append(message)
+        original = (main_gui.filedialog.asksaveasfilename, main_gui.fixture_exporter.FixtureExporter)
+        main_gui.filedialog.asksaveasfilename = lambda **kwargs: "register.xlsx"
+        main_gui.fixture_exporter.FixtureExporter = RecordingExporter
+        try:
+            app.export_fixtures_command()
+        finally:
+            main_gui.filedialog.asksaveasfilename, main_gui.fixture_exporter.FixtureExporter = original
+
+        self.assertEqual(submitted, ["export"])
+        self.assertEqual(exports, [("register.xlsx", {'only_actual': True, 'search_text': "корпус"})])
+        self.assertEqual(statuses[-1], "Выгружено оснасток: 3 в 'register.xlsx'.")
+
+
+@unittest.skipUnless(HAS_GUI_DEPENDENCIES, "customtkinter не установлен")
+class ClassifierReloadTest(unittest.TestCase):
+    def test_category_values_follow_cache_reload(self):
+        app = make_app(FakeScheduler())
+
+        class Combobox:
+            values = None
+
+            def configure(self, values=None, state=None):
+                self.values = values
+
+        class Cache:
+            categories = [{'CategoryCode': "CS", 'CategoryName': "Сборочные"},
+                          {'CategoryCode': "KP", 'CategoryName': "Кондукторы"}]
+            operations = [{'OperationCode': "A", 'OperationName': "Сверление"}]
+
+        app.classifier_cache = Cache()
+        app.category_combobox = Combobox()
+        app.operation_combobox = Combobox()
+        app._update_classifier_combobox_values()
+
+        self.assertEqual(app.category_combobox.values, ["Все категории", "CS (Сборочные)", "KP (Кондукторы)"])
+        self.assertEqual(app.operation_combobox.values, ["Все операции", "A (Сверление)"])
+
+
+if __name__ == "__main__":
+    unittest.main()
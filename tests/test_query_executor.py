@@ -0,0 +1,73 @@
+import tempfile
+import time
+import unittest
+
+from db_manager import FixtureDBManager
+from query_executor import QueryExecutor
+
+
+class FakeTk:
+    """after/after_cancel без цикла событий Tk: pump() выполняет наступившие задания."""
+
+    def __init__(self):
+        self.jobs = {}
+        self.next_id = 0
+
+    def after(self, ms, callback):
+        self.next_id += 1
+        self.jobs[self.next_id] = (time.monotonic() + ms / 1000, callback)
+        return self.next_id
+
+    def after_cancel(self, job_id):
+        self.jobs.pop(job_id, None)
+
+    def pump(self, until, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while not until() and time.monotonic() < deadline:
+            now = time.monotonic()
+            for job_id, (due, callback) in sorted(self.jobs.items()):
+                if due <= now:
+                    del self.jobs[job_id]
+                    callback()
+            time.sleep(0.001)
+
+
+class QueryExecutorTest(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = FixtureDBManager("executor.db", self.temp_dir.name)
+        self.tk = FakeTk()
+        self.executor = QueryExecutor(self.tk, self.db)
+
+    def tearDown(self):
+        self.executor.close()
+        self.db.close()
+        self.temp_dir.cleanup()
+
+    def test_only_latest_result_of_channel_is_delivered(self):
+        delivered = []
+        for n in range(5):
+            self.executor.submit("list", lambda n=n: n, delivered.append, debounce_ms=20)
+        self.tk.pump(lambda: delivered)
+        self.assertEqual(delivered, [4])
+        self.assertEqual(self.executor.executed_counts, {"list": 1})
+
+    def test_failing_handler_does_not_stop_polling(self):
+        delivered = []
+
+        def failing_handler(result):
+            raise RuntimeError("handler failed")
+
+        self.executor.submit("first", lambda: 1, failing_handler)
+        self.executor.submit("second", lambda: 2, delivered.append)
+        self.tk.pump(lambda: delivered)
+        self.assertEqual(delivered, [2])
+
+        # Results submitted after the failure are still polled and delivered
+        self.executor.submit("first", lambda: 3, delivered.append)
+        self.tk.pump(lambda: len(delivered) == 2)
+        self.assertEqual(delivered, [2, 3])
+
+
+if __name__ == "__main__":
+    unittest.main()